@@ -12,8 +12,10 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 import os
 import sys
+import tempfile
 from pathlib import Path
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 from django_project.storage import r2_storage_options
 
@@ -104,6 +106,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "session.middleware.PresignTimingMiddleware",
 ]
 
 ROOT_URLCONF = "django_project.urls"
@@ -251,6 +254,38 @@ TRACK_FILE_MAX_UPLOAD_SIZE = int(os.getenv("TRACK_FILE_MAX_UPLOAD_SIZE", str(50
 TAKE_FILE_MAX_UPLOAD_SIZE = int(os.getenv("TAKE_FILE_MAX_UPLOAD_SIZE", str(250 * 1024 * 1024)))
 DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("DATA_UPLOAD_MAX_MEMORY_SIZE", str(20 * 1024 * 1024)))
 FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", str(10 * 1024 * 1024)))
+LICK_IMPORT_MAX_ROWS = int(os.getenv("LICK_IMPORT_MAX_ROWS", "1000"))
+
+# Django's cache holds session-detail documents with their rebuild locks and
+# hit counters (session/caching.py), and the rendition render locks. Set
+# REDIS_URL so every worker shares them. Without it each process keeps its
+# own LocMem cache: the locks then only stop a stampede within one worker,
+# and cache-stats covers that worker alone.
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Cached GET /sessions/{id}/ documents (session/caching.py). Keep the TTL
+# well inside R2_SIGNED_URL_EXPIRE so cached presigned media URLs stay valid.
+SESSION_DETAIL_CACHE_TIMEOUT = int(os.getenv("SESSION_DETAIL_CACHE_TIMEOUT", "300"))
+SESSION_DETAIL_CACHE_LOCK_TIMEOUT = int(os.getenv("SESSION_DETAIL_CACHE_LOCK_TIMEOUT", "5"))
+
+# GET /api/v1/sync/ (session/sync.py): rows per kind per page, how far the
+# next cursor reaches back for late commits, and how long deletions are kept.
+SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "500"))
+SYNC_CURSOR_OVERLAP = int(os.getenv("SYNC_CURSOR_OVERLAP", "5"))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
 
 # WhiteNoise configuration for serving static files in production
 STORAGES = {
@@ -271,11 +306,89 @@ STORAGES = {
 # storage (Cloudflare R2)".
 _R2_STORAGE_OPTIONS = r2_storage_options(os.environ)
 USE_R2_MEDIA_STORAGE = _R2_STORAGE_OPTIONS is not None
+R2_SIGNED_URL_EXPIRE = (_R2_STORAGE_OPTIONS or {}).get("querystring_expire", 43200)
+# Media URLs are signed as of the start of a fixed window of this many
+# seconds, so an object keeps a byte-identical URL (and browser cache entry)
+# for the whole window and every URL has at least EXPIRE - WINDOW left.
+R2_SIGNED_URL_WINDOW = max(1, R2_SIGNED_URL_EXPIRE // 2)
 if USE_R2_MEDIA_STORAGE:
     STORAGES["default"] = {
-        "BACKEND": "storages.backends.s3.S3Storage",
+        # S3Storage plus an LRU of presigned URLs (session/storage.py).
+        "BACKEND": "session.storage.R2MediaStorage",
         "OPTIONS": _R2_STORAGE_OPTIONS,
     }
+# Presigned URLs are reused for this long (0 disables the cache). Entries
+# never outlive their signing window, so a longer TTL has no effect.
+PRESIGNED_URL_CACHE_TTL = int(os.getenv("PRESIGNED_URL_CACHE_TTL", str(R2_SIGNED_URL_WINDOW)))
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv("PRESIGNED_URL_CACHE_SIZE", "10000"))
+
+# How GET /takes/{id}/file delivers R2 objects: "redirect" answers with a
+# 302 to a presigned URL valid for TAKE_FILE_REDIRECT_EXPIRE seconds so R2
+# serves the bytes; "proxy" streams them through the app. Local media is
+# always proxied.
+TAKE_FILE_DELIVERY = os.getenv("TAKE_FILE_DELIVERY", "redirect").strip().lower()
+if TAKE_FILE_DELIVERY not in ("redirect", "proxy"):
+    raise ImproperlyConfigured("TAKE_FILE_DELIVERY must be 'redirect' or 'proxy'.")
+TAKE_FILE_REDIRECT_EXPIRE = int(os.getenv("TAKE_FILE_REDIRECT_EXPIRE", "300"))
+
+# Direct-to-R2 uploads (session/uploads.py): the multipart part size (at
+# least 5 MiB, the S3 minimum) and how long each presigned part URL lasts.
+DIRECT_UPLOAD_PART_SIZE = max(
+    5 * 1024 * 1024,
+    int(os.getenv("DIRECT_UPLOAD_PART_SIZE", str(8 * 1024 * 1024))),
+)
+DIRECT_UPLOAD_URL_EXPIRE = int(os.getenv("DIRECT_UPLOAD_URL_EXPIRE", "3600"))
+# Direct and resumable uploads idle this long are aborted by
+# `manage.py expire_uploads`; resumable ones answer 410 from then on.
+UPLOAD_EXPIRE_HOURS = int(os.getenv("UPLOAD_EXPIRE_HOURS", "24"))
+# Live take uploads to R2 (session/live.py) stage the unsent tail here.
+LIVE_UPLOAD_STAGING_DIR = Path(
+    os.getenv("LIVE_UPLOAD_STAGING_DIR", Path(tempfile.gettempdir()) / "theshed-live-uploads")
+)
+# Deleted track and take files (session/media_deletion.py) are removed after
+# commit by a background thread: up to MEDIA_DELETE_BATCH_SIZE names per
+# batch (one DeleteObjects call on R2, which takes at most 1000), collected
+# for up to MEDIA_DELETE_LINGER seconds, on MEDIA_DELETE_WORKERS threads for
+# local disk, retried MEDIA_DELETE_RETRIES times from MEDIA_DELETE_BACKOFF
+# seconds apart (doubling) before being dead-lettered to the log.
+MEDIA_DELETE_BATCH_SIZE = min(1000, int(os.getenv("MEDIA_DELETE_BATCH_SIZE", "1000")))
+MEDIA_DELETE_LINGER = float(os.getenv("MEDIA_DELETE_LINGER", "0.05"))
+MEDIA_DELETE_WORKERS = int(os.getenv("MEDIA_DELETE_WORKERS", "8"))
+MEDIA_DELETE_RETRIES = int(os.getenv("MEDIA_DELETE_RETRIES", "3"))
+MEDIA_DELETE_BACKOFF = float(os.getenv("MEDIA_DELETE_BACKOFF", "0.5"))
+# `manage.py gc_media` leaves unreferenced files younger than this alone.
+MEDIA_GC_GRACE_HOURS = int(os.getenv("MEDIA_GC_GRACE_HOURS", "24"))
+# Waveform peaks of MP3 tracks and audio takes (session/waveforms.py): the
+# decode rate when ffmpeg is available, samples per min/max pair at the
+# finest level, the size of the coarsest level, int8 or int16 storage, and
+# how many background threads build them.
+WAVEFORM_SAMPLE_RATE = int(os.getenv("WAVEFORM_SAMPLE_RATE", "22050"))
+WAVEFORM_SAMPLES_PER_PEAK = int(os.getenv("WAVEFORM_SAMPLES_PER_PEAK", "256"))
+WAVEFORM_MIN_PEAKS = int(os.getenv("WAVEFORM_MIN_PEAKS", "512"))
+WAVEFORM_BITS = 16 if os.getenv("WAVEFORM_BITS", "8") == "16" else 8
+WAVEFORM_WORKERS = int(os.getenv("WAVEFORM_WORKERS", "2"))
+# Time-stretched track renditions (session/renditions.py): speeds are rounded
+# to multiples of RENDITION_SPEED_STEP, rendered at RENDITION_SAMPLE_RATE
+# (MP3 at RENDITION_BITRATE when ffmpeg is installed, WAV without it), and
+# the least recently used are deleted once together they pass
+# RENDITION_CACHE_BYTES. One request renders a given speed while holding a
+# cache lock for at most RENDITION_LOCK_TIMEOUT seconds; others wait up to
+# RENDITION_LOCK_WAIT seconds for it before answering 503 with Retry-After.
+RENDITION_SPEED_STEP = float(os.getenv("RENDITION_SPEED_STEP", "0.05"))
+RENDITION_SAMPLE_RATE = int(os.getenv("RENDITION_SAMPLE_RATE", "44100"))
+RENDITION_BITRATE = os.getenv("RENDITION_BITRATE", "128k")
+RENDITION_CACHE_BYTES = int(os.getenv("RENDITION_CACHE_BYTES", str(2 * 1024**3)))
+RENDITION_LOCK_TIMEOUT = int(os.getenv("RENDITION_LOCK_TIMEOUT", "600"))
+RENDITION_LOCK_WAIT = float(os.getenv("RENDITION_LOCK_WAIT", "10"))
+# Lick clips (session/clips.py): decode rate and MP3 bitrate when ffmpeg is
+# installed, the longest lead-in ?pre_roll= may ask for (seconds), how many
+# lead-ins are kept per segment, and the total size kept before the least
+# recently used clips are deleted.
+LICK_CLIP_SAMPLE_RATE = int(os.getenv("LICK_CLIP_SAMPLE_RATE", "44100"))
+LICK_CLIP_BITRATE = os.getenv("LICK_CLIP_BITRATE", "96k")
+LICK_CLIP_MAX_PRE_ROLL = float(os.getenv("LICK_CLIP_MAX_PRE_ROLL", "5"))
+LICK_CLIP_VARIANTS = int(os.getenv("LICK_CLIP_VARIANTS", "4"))
+LICK_CLIP_CACHE_BYTES = int(os.getenv("LICK_CLIP_CACHE_BYTES", str(512 * 1024**2)))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -21,6 +21,7 @@ function buildTrack(overrides: Partial<Track> = {}): Track {
     source_type: "youtube",
     youtube_url: "https://youtu.be/abc",
     file: null,
+    file_name: "",
     bpm: 90,
     last_speed: null,
     position: 3,
@@ -176,6 +177,7 @@ describe("AddTrackForm", () => {
       source_type: "mp3",
       youtube_url: "",
       file: "https://media.test/praise.mp3",
+      file_name: "praise.mp3",
       bpm: null,
     });
     const file = new File(["audio-data"], "praise.mp3", { type: "audio/mpeg" });
@@ -73,6 +73,7 @@ function buildTrack(overrides: Partial<Track> = {}): Track {
     source_type: "youtube",
     youtube_url: "https://youtu.be/4nqDHK_dtwE",
     file: null,
+    file_name: "",
     bpm: null,
     last_speed: null,
     position: 0,
@@ -402,7 +402,16 @@ export function LickPanel({
     }));
 
     try {
-      await reorderLicks(track.id, reordered);
+      const positions = await reorderLicks(track.id, reordered);
+      mutateTrack((current) => ({
+        ...current,
+        licks: sortLicks(
+          current.licks.map((lick) => ({
+            ...lick,
+            position: positions[lick.id] ?? lick.position,
+          }))
+        ),
+      }));
     } catch (err) {
       setError(err instanceof Error ? err.message : "Could not reorder licks.");
       replaceTrack(track);
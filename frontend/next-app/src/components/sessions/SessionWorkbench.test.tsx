@@ -67,6 +67,7 @@ jest.mock("@/components/sessions/AddTrackForm", () => ({
           source_type: "youtube",
           youtube_url: "https://youtu.be/abcdefghijk",
           file: null,
+          file_name: "",
           bpm: null,
           last_speed: null,
           position: insertPosition,
@@ -91,6 +92,7 @@ function buildTrack(overrides: Partial<Track> = {}): Track {
     source_type: "youtube",
     youtube_url: "https://youtu.be/4nqDHK_dtwE",
     file: null,
+    file_name: "",
     bpm: null,
     last_speed: null,
     position: 0,
@@ -108,14 +108,8 @@ export function SessionWorkbench({ session }: { session: SessionDetail }) {
     pendingCreatedTrackIdRef.current = track.id;
     setSessionState((current) => ({
       ...current,
-      tracks: sortTracks([
-        track,
-        ...current.tracks.map((existingTrack) =>
-          existingTrack.position >= track.position
-            ? { ...existingTrack, position: existingTrack.position + 1 }
-            : existingTrack
-        ),
-      ]),
+      // The server gave the new track a key between its neighbours' keys.
+      tracks: sortTracks([track, ...current.tracks]),
       updated_at: new Date().toISOString(),
     }));
     setSelectedTrackId(track.id);
@@ -151,7 +145,16 @@ export function SessionWorkbench({ session }: { session: SessionDetail }) {
     }));
 
     try {
-      await reorderTracks(sessionState.id, trackIds);
+      const positions = await reorderTracks(sessionState.id, trackIds);
+      setSessionState((current) => ({
+        ...current,
+        tracks: sortTracks(
+          current.tracks.map((track) => ({
+            ...track,
+            position: positions[track.id] ?? track.position,
+          }))
+        ),
+      }));
     } catch (err) {
       setSidebarError(err instanceof Error ? err.message : "Could not reorder tracks.");
       setSessionState((current) => ({
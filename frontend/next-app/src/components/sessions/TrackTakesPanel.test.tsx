@@ -38,6 +38,7 @@ function buildTrack(overrides: Partial<Track> = {}): Track {
     source_type: "youtube",
     youtube_url: "https://youtu.be/abcdefghijk",
     file: null,
+    file_name: "",
     bpm: null,
     last_speed: null,
     position: 0,
@@ -56,6 +57,7 @@ function buildTake(overrides: Partial<Take> = {}): Take {
     name: "Pocket Study take 1",
     capture_mode: "video_audio",
     file: "/media/takes/pocket-study.webm",
+    file_name: "pocket-study.webm",
     created_at: "2026-05-28T10:10:00.000Z",
     updated_at: "2026-05-28T10:10:00.000Z",
     ...overrides,
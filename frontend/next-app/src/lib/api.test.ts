@@ -164,4 +164,17 @@ describe("API write helpers", () => {
     await deleteTake(34);
     expectDeleteRequest("/api/django/takes/34/");
   });
+
+  it("returns the stored position keys after a reorder", async () => {
+    (global.fetch as jest.MockedFunction<typeof fetch>).mockResolvedValueOnce({
+      ok: true,
+      status: 200,
+      headers: {
+        get: (name: string) => (name.toLowerCase() === "content-type" ? "application/json" : null),
+      },
+      json: async () => ({ ok: true, positions: { "21": 2048, "22": 1024 } }),
+    } as Response);
+
+    await expect(reorderLicks(8, [22, 21])).resolves.toEqual({ "21": 2048, "22": 1024 });
+  });
 });
@@ -95,12 +95,17 @@ export async function deleteSession(sessionId: number) {
   );
 }
 
+// Stored position keys by id, which the caller should adopt: positions are
+// sparse sort keys, not the indexes the reorder was sent as.
+export type ReorderedPositions = Record<string, number>;
+
 export async function reorderTracks(sessionId: number, trackIds: number[]) {
-  await requestJson<{ ok: true }>(
+  const { positions } = await requestJson<{ ok: true; positions: ReorderedPositions }>(
     `/api/django/sessions/${sessionId}/reorder-tracks/`,
     jsonRequest("POST", { track_ids: trackIds }),
     "Could not reorder tracks."
   );
+  return positions;
 }
 
 export async function createTrack(formData: FormData) {
@@ -135,11 +140,12 @@ export async function deleteTrack(trackId: number) {
 }
 
 export async function reorderLicks(trackId: number, lickIds: number[]) {
-  await requestJson<{ ok: true }>(
+  const { positions } = await requestJson<{ ok: true; positions: ReorderedPositions }>(
     `/api/django/tracks/${trackId}/reorder-licks/`,
     jsonRequest("POST", { lick_ids: lickIds }),
     "Could not reorder licks."
   );
+  return positions;
 }
 
 export async function createLick(payload: JsonBody) {
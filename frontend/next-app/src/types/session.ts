@@ -19,6 +19,7 @@ export interface Take {
   name: string;
   capture_mode: TakeCaptureMode;
   file: string;
+  file_name: string;
   created_at: string;
   updated_at: string;
 }
@@ -31,6 +32,7 @@ export interface Track {
   source_type: TrackSourceType;
   youtube_url: string;
   file: string | null;
+  file_name: string;
   bpm: number | null;
   last_speed: number | null;
   position: number;
@@ -1,6 +1,16 @@
 from django.contrib import admin
 
-from .models import Lick, Session, Take, Track
+from .models import (
+    Clip,
+    Lick,
+    MediaBlob,
+    MediaUpload,
+    Rendition,
+    Session,
+    Take,
+    Tombstone,
+    Track,
+)
 
 
 @admin.register(Session)
@@ -27,3 +37,33 @@ class TakeAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "track", "capture_mode", "created_at")
     list_filter = ("capture_mode",)
     search_fields = ("name", "track__name")
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "object_id", "user", "deleted_at")
+    list_filter = ("kind",)
+
+
+@admin.register(MediaUpload)
+class MediaUploadAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "key", "size", "user", "created_at")
+    list_filter = ("kind", "status")
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "size", "ref_count", "created_at")
+    search_fields = ("sha256", "name")
+
+
+@admin.register(Rendition)
+class RenditionAdmin(admin.ModelAdmin):
+    list_display = ("id", "track", "speed_percent", "size", "last_used_at", "created_at")
+    search_fields = ("file", "source")
+
+
+@admin.register(Clip)
+class ClipAdmin(admin.ModelAdmin):
+    list_display = ("id", "source", "start_ms", "end_ms", "pre_roll_ms", "size", "last_used_at")
+    search_fields = ("source", "file")
@@ -0,0 +1,66 @@
+"""Content-addressed, reference-counted storage of track and take files.
+
+Musicians post the same MP3 or PDF chart into many sessions, and every
+upload used to be stored again under ``tracks/``. A file posted through the
+API is now kept once as ``blobs/<sha256[:2]>/<sha256><ext>``, with a
+``MediaBlob`` row counting the tracks and takes that point at it:
+
+* ``acquire`` takes a reference and writes the file only when no blob with
+  that hash exists yet, so a duplicate upload costs no storage write;
+* ``release`` drops a reference and deletes the blob and its file with the
+  last one (the file once the transaction commits).
+
+The hash is computed by ``HashingUploadHandler`` while the body streams in.
+Direct, resumable and live uploads go straight to their final key without
+a hash, and files stored before blobs existed have no ``blob`` either; both
+keep their own name and are deleted with their row as before.
+"""
+
+import posixpath
+
+from django.db import transaction
+from django.db.models import F
+
+from .media_deletion import delete_later
+from .models import MediaBlob
+
+
+BLOB_PREFIX = "blobs"
+
+
+def blob_name(sha256, filename):
+    extension = posixpath.splitext(filename or "")[1].lower()
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256}{extension}"
+
+
+def acquire(storage, file_obj, sha256):
+    """A new reference to the blob holding ``file_obj``, whose content
+    hashes to ``sha256``. The file is stored only if the blob is new."""
+    with transaction.atomic():
+        blob, created = MediaBlob.objects.select_for_update().get_or_create(
+            sha256=sha256,
+            defaults={"name": blob_name(sha256, file_obj.name), "size": file_obj.size},
+        )
+        if created:
+            # A leftover object under the name (say from a rolled-back
+            # request) makes the storage pick another one; use what it picks.
+            stored = storage.save(blob.name, file_obj)
+            if stored != blob.name:
+                blob.name = stored
+                blob.save(update_fields=["name"])
+        MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+        blob.ref_count += 1
+    return blob
+
+
+def release(storage, blob_id):
+    """Drop one reference to a blob, deleting it once nothing uses it."""
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+            return
+        blob.delete()
+        delete_later(storage, blob.name)
@@ -0,0 +1,114 @@
+"""Per-session cache and validators for ``GET /sessions/{id}/``.
+
+The nested Track -> Lick/Take tree is expensive to build through DRF's
+field machinery, and the practice page re-fetches it constantly, so the
+serialized document is kept in Django's cache.
+
+Documents are keyed by ``Session.version``, which every write under the
+session advances (see ``session/signals.py`` and
+``SessionQuerySet.bump_version``). A stale document is therefore never read
+again and simply ages out, and the same version doubles as the ETag so an
+unchanged session can be answered with a 304 before the tree is touched.
+The presigned-URL window (``media_url_epoch``) is part of both, so a new
+window never pairs a fresh ETag with a document holding expired URLs.
+
+The rebuild lock and the hit counters live in the same cache. They only
+span every worker when ``CACHES`` is shared (``REDIS_URL``); on the
+per-process fallback ``cache-stats`` says so with ``"scope": "process"``.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+
+STATS_KEYS = ("hits", "misses", "coalesced", "uncached")
+
+
+def _stats_key(name):
+    return f"session-detail:stats:{name}"
+
+
+def _count(name):
+    key = _stats_key(name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); losing one sample is fine.
+        pass
+
+
+def _document_key(practice_session, variant):
+    variant_hash = hashlib.md5(variant.encode()).hexdigest()[:12]
+    return (
+        f"session-detail:doc:{practice_session.pk}:"
+        f"{practice_session.version}:{media_url_epoch()}:{variant_hash}"
+    )
+
+
+def media_url_epoch():
+    """Index of the current presigned-URL window, or 0 for local media.
+
+    R2 media URLs change exactly when this does (see
+    ``session.storage.signing_window``), so it takes part in ETags for that
+    backend.
+    """
+    if not settings.USE_R2_MEDIA_STORAGE:
+        return 0
+    return int(time.time() // settings.R2_SIGNED_URL_WINDOW)
+
+
+def session_detail_etag(practice_session):
+    return f'W/"session-{practice_session.pk}-{practice_session.version}-{media_url_epoch()}"'
+
+
+def cached_session_detail(practice_session, variant, build):
+    """Return the cached document for ``practice_session`` or ``build()`` it.
+
+    ``variant`` distinguishes renderings that embed request-dependent data
+    (absolute media URLs). Only one worker rebuilds a missing document; the
+    others wait briefly for it instead of stampeding the database, and fall
+    back to building uncached if the lock holder takes too long.
+    """
+    key = _document_key(practice_session, variant)
+    document = cache.get(key)
+    if document is not None:
+        _count("hits")
+        return document
+
+    lock_key = f"{key}:lock"
+    lock_timeout = settings.SESSION_DETAIL_CACHE_LOCK_TIMEOUT
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        _count("misses")
+        try:
+            document = build()
+            cache.set(key, document, timeout=settings.SESSION_DETAIL_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return document
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        document = cache.get(key)
+        if document is not None:
+            _count("coalesced")
+            return document
+
+    _count("uncached")
+    return build()
+
+
+def session_detail_cache_stats():
+    stats = cache.get_many([_stats_key(name) for name in STATS_KEYS])
+    counts = {name: stats.get(_stats_key(name), 0) for name in STATS_KEYS}
+    served = sum(counts.values())
+    counts["hit_ratio"] = (
+        round((counts["hits"] + counts["coalesced"]) / served, 4) if served else None
+    )
+    counts["scope"] = "process" if isinstance(caches["default"], LocMemCache) else "shared"
+    return counts
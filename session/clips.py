@@ -0,0 +1,137 @@
+"""Short, compact clips of the segment a lick loops over.
+
+A lick is only ``start_seconds``/``end_seconds`` over its track, and the
+track can be a 50 MB WAV or FLAC: looping four seconds of it meant fetching
+the whole file. ``GET /licks/{id}/clip/`` serves just the segment instead,
+with ``?pre_roll=`` seconds of lead-in (at most ``LICK_CLIP_MAX_PRE_ROLL``):
+
+* only the segment is decoded (ffmpeg seeks to it; WAV files are read from
+  its first frame), mixed to mono and encoded as MP3 at
+  ``LICK_CLIP_BITRATE``, or as WAV without ffmpeg;
+* it is stored under ``clips/`` with a ``Clip`` row keyed by the track
+  file's hash, the segment and the lead-in, not by lick: licks over the same
+  segment share a clip, a new file or moved boundaries simply look up a
+  different one, and switching pre-roll back and forth re-cuts nothing;
+* at most ``LICK_CLIP_VARIANTS`` lead-ins are kept per segment, and the
+  least recently used clips are deleted once all of them together pass
+  ``LICK_CLIP_CACHE_BYTES``.
+
+The lead-in a clip holds is ``min(pre_roll, start_seconds)``.
+"""
+
+import hashlib
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .media_deletion import delete_later
+from .models import Clip
+from .renditions import TOUCH_INTERVAL, encode_audio, evict_least_recent
+from .waveforms import WaveformUnavailable, decode, local_copy
+
+
+DECODE_BLOCK = 1 << 18
+
+
+class ClipUnavailable(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "This track cannot be cut into clips on this server."
+    default_code = "clip_unavailable"
+
+
+def _ms(seconds):
+    return round(seconds * 1000)
+
+
+def source_digest(track):
+    """The track file's content hash, or a hash of its name when it was
+    stored without one (direct and resumable uploads)."""
+    return track.file_sha256 or hashlib.sha256(track.file.name.encode()).hexdigest()
+
+
+def clip_key(lick, pre_roll):
+    """The ``Clip`` lookup for ``lick``'s segment with ``pre_roll`` seconds
+    of lead-in."""
+    start_ms = _ms(lick.start_seconds)
+    return {
+        "source": source_digest(lick.track),
+        "start_ms": start_ms,
+        "end_ms": _ms(lick.end_seconds),
+        "pre_roll_ms": min(_ms(pre_roll), start_ms),
+    }
+
+
+def _clip_name(key, extension):
+    source = key["source"]
+    cut = f"{key['start_ms']}-{key['end_ms']}-{key['pre_roll_ms']}ms"
+    return f"clips/{source[:2]}/{source}/{cut}{extension}"
+
+
+def cut_clip(track, key):
+    """Cut, encode and store the segment of ``track`` described by ``key``
+    (see ``clip_key``); returns its ``Clip``. Decoded a block at a time
+    straight into the encoder, so memory stays flat however long the lick."""
+    start = (key["start_ms"] - key["pre_roll_ms"]) / 1000
+    duration = key["end_ms"] / 1000 - start
+    storage = Clip._meta.get_field("file").storage
+    try:
+        with local_copy(track.file) as path, tempfile.TemporaryFile() as encoded:
+            sample_rate, blocks = decode(
+                path, settings.LICK_CLIP_SAMPLE_RATE, DECODE_BLOCK, start, duration
+            )
+            extension = encode_audio(blocks, sample_rate, encoded, settings.LICK_CLIP_BITRATE)
+            size = encoded.tell()
+            encoded.seek(0)
+            name = storage.save(_clip_name(key, extension), File(encoded))
+    except WaveformUnavailable as err:
+        raise ClipUnavailable(f"This track cannot be cut into clips here: {err}")
+
+    try:
+        with transaction.atomic():
+            clip = Clip.objects.create(**key, file=name, size=size, last_used_at=timezone.now())
+    except IntegrityError:
+        # Another request cut the same clip first; keep theirs.
+        delete_later(storage, name)
+        return Clip.objects.get(**key)
+    _drop_extra_variants(clip)
+    evict(keep=clip.pk)
+    return clip
+
+
+def _drop_extra_variants(clip):
+    """Keep only the ``LICK_CLIP_VARIANTS`` most recently used lead-ins of
+    ``clip``'s segment."""
+    surplus = (
+        Clip.objects.filter(source=clip.source, start_ms=clip.start_ms, end_ms=clip.end_ms)
+        .exclude(pk=clip.pk)
+        .order_by("-last_used_at", "-id")
+        .values_list("pk", flat=True)[settings.LICK_CLIP_VARIANTS - 1:]
+    )
+    # Files go through the post_delete receiver (deferred, batched).
+    Clip.objects.filter(pk__in=list(surplus)).delete()
+
+
+def evict(budget=None, keep=None):
+    """Delete least recently used clips until the rest fit in ``budget``
+    bytes (``LICK_CLIP_CACHE_BYTES``); returns how many went."""
+    budget = settings.LICK_CLIP_CACHE_BYTES if budget is None else budget
+    return evict_least_recent(Clip, budget, keep)
+
+
+def clip_for(lick, pre_roll):
+    """The cached clip of ``lick``'s segment with ``pre_roll`` seconds of
+    lead-in, cut on a miss."""
+    key = clip_key(lick, pre_roll)
+    clip = Clip.objects.filter(**key).first()
+    if clip is None:
+        return cut_clip(lick.track, key)
+    now = timezone.now()
+    if now - clip.last_used_at >= TOUCH_INTERVAL:
+        Clip.objects.filter(pk=clip.pk).update(last_used_at=now)
+        clip.last_used_at = now
+    return clip
@@ -0,0 +1,142 @@
+"""Sparse fieldsets (``?fields=``) and expansion control (``?expand=``).
+
+Both parameters take comma-separated, dotted paths relative to the
+serializer being rendered::
+
+    GET /tracks/?session=1&fields=id,name,position&expand=
+    GET /sessions/1/?expand=tracks&fields=id,name,tracks.id,tracks.name
+    GET /sessions/1/?expand=tracks.licks
+
+``fields`` limits the attributes rendered at each level; naming only a
+nested collection (``tracks``) keeps all of its attributes. ``expand``
+lists the nested collections to embed: collections not listed are dropped,
+and an empty ``expand=`` embeds none. Without either parameter the full
+tree is rendered, as before.
+
+The pruned serializer also decides what is loaded: ``prefetches_for``
+returns a ``Prefetch`` only for the collections that are still embedded,
+each restricted to the columns that will be rendered, so omitted takes are
+never queried and their files never presigned.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def parse_paths(value):
+    """``"a,b.c,b.d"`` -> ``{"a": {}, "b": {"c": {}, "d": {}}}``."""
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for part in path.split("."):
+            part = part.strip()
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+def _paths(tree, prefix=""):
+    for name in sorted(tree):
+        yield prefix + name
+        yield from _paths(tree[name], f"{prefix}{name}.")
+
+
+def selection_from_request(request):
+    """``(fields, expand)`` trees from the query string, or ``None`` when
+    neither parameter is present. A missing parameter is ``None``."""
+    params = request.query_params
+    if FIELDS_PARAM not in params and EXPAND_PARAM not in params:
+        return None
+    return tuple(
+        parse_paths(params[name]) if name in params else None
+        for name in (FIELDS_PARAM, EXPAND_PARAM)
+    )
+
+
+def selection_key(selection):
+    """Canonical string for ``selection``, for use in cache keys."""
+    if selection is None:
+        return ""
+    return "&".join(
+        f"{name}={','.join(_paths(tree))}"
+        for name, tree in zip((FIELDS_PARAM, EXPAND_PARAM), selection)
+        if tree is not None
+    )
+
+
+def _nested(field):
+    if isinstance(field, ListSerializer):
+        return field.child
+    if isinstance(field, BaseSerializer):
+        return field
+    return None
+
+
+def _check(available, fields, expand, prefix):
+    errors = {}
+    unknown = [name for name in fields or {} if name not in available]
+    if unknown:
+        errors[FIELDS_PARAM] = [f"Unknown field: {prefix}{name}." for name in unknown]
+    unknown = [name for name in expand or {} if _nested(available.get(name)) is None]
+    if unknown:
+        errors[EXPAND_PARAM] = [f"Cannot expand: {prefix}{name}." for name in unknown]
+    if errors:
+        raise ValidationError(errors)
+
+
+def select_fields(serializer, fields=None, expand=None, _prefix=""):
+    """Drop the fields of ``serializer`` (and its nested serializers) that
+    ``fields`` / ``expand`` leave out. Unknown names are a 400."""
+    available = serializer.fields
+    _check(available, fields, expand, _prefix)
+
+    for name, field in list(available.items()):
+        nested = _nested(field)
+        keep = fields is None or name in fields
+        if nested is not None and expand is not None:
+            keep = keep and name in expand
+        if not keep:
+            del available[name]
+        elif nested is not None:
+            select_fields(
+                nested,
+                (fields or {}).get(name) or None,
+                None if expand is None else expand[name],
+                f"{_prefix}{name}.",
+            )
+
+
+def _columns(serializer, model, relation):
+    columns = {model._meta.pk.name, relation.field.name}
+    for field in serializer.fields.values():
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if model_field.concrete and not model_field.many_to_many:
+            columns.add(model_field.name)
+    return columns
+
+
+def prefetches_for(serializer):
+    """``Prefetch`` objects for the nested collections ``serializer`` will
+    render, loading only the columns each level needs."""
+    opts = serializer.Meta.model._meta
+    lookups = []
+    for field in serializer.fields.values():
+        nested = _nested(field)
+        if nested is None:
+            continue
+        relation = opts.get_field(field.source)
+        model = nested.Meta.model
+        queryset = model._default_manager.only(
+            *_columns(nested, model, relation)
+        ).prefetch_related(*prefetches_for(nested))
+        lookups.append(Prefetch(field.source, queryset=queryset))
+    return lookups
@@ -0,0 +1,197 @@
+"""Parse and validate bulk lick markers for ``POST /tracks/{id}/import-licks/``.
+
+Accepted sources:
+
+* JSON: ``{"licks": [{"name", "start_seconds", "end_seconds", "last_speed"}]}``
+* CSV: header row with ``name,start_seconds,end_seconds`` (``start``/``end``
+  and an optional ``last_speed`` column are also understood)
+* Audacity/DAW label track export: ``start<TAB>end<TAB>label`` per line
+
+Rows are checked in one pass against the same rules as ``LickSerializer``
+plus the optional track duration, and every bad row is reported at once.
+"""
+
+import csv
+import io
+import json
+import math
+import os
+
+from .models import Lick, Track
+
+
+FORMAT_JSON = "json"
+FORMAT_CSV = "csv"
+FORMAT_LABELS = "labels"
+FORMATS = (FORMAT_JSON, FORMAT_CSV, FORMAT_LABELS)
+
+EXTENSION_FORMATS = {
+    ".json": FORMAT_JSON,
+    ".csv": FORMAT_CSV,
+    ".txt": FORMAT_LABELS,
+    ".labels": FORMAT_LABELS,
+}
+
+COLUMN_ALIASES = {
+    "name": "name",
+    "label": "name",
+    "start_seconds": "start_seconds",
+    "start": "start_seconds",
+    "end_seconds": "end_seconds",
+    "end": "end_seconds",
+    "last_speed": "last_speed",
+    "speed": "last_speed",
+}
+
+NAME_MAX_LENGTH = Lick._meta.get_field("name").max_length
+MIN_SPEED = 0.25
+MAX_SPEED = 1.5
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(filename, declared=None):
+    if declared:
+        if declared not in FORMATS:
+            raise ImportFormatError(f"format must be one of: {', '.join(FORMATS)}.")
+        return declared
+    extension = os.path.splitext(filename or "")[1].lower()
+    try:
+        return EXTENSION_FORMATS[extension]
+    except KeyError:
+        raise ImportFormatError(
+            "Unrecognised file type; pass format=csv|labels|json."
+        ) from None
+
+
+def parse_csv(text):
+    reader = csv.DictReader(io.StringIO(text))
+    columns = {
+        column: COLUMN_ALIASES[column.strip().lower()]
+        for column in reader.fieldnames or []
+        if column and column.strip().lower() in COLUMN_ALIASES
+    }
+    if not {"start_seconds", "end_seconds"} <= set(columns.values()):
+        raise ImportFormatError("CSV needs start_seconds and end_seconds columns.")
+    return [
+        {columns[column]: value for column, value in row.items() if column in columns}
+        for row in reader
+    ]
+
+
+def parse_labels(text):
+    rows = []
+    for line in text.splitlines():
+        # Audacity writes spectral-selection data on "\"-prefixed lines.
+        if not line.strip() or line.startswith("\\"):
+            continue
+        parts = line.split("\t")
+        if len(parts) < 2:
+            raise ImportFormatError("Label lines must be start<TAB>end<TAB>label.")
+        rows.append(
+            {
+                "start_seconds": parts[0],
+                "end_seconds": parts[1],
+                "name": parts[2] if len(parts) > 2 else "",
+            }
+        )
+    return rows
+
+
+def parse_upload(upload, declared_format=None):
+    """Rows from an uploaded CSV, label or JSON file."""
+    source_format = detect_format(getattr(upload, "name", ""), declared_format)
+    try:
+        text = upload.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFormatError("File must be UTF-8 text.") from None
+
+    if source_format == FORMAT_CSV:
+        return parse_csv(text)
+    if source_format == FORMAT_LABELS:
+        return parse_labels(text)
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        raise ImportFormatError("File is not valid JSON.") from None
+    return payload.get("licks") if isinstance(payload, dict) else payload
+
+
+def _number(value):
+    if isinstance(value, bool):
+        raise ValueError
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError
+    return number
+
+
+def validate_rows(track, rows, duration=None, max_rows=None):
+    """Return ``(cleaned_rows, errors)``.
+
+    ``errors`` maps 1-based row numbers to ``{field: message}``; it is
+    empty when every row is valid. Track-level problems are reported under
+    the ``"track"`` key instead.
+    """
+    if track.source_type in (Track.SOURCE_PDF, Track.SOURCE_IMAGE):
+        return [], {"track": "Licks are only allowed on audio tracks."}
+    if not isinstance(rows, list) or not rows:
+        return [], {"licks": "Provide at least one lick."}
+    if max_rows is not None and len(rows) > max_rows:
+        return [], {"licks": f"At most {max_rows} licks can be imported at once."}
+
+    cleaned, errors = [], {}
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors[number] = {"non_field_errors": "Each lick must be an object."}
+            continue
+
+        row_errors = {}
+        values = {}
+        for field in ("start_seconds", "end_seconds"):
+            try:
+                values[field] = _number(row.get(field))
+            except (TypeError, ValueError):
+                row_errors[field] = "A valid number is required."
+
+        start, end = values.get("start_seconds"), values.get("end_seconds")
+        if start is not None and start < 0:
+            row_errors["start_seconds"] = "Ensure this value is greater than or equal to 0."
+        if start is not None and end is not None and end <= start:
+            row_errors["end_seconds"] = "end_seconds must be greater than start_seconds."
+        elif end is not None and duration is not None and end > duration:
+            row_errors["end_seconds"] = "end_seconds is past the end of the track."
+
+        last_speed = row.get("last_speed")
+        if last_speed in (None, ""):
+            last_speed = None
+        else:
+            try:
+                last_speed = _number(last_speed)
+            except (TypeError, ValueError):
+                row_errors["last_speed"] = "A valid number is required."
+            else:
+                if not MIN_SPEED <= last_speed <= MAX_SPEED:
+                    row_errors["last_speed"] = (
+                        f"Must be between {MIN_SPEED} and {MAX_SPEED}."
+                    )
+
+        name = str(row.get("name") or "").strip() or f"Lick {number}"
+        if len(name) > NAME_MAX_LENGTH:
+            row_errors["name"] = f"Ensure this field has no more than {NAME_MAX_LENGTH} characters."
+
+        if row_errors:
+            errors[number] = row_errors
+            continue
+        cleaned.append(
+            {
+                "name": name,
+                "start_seconds": start,
+                "end_seconds": end,
+                "last_speed": last_speed,
+            }
+        )
+
+    return cleaned, ({"licks": errors} if errors else {})
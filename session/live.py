@@ -0,0 +1,146 @@
+"""Live take uploads: append recorder chunks while the take is recorded.
+
+A take used to be POSTed whole after the user pressed stop, so saving a
+long video took tens of seconds. With a live upload the recorder sends its
+``MediaRecorder`` timeslices as they are produced:
+
+* ``POST /takes/live/`` with ``track``, ``name``, ``capture_mode`` and
+  ``filename`` checks the take fields and opens the upload.
+* ``PUT`` (or ``PATCH``) to its ``Location`` with ``Upload-Offset`` (the
+  bytes sent before this chunk) appends one chunk of any size up to
+  ``chunk_size``. A chunk the server already has is acknowledged without
+  being written again, so a retry is safe; a gap is a 409.
+* ``HEAD`` answers ``Upload-Offset``.
+* ``POST .../finalize/`` sends what is left and creates the ``Take``.
+
+On local disk chunks are appended in place to the final file. On R2 they
+collect in a staging file under ``LIVE_UPLOAD_STAGING_DIR`` and go out as a
+multipart part each time ``chunk_size`` bytes are ready (R2 wants every
+part but the last to have the same size). Finalizing therefore uploads at
+most one part and completes the multipart upload: about a second whatever
+the length of the take. The staging file lives on the worker's disk, so
+with several app instances live uploads need sticky routing; a chunk or
+finalize that finds the staged bytes missing or short (another instance, a
+wiped disk) is refused with a 410 rather than padded with zeros.
+"""
+
+import os
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .resumable import UploadOffsetConflict, copy_stream
+from .storage import is_s3, s3_client
+from .upload_handlers import UploadTooLarge, size_limit_message
+from .uploads import abort_upload, assemble, recorded_parts, s3_object
+
+
+class LiveUploadLost(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "The bytes recorded so far are no longer on the server; start a new upload."
+    default_code = "live_upload_lost"
+
+
+def staging_path(upload):
+    return Path(settings.LIVE_UPLOAD_STAGING_DIR) / f"{upload.pk}.part"
+
+
+def _staged_bytes(upload):
+    return upload.offset - len(upload.part_etags) * upload.part_size
+
+
+def _check_stored(path, expected):
+    """Refuse to go on unless ``path`` still holds the ``expected`` bytes
+    already acknowledged (more is fine: a failed write left a tail)."""
+    if expected and (not os.path.exists(path) or os.path.getsize(path) < expected):
+        raise LiveUploadLost()
+
+
+def _upload_part(storage, upload, handle, length):
+    response = s3_client(storage).upload_part(
+        **s3_object(storage, upload),
+        UploadId=upload.upload_id,
+        PartNumber=len(upload.part_etags) + 1,
+        Body=handle,
+        ContentLength=length,
+    )
+    upload.part_etags = [*upload.part_etags, response["ETag"]]
+
+
+def _flush_full_parts(storage, upload, path):
+    """Send every complete ``part_size`` slice at the head of the staging
+    file to R2, keeping the remainder staged."""
+    while _staged_bytes(upload) >= upload.part_size:
+        remainder = path.with_suffix(".rest")
+        with open(path, "rb") as handle:
+            handle.seek(upload.part_size)
+            with open(remainder, "wb") as rest:
+                copy_stream(handle, rest, _staged_bytes(upload) - upload.part_size)
+        with open(path, "r+b") as handle:
+            handle.truncate(upload.part_size)
+            _upload_part(storage, upload, handle, upload.part_size)
+        os.replace(remainder, path)
+
+
+def append_chunk(storage, upload, offset, stream, length):
+    """Append ``length`` bytes from ``stream`` sent at ``offset``. The caller
+    holds a lock on the row."""
+    if offset + length <= upload.offset:
+        return upload.offset  # already stored: a retried chunk
+    if offset != upload.offset:
+        raise UploadOffsetConflict()
+    if length > upload.part_size:
+        raise ValidationError({"detail": f"Chunks can be at most {upload.part_size} bytes."})
+    limit = settings.TAKE_FILE_MAX_UPLOAD_SIZE
+    if offset + length > limit:
+        raise UploadTooLarge(size_limit_message(limit, "Recorded files"))
+
+    if is_s3(storage):
+        path = staging_path(upload)
+        _check_stored(path, _staged_bytes(upload))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "r+b" if path.exists() else "wb") as handle:
+            # Drop anything a failed earlier request left past the offset.
+            handle.seek(_staged_bytes(upload))
+            handle.truncate()
+            copy_stream(stream, handle, length)
+        upload.offset += length
+        _flush_full_parts(storage, upload, path)
+    else:
+        path = storage.path(upload.key)
+        _check_stored(path, upload.offset)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as handle:
+            handle.seek(offset)
+            handle.truncate()
+            copy_stream(stream, handle, length)
+        upload.offset += length
+
+    upload.save(update_fields=["offset", "part_etags", "updated_at"])
+    return upload.offset
+
+
+def finish_live(storage, upload):
+    """Send the staged tail and assemble the take; returns the stored size."""
+    if not is_s3(storage):
+        _check_stored(storage.path(upload.key), upload.offset)
+        return storage.size(upload.key)
+
+    path = staging_path(upload)
+    staged = _staged_bytes(upload)
+    _check_stored(path, staged)
+    if staged > 0:
+        with open(path, "rb") as handle:
+            _upload_part(storage, upload, handle, staged)
+        upload.save(update_fields=["part_etags", "updated_at"])
+    size = assemble(storage, upload, recorded_parts(upload))
+    path.unlink(missing_ok=True)
+    return size
+
+
+def abort_live(storage, upload):
+    staging_path(upload).unlink(missing_ok=True)
+    abort_upload(storage, upload)
+
@@ -0,0 +1,370 @@
+"""Seeded query-count and latency benchmarks for the session API.
+
+Every scenario seeds its own throwaway user and data inside a transaction
+that is rolled back at the end, so it is safe to run against a dev database:
+
+    python manage.py benchmark_api session-queries
+    python manage.py benchmark_api session-queries --sessions 200 --tracks 30
+    python manage.py benchmark_api reorder --sizes 10,100,1000
+    python manage.py benchmark_api ownership --users 100 --total-licks 1000000
+
+Numbers are measured in-process through the DRF views (no HTTP server), so
+they isolate ORM + serializer cost from network and gunicorn overhead.
+"""
+
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from session.caching import session_detail_etag
+from session.models import Lick, Session, Take, Track
+from session.ordering import POSITION_GAP, write_positions
+from session.views import SessionViewSet, TrackViewSet
+
+
+BENCHMARK_USERNAME = "benchmark-api-user"
+
+
+def _request_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host[0] not in ".*":
+            return host
+    return "localhost"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a heavy user inside a rolled-back transaction and report query "
+        "counts and latency for the session API."
+    )
+
+    scenarios = ("session-queries", "reorder", "ownership")
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=self.scenarios)
+        parser.add_argument("--sessions", type=int, default=200)
+        parser.add_argument("--tracks", type=int, default=30, help="Tracks per session.")
+        parser.add_argument("--licks", type=int, default=2, help="Licks per track.")
+        parser.add_argument("--takes", type=int, default=1, help="Takes per track.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--sizes",
+            default="10,100,1000",
+            help="Comma-separated lick counts for the reorder scenario.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=100,
+            help="Users sharing --total-licks in the ownership scenario.",
+        )
+        parser.add_argument("--total-licks", type=int, default=1_000_000)
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory()
+        self.host = _request_host()
+        self.repeat = max(1, options["repeat"])
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                username=BENCHMARK_USERNAME,
+                password=None,
+            )
+            handler = getattr(self, "run_" + options["scenario"].replace("-", "_"))
+            handler(user, options)
+            transaction.set_rollback(True)
+
+    # ─── helpers ─────────────────────────────────────────────────────
+
+    def seed_sessions(self, user, sessions, tracks, licks, takes):
+        started = time.perf_counter()
+        practice_sessions = Session.objects.bulk_create(
+            Session(user=user, name=f"Session {index}") for index in range(sessions)
+        )
+        track_rows = Track.objects.bulk_create(
+            Track(
+                session=practice_session,
+                owner=user,
+                name=f"Track {position}",
+                source_type=Track.SOURCE_MP3,
+                file=f"tracks/benchmark-{practice_session.pk}-{position}.mp3",
+                position=position,
+            )
+            for practice_session in practice_sessions
+            for position in range(tracks)
+        )
+        Lick.objects.bulk_create(
+            Lick(
+                track=track,
+                owner=user,
+                name=f"Lick {position}",
+                start_seconds=position,
+                end_seconds=position + 1,
+                position=position,
+            )
+            for track in track_rows
+            for position in range(licks)
+        )
+        Take.objects.bulk_create(
+            Take(
+                track=track,
+                owner=user,
+                name=f"Take {index}",
+                capture_mode=Take.MODE_AUDIO,
+                file=f"takes/benchmark-{track.pk}-{index}.webm",
+            )
+            for track in track_rows
+            for index in range(takes)
+        )
+        self.stdout.write(
+            f"seeded {sessions} sessions x {tracks} tracks "
+            f"({len(track_rows) * licks} licks, {len(track_rows) * takes} takes) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return practice_sessions
+
+    def time_calls(self, label, call, setup=None):
+        durations = []
+        queries = 0
+        result = None
+        for _ in range(self.repeat):
+            if setup is not None:
+                setup()
+            reset_queries()
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                result = call()
+                durations.append((time.perf_counter() - started) * 1000)
+            queries = len(captured.captured_queries)
+
+        line = (
+            f"{label:<32} queries={queries:<5} "
+            f"median={statistics.median(durations):8.1f}ms "
+            f"min={min(durations):8.1f}ms"
+        )
+        return result, line
+
+    def measure(self, label, view, user, path, setup=None, headers=None, data=None, **kwargs):
+        def call():
+            if data is None:
+                request = self.factory.get(path, HTTP_HOST=self.host, headers=headers)
+            else:
+                request = self.factory.post(
+                    path,
+                    data,
+                    format="json",
+                    HTTP_HOST=self.host,
+                    headers=headers,
+                )
+            force_authenticate(request, user=user)
+            response = view(request, **kwargs)
+            response.render()
+            return response
+
+        response, line = self.time_calls(label, call, setup)
+        self.stdout.write(
+            f"{line} status={response.status_code} bytes={len(response.content)}"
+        )
+
+    # ─── scenarios ───────────────────────────────────────────────────
+
+    def run_session_queries(self, user, options):
+        practice_sessions = self.seed_sessions(
+            user,
+            options["sessions"],
+            options["tracks"],
+            options["licks"],
+            options["takes"],
+        )
+
+        self.measure(
+            "GET /sessions/",
+            SessionViewSet.as_view({"get": "list"}),
+            user,
+            "/api/v1/sessions/",
+        )
+        target = practice_sessions[0]
+        self.measure(
+            "GET /sessions/{id}/ (cold)",
+            SessionViewSet.as_view({"get": "retrieve"}),
+            user,
+            f"/api/v1/sessions/{target.pk}/",
+            setup=lambda: Session.objects.filter(pk=target.pk).bump_version(),
+            pk=target.pk,
+        )
+        self.measure(
+            "GET /sessions/{id}/ (sparse)",
+            SessionViewSet.as_view({"get": "retrieve"}),
+            user,
+            f"/api/v1/sessions/{target.pk}/?expand=tracks&fields=id,name,tracks.id,tracks.name",
+            setup=lambda: Session.objects.filter(pk=target.pk).bump_version(),
+            pk=target.pk,
+        )
+        self.measure(
+            "GET /sessions/{id}/ (cached)",
+            SessionViewSet.as_view({"get": "retrieve"}),
+            user,
+            f"/api/v1/sessions/{target.pk}/",
+            pk=target.pk,
+        )
+        target.refresh_from_db(fields=["version"])
+        self.measure(
+            "GET /sessions/{id}/ (304)",
+            SessionViewSet.as_view({"get": "retrieve"}),
+            user,
+            f"/api/v1/sessions/{target.pk}/",
+            headers={"If-None-Match": session_detail_etag(target)},
+            pk=target.pk,
+        )
+
+    def run_reorder(self, user, options):
+        view = TrackViewSet.as_view({"post": "reorder_licks"})
+        practice_session = Session.objects.create(user=user, name="Reorder")
+
+        for size in (int(value) for value in options["sizes"].split(",")):
+            track = Track.objects.create(
+                session=practice_session,
+                name=f"{size} licks",
+                source_type=Track.SOURCE_MP3,
+            )
+            licks = Lick.objects.bulk_create(
+                Lick(
+                    track=track,
+                    owner=user,
+                    name=f"Lick {position}",
+                    start_seconds=position,
+                    end_seconds=position + 1,
+                    position=(position + 1) * POSITION_GAP,
+                )
+                for position in range(size)
+            )
+            lick_ids = [lick.pk for lick in licks]
+            original = {lick.pk: lick.position for lick in licks}
+            path = f"/api/v1/tracks/{track.pk}/reorder-licks/"
+            self.stdout.write(f"-- {size} licks")
+
+            def restore():
+                write_positions(Lick, original)
+
+            def per_row_saves():
+                # The pre-bulk implementation, kept here as the baseline.
+                with transaction.atomic():
+                    for position, lick in enumerate(reversed(track.licks.all())):
+                        lick.position = position
+                        lick.save(update_fields=["position"])
+
+            _, line = self.time_calls("per-row save() loop", per_row_saves, restore)
+            self.stdout.write(line)
+
+            self.measure(
+                "reorder-licks full list",
+                view,
+                user,
+                path,
+                data={"lick_ids": list(reversed(lick_ids))},
+                setup=restore,
+                pk=track.pk,
+            )
+            self.measure(
+                "reorder-licks move last->first",
+                view,
+                user,
+                path,
+                data={"lick_id": lick_ids[-1], "before_id": lick_ids[0]},
+                setup=restore,
+                pk=track.pk,
+            )
+            self.measure(
+                "reorder-licks swap neighbours",
+                view,
+                user,
+                path,
+                data={"lick_id": lick_ids[1], "before_id": lick_ids[0]},
+                setup=restore,
+                pk=track.pk,
+            )
+
+    def run_ownership(self, user, options):
+        """EXPLAIN and time the join-based ownership filter against the
+        denormalised ``owner`` column on a table shared by many users."""
+        users = [user] + list(
+            get_user_model().objects.bulk_create(
+                get_user_model()(username=f"{BENCHMARK_USERNAME}-{index}")
+                for index in range(1, max(1, options["users"]))
+            )
+        )
+        sessions_per_user, tracks_per_session = 10, 10
+        licks_per_track = max(
+            1,
+            options["total_licks"] // (len(users) * sessions_per_user * tracks_per_session),
+        )
+
+        started = time.perf_counter()
+        for owner in users:
+            practice_sessions = Session.objects.bulk_create(
+                Session(user=owner, name=f"Session {index}")
+                for index in range(sessions_per_user)
+            )
+            tracks = Track.objects.bulk_create(
+                Track(
+                    session=practice_session,
+                    owner=owner,
+                    name=f"Track {index}",
+                    source_type=Track.SOURCE_YOUTUBE,
+                    position=(index + 1) * POSITION_GAP,
+                )
+                for practice_session in practice_sessions
+                for index in range(tracks_per_session)
+            )
+            Lick.objects.bulk_create(
+                (
+                    Lick(
+                        track=track,
+                        owner=owner,
+                        name=f"Lick {index}",
+                        start_seconds=index,
+                        end_seconds=index + 1,
+                        position=(index + 1) * POSITION_GAP,
+                    )
+                    for track in tracks
+                    for index in range(licks_per_track)
+                ),
+                batch_size=5000,
+            )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.stdout.write(
+            f"seeded {len(users)} users, {Lick.objects.count()} licks "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+        target_track = Track.objects.filter(owner=user).last()
+        target_lick = Lick.objects.filter(track=target_track).last()
+        queries = (
+            ("lick detail", lambda lookup: Lick.objects.filter(pk=target_lick.pk, **lookup)),
+            (
+                "lick list ?track=",
+                lambda lookup: Lick.objects.filter(track=target_track, **lookup)[:50],
+            ),
+            (
+                "sync page",
+                lambda lookup: Lick.objects.filter(**lookup).order_by("updated_at", "id")[:500],
+            ),
+        )
+        forms = (
+            ("join", {"track__session__user": user}),
+            ("owner", {"owner": user}),
+        )
+        for label, build in queries:
+            for form, lookup in forms:
+                queryset = build(lookup)
+                self.stdout.write(f"-- {label} ({form})")
+                self.stdout.write(queryset.explain())
+                _, line = self.time_calls(f"{label} ({form})", lambda: list(queryset.all()))
+                self.stdout.write(line)
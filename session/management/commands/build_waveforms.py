@@ -0,0 +1,56 @@
+"""Build waveform peaks for MP3 tracks and audio takes that lack them.
+
+New rows get their peaks in the background after upload (see
+session/waveforms.py); run this once to backfill older rows, or again after
+changing the WAVEFORM_* settings with --rebuild:
+
+    python manage.py build_waveforms
+    python manage.py build_waveforms --rebuild
+"""
+
+from django.core.management.base import BaseCommand
+
+from session.media_deletion import flush
+from session.models import Take, Track
+from session.waveforms import WaveformUnavailable, build_peaks, peaks_current, wants_peaks
+
+
+class Command(BaseCommand):
+    help = "Build missing waveform peaks for MP3 tracks and audio takes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Rebuild peaks that are already current as well.",
+        )
+
+    def handle(self, *args, **options):
+        built = skipped = failed = 0
+        querysets = (
+            Track.objects.filter(source_type=Track.SOURCE_MP3),
+            Take.objects.filter(capture_mode=Take.MODE_AUDIO),
+        )
+        for queryset in querysets:
+            for instance in queryset.exclude(file="").order_by("id").iterator():
+                if not wants_peaks(instance):
+                    continue
+                if peaks_current(instance) and not options["rebuild"]:
+                    continue
+                label = f"{instance._meta.model_name} #{instance.pk}"
+                try:
+                    build_peaks(instance)
+                except WaveformUnavailable as err:
+                    skipped += 1
+                    self.stderr.write(f"skipped {label}: {err}")
+                except Exception as err:
+                    failed += 1
+                    self.stderr.write(f"failed {label}: {err}")
+                else:
+                    built += 1
+        # Rebuilds queue the old sidecars for deletion on a daemon thread.
+        flush()
+        self.stdout.write(
+            f"waveforms: built {built}, undecodable {skipped}"
+            + (f", {failed} failed" if failed else "")
+        )
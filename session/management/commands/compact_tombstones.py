@@ -0,0 +1,51 @@
+"""Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.
+
+``GET /sync/`` answers cursors older than the retention window with 410, so
+these rows are no longer needed by any client. Run it periodically (e.g. a
+nightly Railway cron):
+
+    python manage.py compact_tombstones
+    python manage.py compact_tombstones --days 7 --batch-size 5000
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from session.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones that are older than the retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help="Keep tombstones newer than this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Rows deleted per statement, to keep each transaction short.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        batch_size = max(1, options["batch_size"])
+
+        deleted = 0
+        while True:
+            batch = list(
+                Tombstone.objects.filter(deleted_at__lt=cutoff)
+                .order_by("deleted_at")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            deleted += Tombstone.objects.filter(pk__in=batch).delete()[0]
+        self.stdout.write(f"tombstones: deleted {deleted} older than {cutoff:%Y-%m-%d}")
@@ -0,0 +1,59 @@
+"""Abort uploads left pending for longer than UPLOAD_EXPIRE_HOURS.
+
+Covers direct-to-R2 uploads that were never completed, and resumable and
+live uploads whose client gave up. Their multipart uploads are aborted on
+R2, or their partial files deleted from local disk, so the bytes stop
+taking up space.
+Run it periodically (e.g. an hourly Railway cron):
+
+    python manage.py expire_uploads
+    python manage.py expire_uploads --hours 6
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from session.models import MediaUpload, Take, Track
+from session.live import abort_live
+from session.uploads import abort_upload
+
+
+MODELS = {MediaUpload.KIND_TRACK: Track, MediaUpload.KIND_TAKE: Take}
+
+
+class Command(BaseCommand):
+    help = "Abort uploads that have been idle too long."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=settings.UPLOAD_EXPIRE_HOURS,
+            help="Abort uploads not touched for this many hours.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["hours"])
+        stale = MediaUpload.objects.filter(
+            status=MediaUpload.STATUS_PENDING,
+            updated_at__lt=cutoff,
+        ).order_by("updated_at")
+
+        expired = failed = 0
+        for upload in stale.iterator():
+            storage = MODELS[upload.kind]._meta.get_field("file").storage
+            abort = abort_live if upload.mode == MediaUpload.MODE_LIVE else abort_upload
+            try:
+                abort(storage, upload)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"could not abort upload {upload.pk} ({upload.key}): {exc}")
+            else:
+                expired += 1
+        self.stdout.write(
+            f"uploads: expired {expired} idle since before {cutoff:%Y-%m-%d %H:%M}"
+            + (f", {failed} failed" if failed else "")
+        )
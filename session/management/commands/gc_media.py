@@ -0,0 +1,88 @@
+"""Find, and optionally delete, media files no database row references.
+
+Lists tracks/, takes/, blobs/, peaks/, renditions/ and clips/ in the media
+storage page by page and merge-joins the listing against the names used by
+tracks, takes, blobs, renditions, lick clips and pending uploads (see
+session/media_gc.py), so memory stays flat over millions of objects.
+Files modified within the grace period are left alone: they may belong to
+an upload that is still finishing. Deletes run synchronously, in batches;
+files that could not be deleted are dead-lettered and reported as failed.
+
+    python manage.py gc_media                  # report only
+    python manage.py gc_media --delete         # delete the orphans
+    python manage.py gc_media --grace-hours 72
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from session.media_deletion import delete_batch
+from session.media_gc import OrderError, media_prefixes, orphans, referenced_names, stored_files
+from session.models import Track
+
+
+class Command(BaseCommand):
+    help = "Report (or delete) stored media files that no track, take or upload uses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Delete the orphaned files instead of only reporting them.",
+        )
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=settings.MEDIA_GC_GRACE_HOURS,
+            help="Leave files modified within this many hours alone.",
+        )
+
+    def handle(self, *args, **options):
+        storage = Track._meta.get_field("file").storage
+        cutoff = timezone.now() - timedelta(hours=options["grace_hours"])
+        delete = options["delete"]
+
+        scanned = found = recent = reclaimable = failed = 0
+        batch = []
+
+        def delete_all(batch):
+            nonlocal failed
+            failed += len(delete_batch(batch))
+
+        def counted(files):
+            nonlocal scanned
+            for stored in files:
+                scanned += 1
+                yield stored
+
+        try:
+            listing = counted(stored_files(storage, media_prefixes()))
+            for stored in orphans(listing, referenced_names()):
+                if stored.modified > cutoff:
+                    recent += 1
+                    continue
+                found += 1
+                reclaimable += stored.size
+                self.stdout.write(f"orphan: {stored.name} ({stored.size} bytes)")
+                if delete:
+                    batch.append((storage, stored.name))
+                    if len(batch) >= settings.MEDIA_DELETE_BATCH_SIZE:
+                        delete_all(batch)
+                        batch = []
+        except (OrderError, NotImplementedError) as err:
+            raise CommandError(str(err))
+        if batch:
+            delete_all(batch)
+
+        summary = (
+            f"media: found {found} orphaned files, {reclaimable / (1024 * 1024):.1f} MB "
+            f"reclaimable ({reclaimable} bytes) of {scanned} scanned"
+        )
+        if delete:
+            summary += f"; deleted {found - failed}, {failed} failed (see the dead-letter log)"
+        if recent:
+            summary += f"; {recent} newer than {options['grace_hours']}h skipped"
+        self.stdout.write(summary)
@@ -8,23 +8,56 @@ storage-relative names (e.g. "tracks/song.mp3") that carry over unchanged.
 
     python manage.py migrate_media_to_r2 --dry-run   # report only
     python manage.py migrate_media_to_r2             # copy + verify
+    python manage.py migrate_media_to_r2 --workers 16
+
+Files are copied in parallel and verified by MD5/ETag (see
+session/media_copy.py). Each verified copy is recorded in a manifest
+(default: MEDIA_ROOT/.migrate_media_to_r2.jsonl), so after a crash a rerun
+skips what is done without asking R2.
 """
 
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from django.conf import settings
-from django.core.files import File
 from django.core.files.storage import FileSystemStorage, default_storage
 from django.core.management.base import BaseCommand, CommandError
 
-from session.models import Take, Track
+from session.media_copy import (
+    COPIED,
+    FAILED,
+    MISSING,
+    PRESENT,
+    WOULD_COPY,
+    CopyError,
+    Manifest,
+    copy_file,
+    copy_target,
+    run_bounded,
+)
+from session.models import Clip, Rendition, Take, Track
 
 
 LOCAL_BACKEND = "django.core.files.storage.FileSystemStorage"
+MANIFEST_NAME = ".migrate_media_to_r2.jsonl"
+MIN_PART_SIZE = 5 * 1024 * 1024
+# ``(model, file field, label)`` for every file a row points at.
+MEDIA_FIELDS = [
+    (Track, "file", "track"),
+    (Take, "file", "take"),
+    (Track, "peaks", "track peaks"),
+    (Take, "peaks", "take peaks"),
+    (Rendition, "file", "rendition"),
+    (Clip, "file", "lick clip"),
+]
 
 
 class Command(BaseCommand):
     help = (
-        "Copy every Track/Take file from local MEDIA_ROOT into the configured "
-        "default storage (Cloudflare R2), verify sizes, and report."
+        "Copy every Track/Take file, waveform sidecar, rendition and lick clip "
+        "from local MEDIA_ROOT into the configured default storage (Cloudflare "
+        "R2) in parallel, verify checksums, and report."
     )
 
     def add_arguments(self, parser):
@@ -33,9 +66,45 @@ class Command(BaseCommand):
             action="store_true",
             help="Report what would be copied without writing anything.",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Files copied at the same time (default 8).",
+        )
+        parser.add_argument(
+            "--part-size",
+            type=int,
+            default=settings.DIRECT_UPLOAD_PART_SIZE,
+            help="Files larger than this many bytes go up as multipart uploads "
+            "in parts of this size (at least 5 MiB).",
+        )
+        parser.add_argument(
+            "--manifest",
+            default=None,
+            help=f"Progress manifest path (default: MEDIA_ROOT/{MANIFEST_NAME}).",
+        )
+
+    def _files(self):
+        """``(label, pk, name)`` for every distinct stored name."""
+        seen = set()
+        for model, field, label in MEDIA_FIELDS:
+            queryset = (
+                model.objects.exclude(**{field: ""})
+                .exclude(**{f"{field}__isnull": True})
+                .order_by("id")
+                .values_list("pk", field)
+            )
+            for pk, name in queryset.iterator():
+                # Tracks and takes sharing a blob share one object.
+                if name not in seen:
+                    seen.add(name)
+                    yield label, pk, name
 
     def handle(self, *args, **options):
         dry_run = options["dry_run"]
+        workers = options["workers"]
+        part_size = options["part_size"]
 
         if settings.STORAGES["default"]["BACKEND"] == LOCAL_BACKEND:
             raise CommandError(
@@ -43,76 +112,75 @@ class Command(BaseCommand):
                 "Set R2_BUCKET, R2_ACCESS_KEY_ID, R2_SECRET_ACCESS_KEY, and "
                 "R2_ENDPOINT_URL before running this command."
             )
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+        if part_size < MIN_PART_SIZE:
+            raise CommandError("--part-size must be at least 5 MiB (5242880 bytes).")
 
         source = FileSystemStorage(location=settings.MEDIA_ROOT)
+        target = copy_target(default_storage, part_size)
+        manifest = Manifest(
+            options["manifest"] or os.path.join(settings.MEDIA_ROOT, MANIFEST_NAME)
+        )
 
-        copied = skipped = missing = errors = 0
-
-        for model, label in ((Track, "track"), (Take, "take")):
-            queryset = (
-                model.objects.exclude(file="")
-                .exclude(file__isnull=True)
-                .order_by("id")
-            )
-            for obj in queryset.iterator():
-                name = obj.file.name
+        counts = {COPIED: 0, PRESENT: 0, MISSING: 0, FAILED: 0}
+        copied_bytes = 0
+        started = time.monotonic()
 
+        def jobs():
+            for label, pk, name in self._files():
                 if not source.exists(name):
-                    missing += 1
-                    self.stderr.write(
-                        f"MISSING local file for {label} #{obj.pk}: {name}"
-                    )
-                    continue
-
-                local_size = source.size(name)
-
-                if default_storage.exists(name):
-                    if default_storage.size(name) == local_size:
-                        skipped += 1
-                        self.stdout.write(f"ok (already in R2): {name}")
-                    else:
-                        errors += 1
-                        self.stderr.write(
-                            f"SIZE MISMATCH for {name}: local={local_size} "
-                            f"remote={default_storage.size(name)} — not overwriting; "
-                            "resolve manually."
-                        )
+                    counts[MISSING] += 1
+                    self.stderr.write(f"MISSING local file for {label} #{pk}: {name}")
                     continue
-
-                if dry_run:
-                    copied += 1
-                    self.stdout.write(f"would copy: {name} ({local_size} bytes)")
+                path = source.path(name)
+                if manifest.done(name, os.path.getsize(path)):
+                    counts[PRESENT] += 1
+                    self.stdout.write(f"ok (already in R2): {name}")
                     continue
-
-                with source.open(name, "rb") as handle:
-                    saved_name = default_storage.save(name, File(handle))
-
-                if saved_name != name:
-                    errors += 1
-                    self.stderr.write(
-                        f"ERROR: {name} was saved as {saved_name}; the database "
-                        "still references the original name. Investigate before "
-                        "deleting local files."
-                    )
+                yield target, path, name, dry_run
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for (_, _, name, _), future in run_bounded(pool, copy_file, jobs(), workers * 4):
+                try:
+                    outcome, size, etag = future.result()
+                except CopyError as err:
+                    counts[FAILED] += 1
+                    self.stderr.write(str(err))
                     continue
-
-                remote_size = default_storage.size(name)
-                if remote_size != local_size:
-                    errors += 1
-                    self.stderr.write(
-                        f"VERIFY FAILED for {name}: local={local_size} "
-                        f"remote={remote_size}"
-                    )
+                except Exception as err:
+                    counts[FAILED] += 1
+                    self.stderr.write(f"ERROR copying {name}: {err}")
                     continue
 
-                copied += 1
-                self.stdout.write(f"copied: {name} ({local_size} bytes)")
+                if outcome == PRESENT:
+                    counts[PRESENT] += 1
+                    self.stdout.write(f"ok (already in R2): {name}")
+                    if not dry_run:
+                        manifest.record(name, size, etag)
+                elif outcome == WOULD_COPY:
+                    counts[COPIED] += 1
+                    self.stdout.write(f"would copy: {name} ({size} bytes)")
+                else:
+                    counts[COPIED] += 1
+                    copied_bytes += size
+                    manifest.record(name, size, etag)
+                    self.stdout.write(f"copied: {name} ({size} bytes)")
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        if not dry_run:
+            self.stdout.write(
+                f"throughput: {copied_bytes / (1024 * 1024) / elapsed:.1f} MB/s, "
+                f"{counts[COPIED] / elapsed:.1f} files/s "
+                f"({counts[COPIED]} files, {copied_bytes} bytes in {elapsed:.1f}s, "
+                f"{workers} workers)"
+            )
 
         verb = "would copy" if dry_run else "copied"
         summary = (
-            f"{verb}: {copied}, already present: {skipped}, "
-            f"missing locally: {missing}, errors: {errors}"
+            f"{verb}: {counts[COPIED]}, already present: {counts[PRESENT]}, "
+            f"missing locally: {counts[MISSING]}, errors: {counts[FAILED]}"
         )
-        if errors:
+        if counts[FAILED]:
             raise CommandError(summary)
         self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,75 @@
+"""Respace crowded track and lick position keys ahead of time.
+
+Inserts and moves pick a key between their neighbours (session/ordering.py)
+and only renumber a parent inline when a gap is fully used up. Running this
+periodically (e.g. a nightly Railway cron) keeps that inline path rare:
+
+    python manage.py rebalance_positions --dry-run
+    python manage.py rebalance_positions --min-gap 16
+"""
+
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from session.models import Lick, Session, Track
+from session.ordering import MAX_POSITION, POSITION_GAP, rebalance
+
+
+class Command(BaseCommand):
+    help = "Renumber tracks/licks whose position keys have run out of room."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-gap",
+            type=int,
+            default=8,
+            help="Rebalance a parent when any two neighbours are closer than this.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report crowded parents without rewriting anything.",
+        )
+
+    def handle(self, *args, **options):
+        min_gap = options["min_gap"]
+        dry_run = options["dry_run"]
+
+        targets = (
+            (Track, "session", "pk"),
+            (Lick, "track", "tracks__pk"),
+        )
+        for model, parent_field, session_lookup in targets:
+            crowded = list(self.crowded_parents(model, parent_field, min_gap))
+            for parent_id in crowded:
+                if dry_run:
+                    continue
+                with transaction.atomic():
+                    siblings = model.objects.filter(**{f"{parent_field}_id": parent_id})
+                    if rebalance(siblings):
+                        Session.objects.filter(**{session_lookup: parent_id}).bump_version()
+
+            verb = "would rebalance" if dry_run else "rebalanced"
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {verb} {len(crowded)} "
+                f"{parent_field}(s)"
+            )
+
+    def crowded_parents(self, model, parent_field, min_gap):
+        parent_column = f"{parent_field}_id"
+        rows = (
+            model.objects.order_by(parent_column, "position", "created_at", "id")
+            .values_list(parent_column, "position")
+            .iterator(chunk_size=5000)
+        )
+        for parent_id, group in groupby(rows, key=lambda row: row[0]):
+            positions = [position for _, position in group]
+            gaps = (upper - lower for lower, upper in zip(positions, positions[1:]))
+            if (
+                positions[0] < min_gap
+                or positions[-1] > MAX_POSITION - POSITION_GAP * min_gap
+                or any(gap < min_gap for gap in gaps)
+            ):
+                yield parent_id
@@ -0,0 +1,248 @@
+"""Range-aware, conditional streaming of stored media (take recordings).
+
+``serve_media`` answers a GET for a ``FieldFile`` with:
+
+* ``ETag`` / ``Last-Modified`` validators and a 304 (or 412) through
+  Django's ``get_conditional_response``;
+* ``Accept-Ranges: bytes`` and 206 Partial Content for one range, or a
+  ``multipart/byteranges`` body for several, honouring ``If-Range``;
+* 416 with ``Content-Range: bytes */<size>`` when nothing is satisfiable.
+
+Bytes are read lazily per range, so seeking in a long video never reads
+from byte 0. On S3Storage (R2) each range is a ranged ``GetObject`` pinned
+to the ``ETag`` from the initial ``HeadObject``; other storages seek in the
+file returned by ``storage.open``.
+
+``presigned_redirect`` is the alternative for S3Storage: a 302 to a
+short-lived presigned URL, so R2 handles ranges and validators itself and
+no worker is tied up streaming.
+"""
+
+import secrets
+
+from botocore.exceptions import ClientError
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .storage import is_s3, s3_key
+
+
+CHUNK_SIZE = 64 * 1024
+# More ranges than this in one request is treated as abuse and ignored.
+MAX_RANGES = 16
+
+
+class StoredMedia:
+    """A file on any Django storage that supports ``open()`` + ``seek()``."""
+
+    def __init__(self, field_file):
+        self.storage = field_file.storage
+        self.name = field_file.name
+        self.size = self.storage.size(self.name)
+        try:
+            self.last_modified = self.storage.get_modified_time(self.name)
+        except NotImplementedError:
+            self.last_modified = None
+        stamp = int(self.last_modified.timestamp() * 1_000_000) if self.last_modified else 0
+        self.etag = f'"{self.size:x}-{stamp:x}"'
+
+    def open(self):
+        return self.storage.open(self.name, "rb")
+
+    def read_range(self, start, end):
+        with self.storage.open(self.name, "rb") as handle:
+            handle.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = handle.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+
+class S3Media:
+    """An object on ``S3Storage``, read with ranged ``GetObject`` calls."""
+
+    def __init__(self, field_file):
+        storage = field_file.storage
+        self.name = field_file.name
+        self.object = storage.bucket.Object(s3_key(storage, self.name))
+        try:
+            self.object.load()
+        except ClientError as err:
+            if err.response["ResponseMetadata"]["HTTPStatusCode"] == 404:
+                raise FileNotFoundError(f"File does not exist: {self.name}") from None
+            raise
+        self.size = self.object.content_length
+        self.last_modified = self.object.last_modified
+        self.etag = self.object.e_tag
+
+    def open(self):
+        return self.object.get(IfMatch=self.etag)["Body"]
+
+    def read_range(self, start, end):
+        body = self.object.get(Range=f"bytes={start}-{end}", IfMatch=self.etag)["Body"]
+        yield from body.iter_chunks(CHUNK_SIZE)
+
+
+def stored_media(field_file):
+    """Size, validators and readers for ``field_file``. Raises
+    ``FileNotFoundError`` when the object is missing."""
+    if is_s3(field_file.storage):
+        return S3Media(field_file)
+    return StoredMedia(field_file)
+
+
+def presigned_redirect(field_file, content_type, filename=None, expire=300):
+    """302 to a presigned URL for ``field_file``, or ``None`` when its
+    storage cannot presign (local media)."""
+    if not is_s3(field_file.storage):
+        return None
+    parameters = {"ResponseContentType": content_type}
+    if filename:
+        parameters["ResponseContentDisposition"] = content_disposition_header(False, filename)
+    url = field_file.storage.url(field_file.name, parameters=parameters, expire=expire)
+    response = HttpResponseRedirect(url)
+    # The URL expires quickly; never let a cache replay the redirect.
+    response["Cache-Control"] = "private, no-store"
+    return response
+
+
+def parse_ranges(header, size):
+    """Inclusive ``(start, end)`` pairs for a ``Range`` header.
+
+    ``None`` means serve the whole file (no header, a unit other than
+    bytes, a malformed or oversized set); ``[]`` means nothing in it is
+    satisfiable. Overlapping and adjacent ranges are coalesced.
+    """
+    units, _, spec = (header or "").partition("=")
+    if units.strip().lower() != "bytes" or not spec.strip():
+        return None
+    parts = spec.split(",")
+    if len(parts) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in parts:
+        first, dash, last = part.strip().partition("-")
+        if not dash or not (first or last) or (first and not first.isdigit()):
+            return None
+        if last and not last.isdigit():
+            return None
+        if not first:
+            # Suffix range: the final ``last`` bytes.
+            start, end = max(0, size - int(last)), size - 1
+            if int(last) == 0:
+                continue
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+            if last and int(last) < start:
+                return None
+        if start < size:
+            ranges.append((start, end))
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _if_range_matches(request, media):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    value = value.strip()
+    if value.startswith(('"', "W/")):
+        # If-Range uses the strong comparison: a weak tag never matches.
+        return not value.startswith("W/") and value == media.etag
+    since = parse_http_date_safe(value)
+    return (
+        since is not None
+        and media.last_modified is not None
+        and since == int(media.last_modified.timestamp())
+    )
+
+
+def _multipart(media, ranges, content_type, boundary):
+    parts = []
+    for start, end in ranges:
+        head = (
+            f"--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{media.size}\r\n\r\n"
+        ).encode()
+        parts.append((head, start, end))
+    tail = f"--{boundary}--\r\n".encode()
+    length = sum(len(head) + end - start + 1 + 2 for head, start, end in parts) + len(tail)
+
+    def body():
+        for head, start, end in parts:
+            yield head
+            yield from media.read_range(start, end)
+            yield b"\r\n"
+        yield tail
+
+    return body(), length
+
+
+def serve_media(request, field_file, content_type, filename=None):
+    """Response for a GET of ``field_file`` honouring the request's
+    conditional and ``Range`` headers."""
+    media = stored_media(field_file)
+    last_modified = (
+        int(media.last_modified.timestamp()) if media.last_modified is not None else None
+    )
+    headers = {"ETag": media.etag, "Accept-Ranges": "bytes"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    conditional = get_conditional_response(
+        request,
+        etag=media.etag,
+        last_modified=last_modified,
+    )
+    if conditional is not None:
+        for header, value in headers.items():
+            conditional[header] = value
+        return conditional
+
+    ranges = None
+    if "HTTP_RANGE" in request.META and _if_range_matches(request, media):
+        ranges = parse_ranges(request.META["HTTP_RANGE"], media.size)
+
+    if ranges is None:
+        response = FileResponse(media.open(), content_type=content_type, filename=filename)
+        response["Content-Length"] = media.size
+    elif not ranges:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{media.size}"
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            media.read_range(start, end),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{media.size}"
+        response["Content-Length"] = end - start + 1
+    else:
+        boundary = secrets.token_hex(16)
+        body, length = _multipart(media, ranges, content_type, boundary)
+        response = StreamingHttpResponse(
+            body,
+            status=206,
+            content_type=f"multipart/byteranges; boundary={boundary}",
+        )
+        response["Content-Length"] = length
+
+    if filename and response.status_code == 206:
+        headers["Content-Disposition"] = content_disposition_header(False, filename)
+    for header, value in headers.items():
+        response[header] = value
+    return response
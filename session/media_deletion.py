@@ -0,0 +1,169 @@
+"""Deferred, batched deletion of stored media files.
+
+Track and take files used to be deleted one request at a time from the
+``post_delete`` receivers: inside the request, inside any open transaction.
+Deleting a session with 500 takes made 500 serial R2 DELETEs before the
+response went out, and a transaction that then rolled back had already lost
+its files. Now ``delete_later`` queues the name once the transaction commits
+(never if it rolls back), and a background thread deletes queued names in
+batches:
+
+* on S3Storage (R2) with ``DeleteObjects``, up to
+  ``MEDIA_DELETE_BATCH_SIZE`` (at most 1000) keys per request;
+* on other storages with ``storage.delete`` on a small thread pool.
+
+Failed names are retried ``MEDIA_DELETE_RETRIES`` times with exponential
+backoff, then written to the ``session.media_deletion.dead_letter`` logger;
+``manage.py gc_media`` reclaims whatever is left behind. The thread is a
+daemon, so a management command that queues deletes calls ``flush()``
+before it exits.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from .storage import is_s3, s3_client, s3_key
+
+
+logger = logging.getLogger(__name__)
+dead_letter = logging.getLogger(f"{__name__}.dead_letter")
+
+# DeleteObjects takes at most this many keys.
+MAX_DELETE_OBJECTS = 1000
+
+
+class MediaDeleter:
+    """A queue of ``(storage, name)`` drained by one daemon thread."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, storage, name):
+        self._queue.put((storage, name))
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="media-deleter",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def join(self):
+        """Block until every queued name has been deleted or dead-lettered."""
+        self._queue.join()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + settings.MEDIA_DELETE_LINGER
+        while len(batch) < settings.MEDIA_DELETE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            try:
+                delete_batch(batch)
+            except Exception:
+                logger.exception("media deletion batch failed")
+                for storage, name in batch:
+                    dead_letter.error("could not delete %s", name)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+media_deleter = MediaDeleter()
+
+
+def delete_later(storage, name):
+    """Delete ``name`` from ``storage`` after the current transaction
+    commits (straight away when there is none)."""
+    if name:
+        transaction.on_commit(partial(media_deleter.put, storage, name))
+
+
+def flush():
+    """Block until every name queued so far has been deleted or
+    dead-lettered."""
+    media_deleter.join()
+
+
+def _with_retries(delete, names):
+    """Call ``delete(names)`` (which returns the names that failed) until
+    nothing fails or the retries run out; returns what is left."""
+    for attempt in range(settings.MEDIA_DELETE_RETRIES + 1):
+        if attempt:
+            time.sleep(settings.MEDIA_DELETE_BACKOFF * 2 ** (attempt - 1))
+        names = delete(names)
+        if not names:
+            break
+    return names
+
+
+def _delete_objects(storage, names):
+    keys = {s3_key(storage, name): name for name in names}
+    try:
+        response = s3_client(storage).delete_objects(
+            Bucket=storage.bucket_name,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+    except Exception:
+        logger.warning("DeleteObjects of %d keys failed", len(keys), exc_info=True)
+        return names
+    return [keys[error["Key"]] for error in response.get("Errors", []) if error["Key"] in keys]
+
+
+def _delete_each(storage, names):
+    def delete(name):
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.warning("could not delete %s", name, exc_info=True)
+            return name
+        return None
+
+    with ThreadPoolExecutor(max_workers=settings.MEDIA_DELETE_WORKERS) as pool:
+        return [name for name in pool.map(delete, names) if name is not None]
+
+
+def delete_batch(items):
+    """Delete ``(storage, name)`` pairs, grouped per storage; returns the
+    names that could not be deleted (and were dead-lettered)."""
+    by_storage = {}
+    for storage, name in items:
+        by_storage.setdefault(id(storage), (storage, []))[1].append(name)
+
+    not_deleted = []
+    for storage, names in by_storage.values():
+        names = list(dict.fromkeys(names))
+        if is_s3(storage):
+            size = min(settings.MEDIA_DELETE_BATCH_SIZE, MAX_DELETE_OBJECTS)
+            chunks = [names[start:start + size] for start in range(0, len(names), size)]
+            failed = [
+                name
+                for chunk in chunks
+                for name in _with_retries(partial(_delete_objects, storage), chunk)
+            ]
+        else:
+            failed = _with_retries(partial(_delete_each, storage), names)
+        for name in failed:
+            dead_letter.error("could not delete %s", name)
+        not_deleted.extend(failed)
+    return not_deleted
@@ -0,0 +1,166 @@
+"""Find stored media files that no database row references.
+
+Files are left behind by deletes that failed (see the dead-letter log of
+``session/media_deletion.py``), uploads whose request rolled back, and
+renames by storages that never overwrite. ``manage.py gc_media`` finds
+them in constant memory, however many objects the bucket holds:
+
+* ``stored_files`` streams the storage listing in ascending name order, a
+  page at a time (``ListObjectsV2`` on R2, a sorted directory walk on local
+  disk);
+* ``referenced_names`` streams every name the database uses, also in
+  ascending order, from server-side cursors;
+* ``orphans`` merge-joins the two, so neither side is ever held in memory.
+
+Both streams must be in plain code-point (UTF-8 byte) order, which is not
+what every database collation gives, so names are sorted with an explicit
+binary collation and each stream is checked as it goes: anything out of
+order stops the run instead of risking a wrong delete.
+"""
+
+import heapq
+import os
+from datetime import datetime, timezone
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Collate
+
+from .blobs import BLOB_PREFIX
+from .models import Clip, MediaBlob, MediaUpload, Rendition, Take, Track
+from .storage import is_s3, s3_client, s3_key
+
+
+# Rows fetched per round trip from each server-side cursor.
+CHUNK_SIZE = 2000
+# Objects per ListObjectsV2 page (the S3 maximum).
+LIST_PAGE_SIZE = 1000
+# Collations that order like Python's str comparison.
+BINARY_COLLATIONS = {"postgresql": "C", "sqlite": "BINARY", "mysql": "utf8mb4_bin"}
+
+
+class OrderError(Exception):
+    """A name stream was not in ascending order."""
+
+
+class StoredFile:
+    def __init__(self, name, size, modified):
+        self.name = name
+        self.size = size
+        self.modified = modified
+
+
+def media_prefixes():
+    """Directories that hold track, take, blob, peaks, rendition and clip
+    files, sorted."""
+    prefixes = {
+        Track._meta.get_field("file").upload_to,
+        Take._meta.get_field("file").upload_to,
+        Track._meta.get_field("peaks").upload_to,
+        Take._meta.get_field("peaks").upload_to,
+        Rendition._meta.get_field("file").upload_to,
+        Clip._meta.get_field("file").upload_to,
+        f"{BLOB_PREFIX}/",
+    }
+    return sorted(prefix.rstrip("/") + "/" for prefix in prefixes)
+
+
+def _ascending(names, what):
+    previous = None
+    for item in names:
+        name = item if isinstance(item, str) else item.name
+        if previous is not None and name < previous:
+            raise OrderError(f"{what} is not in ascending order at {name!r}.")
+        previous = name
+        yield item
+
+
+def _walk_sorted(root, relative):
+    """Files under ``root/relative`` in the order of their full names:
+    ``a/b`` sorts after ``a-c``, so each directory counts as its name plus
+    a slash."""
+    directory = os.path.join(root, relative)
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    keyed = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            keyed.append((entry.name + "/", entry))
+        elif entry.is_file(follow_symlinks=False):
+            keyed.append((entry.name, entry))
+    for key, entry in sorted(keyed, key=lambda pair: pair[0]):
+        name = f"{relative}{entry.name}"
+        if key.endswith("/"):
+            yield from _walk_sorted(root, name + "/")
+        else:
+            stat = entry.stat(follow_symlinks=False)
+            modified = datetime.fromtimestamp(stat.st_mtime, timezone.utc)
+            yield StoredFile(name, stat.st_size, modified)
+
+
+def _list_s3(storage, prefix):
+    location = storage._normalize_name("")
+    paginator = s3_client(storage).get_paginator("list_objects_v2")
+    pages = paginator.paginate(
+        Bucket=storage.bucket_name,
+        Prefix=s3_key(storage, prefix),
+        PaginationConfig={"PageSize": LIST_PAGE_SIZE},
+    )
+    for page in pages:
+        for item in page.get("Contents", []):
+            name = item["Key"][len(location):].lstrip("/") if location else item["Key"]
+            yield StoredFile(name, item["Size"], item["LastModified"])
+
+
+def stored_files(storage, prefixes):
+    """Every file under ``prefixes`` (given sorted), in ascending order."""
+    for prefix in prefixes:
+        if is_s3(storage):
+            files = _list_s3(storage, prefix)
+        elif hasattr(storage, "location"):
+            files = _walk_sorted(storage.location, prefix)
+        else:
+            raise NotImplementedError(f"Cannot list {type(storage).__name__}.")
+        yield from _ascending(files, "The storage listing")
+
+
+def _sorted_names(queryset, field):
+    collation = BINARY_COLLATIONS.get(connection.vendor)
+    ordering = Collate(F(field), collation) if collation else F(field)
+    names = (
+        queryset.exclude(**{field: ""})
+        .exclude(**{f"{field}__isnull": True})
+        .order_by(ordering)
+        .values_list(field, flat=True)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return _ascending(names, f"{queryset.model.__name__}.{field}")
+
+
+def referenced_names():
+    """Every stored name a row points at, ascending (with repeats)."""
+    return heapq.merge(
+        _sorted_names(Track.objects.all(), "file"),
+        _sorted_names(Take.objects.all(), "file"),
+        _sorted_names(Track.objects.all(), "peaks"),
+        _sorted_names(Take.objects.all(), "peaks"),
+        _sorted_names(MediaBlob.objects.all(), "name"),
+        _sorted_names(Rendition.objects.all(), "file"),
+        _sorted_names(Clip.objects.all(), "file"),
+        # Resumable and live uploads to local disk write their final file
+        # before any row points at it.
+        _sorted_names(MediaUpload.objects.filter(status=MediaUpload.STATUS_PENDING), "key"),
+    )
+
+
+def orphans(files, names):
+    """Files from ``files`` whose name is not in ``names``; both ascending."""
+    names = iter(names)
+    current = next(names, None)
+    for stored in files:
+        while current is not None and current < stored.name:
+            current = next(names, None)
+        if current != stored.name:
+            yield stored
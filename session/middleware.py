@@ -0,0 +1,27 @@
+from .storage import PresignStats, request_presign_stats
+
+
+class PresignTimingMiddleware:
+    """Report presigned-URL work for the request in a ``Server-Timing``
+    header (visible in the browser's network panel)::
+
+        Server-Timing: presign;dur=4.1;desc="12 signed", presign-saved;dur=30.2;desc="88 cached"
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = PresignStats()
+        token = request_presign_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_presign_stats.reset(token)
+
+        if stats.hits or stats.misses:
+            response["Server-Timing"] = (
+                f'presign;dur={stats.signing_seconds * 1000:.1f};desc="{stats.misses} signed", '
+                f'presign-saved;dur={stats.saved_seconds * 1000:.1f};desc="{stats.hits} cached"'
+            )
+        return response
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("session", "0011_track_note"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="session",
+            index=models.Index(
+                fields=["user", "-updated_at", "-id"],
+                name="session_user_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="track",
+            index=models.Index(
+                fields=["session", "position", "created_at", "id"],
+                name="track_session_order_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lick",
+            index=models.Index(
+                fields=["track", "position", "created_at", "id"],
+                name="lick_track_order_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="take",
+            index=models.Index(
+                fields=["track", "-created_at", "-id"],
+                name="take_track_order_idx",
+            ),
+        ),
+    ]
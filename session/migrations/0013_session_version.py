@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("session", "0012_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="session",
+            name="version",
+            field=models.PositiveBigIntegerField(default=1, editable=False),
+        ),
+    ]
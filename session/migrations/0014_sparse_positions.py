@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+# Mirrors session.ordering.POSITION_GAP at the time of this migration.
+POSITION_GAP = 1024
+BATCH_SIZE = 1000
+
+
+def spread_positions(apps, schema_editor):
+    # Positions become 1024, 2048, ... by rank under each parent, so the
+    # first insert or move finds a gap instead of forcing a rebalance.
+    # Ranking (rather than scaling the old values) keeps every key small
+    # whatever positions were stored; ties keep their created_at, id order.
+    for name, parent in (("Track", "session_id"), ("Lick", "track_id")):
+        model = apps.get_model("session", name)
+        parent_ids = list(
+            model.objects.order_by(parent).values_list(parent, flat=True).distinct()
+        )
+        for parent_id in parent_ids:
+            children = model.objects.filter(**{parent: parent_id}).order_by(
+                "position", "created_at", "id"
+            )
+            model.objects.bulk_update(
+                [
+                    model(pk=pk, position=rank * POSITION_GAP)
+                    for rank, pk in enumerate(children.values_list("pk", flat=True), 1)
+                ],
+                ["position"],
+                batch_size=BATCH_SIZE,
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("session", "0013_session_version"),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _owner_field():
+    return models.ForeignKey(
+        db_index=False,
+        editable=False,
+        null=True,
+        on_delete=django.db.models.deletion.CASCADE,
+        related_name="+",
+        to=settings.AUTH_USER_MODEL,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("session", "0015_sync"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(model_name="track", name="owner", field=_owner_field()),
+        migrations.AddField(model_name="lick", name="owner", field=_owner_field()),
+        migrations.AddField(model_name="take", name="owner", field=_owner_field()),
+        migrations.RemoveIndex(model_name="track", name="track_updated_idx"),
+        migrations.RemoveIndex(model_name="lick", name="lick_updated_idx"),
+        migrations.RemoveIndex(model_name="take", name="take_updated_idx"),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+
+BATCH_SIZE = 10_000
+
+
+def _backfill(model, owner_of_parent):
+    # Walk primary-key ranges so every UPDATE is short and commits on its
+    # own (the migration is non-atomic); rerunning picks up where it left off.
+    last = model.objects.aggregate(last=Max("pk"))["last"] or 0
+    for start in range(0, last + 1, BATCH_SIZE):
+        model.objects.filter(
+            pk__gte=start,
+            pk__lt=start + BATCH_SIZE,
+            owner__isnull=True,
+        ).update(owner_id=Subquery(owner_of_parent[:1]))
+
+
+def backfill_owner(apps, schema_editor):
+    Session = apps.get_model("session", "Session")
+    Track = apps.get_model("session", "Track")
+    Lick = apps.get_model("session", "Lick")
+    Take = apps.get_model("session", "Take")
+
+    _backfill(
+        Track,
+        Session.objects.filter(pk=OuterRef("session_id")).values("user_id"),
+    )
+    track_owner = Track.objects.filter(pk=OuterRef("track_id")).values("owner_id")
+    _backfill(Lick, track_owner)
+    _backfill(Take, track_owner)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("session", "0016_owner"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_owner, migrations.RunPython.noop),
+    ]
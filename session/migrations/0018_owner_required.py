@@ -0,0 +1,47 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _owner_field():
+    return models.ForeignKey(
+        db_index=False,
+        editable=False,
+        on_delete=django.db.models.deletion.CASCADE,
+        related_name="+",
+        to=settings.AUTH_USER_MODEL,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("session", "0017_backfill_owner"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(model_name="track", name="owner", field=_owner_field()),
+        migrations.AlterField(model_name="lick", name="owner", field=_owner_field()),
+        migrations.AlterField(model_name="take", name="owner", field=_owner_field()),
+        migrations.AddIndex(
+            model_name="track",
+            index=models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="track_owner_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="lick",
+            index=models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="lick_owner_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="take",
+            index=models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="take_owner_updated_idx",
+            ),
+        ),
+    ]
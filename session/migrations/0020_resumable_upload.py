@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0019_media_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mediaupload',
+            name='upload_status_created_idx',
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='offset',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='part_etags',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='resumable',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='mediaupload',
+            name='upload_id',
+            field=models.CharField(blank=True, max_length=1024),
+        ),
+        migrations.AddIndex(
+            model_name='mediaupload',
+            index=models.Index(fields=['status', 'updated_at'], name='upload_status_updated_idx'),
+        ),
+    ]
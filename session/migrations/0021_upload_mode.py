@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:31
+
+from django.db import migrations, models
+
+
+def resumable_to_mode(apps, schema_editor):
+    MediaUpload = apps.get_model("session", "MediaUpload")
+    MediaUpload.objects.filter(resumable=True).update(mode="resumable")
+
+
+def mode_to_resumable(apps, schema_editor):
+    MediaUpload = apps.get_model("session", "MediaUpload")
+    MediaUpload.objects.filter(mode="resumable").update(resumable=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0020_resumable_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaupload',
+            name='mode',
+            field=models.CharField(choices=[('direct', 'Direct'), ('resumable', 'Resumable'), ('live', 'Live')], default='direct', max_length=10),
+        ),
+        migrations.RunPython(resumable_to_mode, mode_to_resumable),
+        migrations.RemoveField(
+            model_name='mediaupload',
+            name='resumable',
+        ),
+        migrations.AddField(
+            model_name='mediaupload',
+            name='metadata',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
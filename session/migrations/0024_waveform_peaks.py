@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0023_media_blob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='take',
+            name='peaks',
+            field=models.FileField(blank=True, editable=False, upload_to='peaks/'),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='peaks',
+            field=models.FileField(blank=True, editable=False, upload_to='peaks/'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0024_waveform_peaks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('speed_percent', models.PositiveSmallIntegerField()),
+                ('source', models.CharField(max_length=255)),
+                ('file', models.FileField(max_length=255, upload_to='renditions/')),
+                ('size', models.PositiveBigIntegerField()),
+                ('last_used_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('track', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='session.track')),
+            ],
+            options={
+                'ordering': ['last_used_at', 'id'],
+                'indexes': [models.Index(fields=['last_used_at', 'id'], name='rendition_last_used_idx')],
+                'constraints': [models.UniqueConstraint(fields=('track', 'speed_percent', 'source'), name='rendition_track_speed_source_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0025_rendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lick',
+            name='clip',
+            field=models.FileField(blank=True, editable=False, upload_to='clips/'),
+        ),
+    ]
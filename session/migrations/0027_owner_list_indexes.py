@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0026_lick_clip'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lick',
+            index=models.Index(fields=['owner', 'position', 'created_at', 'id'], name='lick_owner_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='take',
+            index=models.Index(fields=['owner', '-created_at', '-id'], name='take_owner_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='track',
+            index=models.Index(fields=['owner', 'position', 'created_at', 'id'], name='track_owner_order_idx'),
+        ),
+    ]
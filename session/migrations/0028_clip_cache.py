@@ -0,0 +1,36 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0027_owner_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='lick',
+            name='clip',
+        ),
+        migrations.CreateModel(
+            name='Clip',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=64)),
+                ('start_ms', models.PositiveIntegerField()),
+                ('end_ms', models.PositiveIntegerField()),
+                ('pre_roll_ms', models.PositiveIntegerField()),
+                ('file', models.FileField(max_length=255, upload_to='clips/')),
+                ('size', models.PositiveBigIntegerField()),
+                ('last_used_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['last_used_at', 'id'],
+                'indexes': [models.Index(fields=['last_used_at', 'id'], name='clip_last_used_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'start_ms', 'end_ms', 'pre_roll_ms'), name='clip_source_cut_uniq')],
+            },
+        ),
+    ]
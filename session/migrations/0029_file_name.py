@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0028_clip_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='take',
+            name='file_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='track',
+            name='file_name',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -3,6 +3,14 @@ from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 
+class SessionQuerySet(models.QuerySet):
+    def bump_version(self):
+        """Advance ``version`` with a single UPDATE. Call after any write
+        under a session that skips ``save()`` (bulk ``update()``, reorders) so
+        cached detail documents and ETags move on."""
+        return self.update(version=models.F("version") + 1)
+
+
 class Session(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -10,17 +18,91 @@ class Session(models.Model):
         related_name="practice_sessions",
     )
     name = models.CharField(max_length=120)
+    version = models.PositiveBigIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SessionQuerySet.as_manager()
+
     class Meta:
         ordering = ["-updated_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-updated_at", "-id"],
+                name="session_user_updated_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "user_id" in instance.__dict__:
+            instance._loaded_user_id = instance.user_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        moved = self.user_id != getattr(self, "_loaded_user_id", self.user_id)
+        if not self._state.adding and not kwargs.get("force_insert"):
+            # ``version`` only moves through ``bump_version()``: writing back
+            # a value read before a child write would undo that bump.
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            kwargs["update_fields"] = [name for name in update_fields if name != "version"]
+        super().save(*args, **kwargs)
+        self._loaded_user_id = self.user_id
+        if moved:
+            # Keep the denormalised ``owner`` of everything below in step.
+            Track.objects.filter(session=self).update(owner_id=self.user_id)
+            Lick.objects.filter(track__session=self).update(owner_id=self.user_id)
+            Take.objects.filter(track__session=self).update(owner_id=self.user_id)
+
+
+class OwnedMixin:
+    """Maintain ``owner``, a copy of the owning user taken from the parent
+    named by ``owner_parent``, so ownership checks filter one indexed
+    column instead of joining up to ``Session``."""
+
+    owner_parent = None
 
-class Track(models.Model):
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        parent_attname = f"{cls.owner_parent}_id"
+        if parent_attname in instance.__dict__:
+            instance._loaded_parent_id = instance.__dict__[parent_attname]
+        return instance
+
+    def parent_owner_id(self):
+        parent = getattr(self, self.owner_parent)
+        return parent.user_id if isinstance(parent, Session) else parent.owner_id
+
+    def save(self, *args, **kwargs):
+        parent_id = getattr(self, f"{self.owner_parent}_id")
+        moved = parent_id != getattr(self, "_loaded_parent_id", parent_id)
+        previous_owner_id = self.owner_id
+        if self.owner_id is None or moved:
+            self.owner_id = self.parent_owner_id()
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "owner"}
+        super().save(*args, **kwargs)
+        self._loaded_parent_id = parent_id
+        if moved and self.owner_id != previous_owner_id:
+            self.owner_changed()
+
+    def owner_changed(self):
+        pass
+
+
+class Track(OwnedMixin, models.Model):
     SOURCE_YOUTUBE = "youtube"
     SOURCE_MP3 = "mp3"
     SOURCE_PDF = "pdf"
@@ -32,16 +114,42 @@ class Track(models.Model):
         (SOURCE_IMAGE, "Image"),
     ]
 
+    owner_parent = "session"
+
     session = models.ForeignKey(
         Session,
         on_delete=models.CASCADE,
         related_name="tracks",
     )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        editable=False,
+        db_index=False,
+    )
     name = models.CharField(max_length=200)
     note = models.TextField(blank=True, default="")
     source_type = models.CharField(max_length=10, choices=SOURCE_CHOICES)
     youtube_url = models.URLField(max_length=500, blank=True, default="")
     file = models.FileField(upload_to="tracks/", blank=True, null=True)
+    # The name the file was uploaded under: ``file`` may be a blob named
+    # by its hash.
+    file_name = models.CharField(max_length=255, blank=True, editable=False)
+    # Recorded as the file is uploaded (see session/upload_handlers.py).
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    file_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    # Set when ``file`` is a shared, content-addressed blob (session/blobs.py).
+    blob = models.ForeignKey(
+        "MediaBlob",
+        on_delete=models.PROTECT,
+        related_name="+",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    # Waveform peak pyramid of ``file`` (session/waveforms.py).
+    peaks = models.FileField(upload_to="peaks/", blank=True, editable=False)
     bpm = models.PositiveSmallIntegerField(
         null=True,
         blank=True,
@@ -58,17 +166,45 @@ class Track(models.Model):
 
     class Meta:
         ordering = ["position", "created_at"]
+        indexes = [
+            models.Index(
+                fields=["session", "position", "created_at", "id"],
+                name="track_session_order_idx",
+            ),
+            models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="track_owner_updated_idx",
+            ),
+            # Unfiltered lists: the owner's rows in ``Meta.ordering``.
+            models.Index(
+                fields=["owner", "position", "created_at", "id"],
+                name="track_owner_order_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.source_type})"
 
+    def owner_changed(self):
+        Lick.objects.filter(track=self).update(owner_id=self.owner_id)
+        Take.objects.filter(track=self).update(owner_id=self.owner_id)
+
+
+class Lick(OwnedMixin, models.Model):
+    owner_parent = "track"
 
-class Lick(models.Model):
     track = models.ForeignKey(
         Track,
         on_delete=models.CASCADE,
         related_name="licks",
     )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        editable=False,
+        db_index=False,
+    )
     name = models.CharField(max_length=200)
     start_seconds = models.FloatField(validators=[MinValueValidator(0)])
     end_seconds = models.FloatField()
@@ -83,12 +219,29 @@ class Lick(models.Model):
 
     class Meta:
         ordering = ["position", "created_at"]
+        indexes = [
+            models.Index(
+                fields=["track", "position", "created_at", "id"],
+                name="lick_track_order_idx",
+            ),
+            models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="lick_owner_updated_idx",
+            ),
+            # Unfiltered lists: the owner's rows in ``Meta.ordering``.
+            models.Index(
+                fields=["owner", "position", "created_at", "id"],
+                name="lick_owner_order_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Take(models.Model):
+class Take(OwnedMixin, models.Model):
+    owner_parent = "track"
+
     MODE_AUDIO = "audio"
     MODE_VIDEO = "video"
     MODE_VIDEO_AUDIO = "video_audio"
@@ -103,14 +256,256 @@ class Take(models.Model):
         on_delete=models.CASCADE,
         related_name="takes",
     )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        editable=False,
+        db_index=False,
+    )
     name = models.CharField(max_length=200)
     capture_mode = models.CharField(max_length=12, choices=MODE_CHOICES)
     file = models.FileField(upload_to="takes/")
+    file_name = models.CharField(max_length=255, blank=True, editable=False)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    file_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    blob = models.ForeignKey(
+        "MediaBlob",
+        on_delete=models.PROTECT,
+        related_name="+",
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    peaks = models.FileField(upload_to="peaks/", blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["track", "-created_at", "-id"],
+                name="take_track_order_idx",
+            ),
+            models.Index(
+                fields=["owner", "updated_at", "id"],
+                name="take_owner_updated_idx",
+            ),
+            # Unfiltered lists: the owner's rows in ``Meta.ordering``.
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="take_owner_order_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class Tombstone(models.Model):
+    """Record of a deleted session, track, lick or take for ``GET /sync/``.
+
+    Only the row the delete started from is recorded; a session tombstone
+    implies its tracks, licks and takes are gone too. Old rows are removed
+    by ``manage.py compact_tombstones``.
+    """
+
+    KIND_SESSION = "session"
+    KIND_TRACK = "track"
+    KIND_LICK = "lick"
+    KIND_TAKE = "take"
+    KIND_CHOICES = [
+        (KIND_SESSION, "Session"),
+        (KIND_TRACK, "Track"),
+        (KIND_LICK, "Lick"),
+        (KIND_TAKE, "Take"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["deleted_at", "id"]
+        indexes = [
+            models.Index(
+                fields=["user", "deleted_at", "id"],
+                name="tombstone_user_deleted_idx",
+            ),
+            models.Index(fields=["deleted_at"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+
+class MediaUpload(models.Model):
+    """An upload of a track or take file in progress.
+
+    Direct uploads are PUT by the browser straight to R2 with presigned
+    URLs; the row remembers the multipart ``upload_id`` and the declared
+    size until the completion call creates the ``Track`` or ``Take`` (see
+    ``session/uploads.py``). Resumable uploads send their chunks through the
+    API instead and also track the bytes received so far (see
+    ``session/resumable.py``). Live uploads append a take's chunks while it
+    is still being recorded, so their size is only known once finalized
+    (see ``session/live.py``).
+    """
+
+    KIND_TRACK = "track"
+    KIND_TAKE = "take"
+    KIND_CHOICES = [
+        (KIND_TRACK, "Track"),
+        (KIND_TAKE, "Take"),
+    ]
+
+    MODE_DIRECT = "direct"
+    MODE_RESUMABLE = "resumable"
+    MODE_LIVE = "live"
+    MODE_CHOICES = [
+        (MODE_DIRECT, "Direct"),
+        (MODE_RESUMABLE, "Resumable"),
+        (MODE_LIVE, "Live"),
+    ]
+
+    STATUS_PENDING = "pending"
+    STATUS_COMPLETED = "completed"
+    STATUS_ABORTED = "aborted"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_ABORTED, "Aborted"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default=MODE_DIRECT)
+    filename = models.CharField(max_length=255)
+    key = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    part_size = models.PositiveIntegerField()
+    # S3 multipart upload id; empty for uploads through the API to local disk.
+    upload_id = models.CharField(max_length=1024, blank=True)
+    # Resumable and live uploads: contiguous bytes stored, and the ETag of
+    # each part sent to R2.
+    offset = models.PositiveBigIntegerField(default=0)
+    part_etags = models.JSONField(default=list, blank=True)
+    # Live uploads: the take fields given when recording started.
+    metadata = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="upload_status_updated_idx"),
+        ]
+
+    def __str__(self):
+        return self.key
+
+    @property
+    def part_count(self):
+        return max(1, -(-self.size // self.part_size))
+
+
+class MediaBlob(models.Model):
+    """One stored file, named by its SHA-256 and shared by every track and
+    take with the same content.
+
+    ``ref_count`` is the number of rows whose ``blob`` points here; the file
+    is deleted when the last of them goes (see ``session/blobs.py``).
+    """
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+
+    def __str__(self):
+        return self.name
+
+
+class Rendition(models.Model):
+    """A track's audio time-stretched to one practice speed, kept in storage
+    as a cache (see ``session/renditions.py``).
+
+    ``source`` is the track file it was made from, so a replaced file never
+    serves an old rendition. Least recently used rows are evicted once the
+    renditions together pass ``RENDITION_CACHE_BYTES``.
+    """
+
+    track = models.ForeignKey(Track, on_delete=models.CASCADE, related_name="renditions")
+    # Speed in hundredths (75 = 0.75x), so lookups never compare floats.
+    speed_percent = models.PositiveSmallIntegerField()
+    source = models.CharField(max_length=255)
+    file = models.FileField(upload_to="renditions/", max_length=255)
+    size = models.PositiveBigIntegerField()
+    last_used_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["last_used_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["track", "speed_percent", "source"],
+                name="rendition_track_speed_source_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["last_used_at", "id"], name="rendition_last_used_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.track_id} @ {self.speed_percent / 100:.2f}x"
+
+
+class Clip(models.Model):
+    """A segment of a track file cut and encoded for looping a lick, kept in
+    storage as a cache (see ``session/clips.py``).
+
+    Rows are keyed by the file's content hash and the cut, not by lick, so
+    licks over the same segment share one, and a lick whose boundaries move
+    simply stops asking for its old clips; those age out as the least
+    recently used once the clips together pass ``LICK_CLIP_CACHE_BYTES``.
+    """
+
+    # ``clips.source_digest`` of the track file.
+    source = models.CharField(max_length=64)
+    start_ms = models.PositiveIntegerField()
+    end_ms = models.PositiveIntegerField()
+    pre_roll_ms = models.PositiveIntegerField()
+    file = models.FileField(upload_to="clips/", max_length=255)
+    size = models.PositiveBigIntegerField()
+    last_used_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["last_used_at", "id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["source", "start_ms", "end_ms", "pre_roll_ms"],
+                name="clip_source_cut_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["last_used_at", "id"], name="clip_last_used_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.source[:12]} {self.start_ms}-{self.end_ms} ms"
@@ -0,0 +1,320 @@
+"""Pitch-preserving, time-stretched renditions of MP3 tracks.
+
+``Track.last_speed`` and ``Lick.last_speed`` (0.25-1.5) used to drive the
+browser's ``playbackRate``, which sounds poor at slow speeds and keeps
+phones busy. ``GET /tracks/{id}/rendition/?speed=0.75`` instead serves the
+track already slowed down (or sped up) at the same pitch:
+
+* the speed is rounded to a multiple of ``RENDITION_SPEED_STEP`` so a
+  handful of renditions cover every slider position;
+* the audio is decoded (see ``session/waveforms.py``), stretched with WSOLA
+  (each frame is taken from near its nominal position where it best
+  continues the previous one, found by FFT cross-correlation) and encoded
+  as MP3 with ffmpeg, or as WAV without it, all a block at a time in
+  float32 so memory stays flat for long tracks;
+* one request renders a given speed under a cache lock; concurrent misses
+  wait for its row instead of rendering the same file again;
+* the result is stored under ``renditions/`` with a ``Rendition`` row, and
+  served like a take recording: byte ranges through ``serve_media``, or a
+  redirect to R2;
+* rows track their last use, and the least recently used are deleted once
+  all renditions together pass ``RENDITION_CACHE_BYTES``.
+
+Renditions are mono: they are for practising along, not for mastering.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import wave
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .media_deletion import delete_later
+from .models import Rendition
+from .waveforms import WaveformUnavailable, decode, local_copy
+
+
+SPEED_MIN_PERCENT = 25
+SPEED_MAX_PERCENT = 150
+# WSOLA analysis frame and how far (each way) a frame may move to line up.
+FRAME_SIZE = 2048
+TOLERANCE = 512
+DECODE_BLOCK = 1 << 18
+# A cache hit refreshes ``last_used_at`` at most this often.
+TOUCH_INTERVAL = timedelta(minutes=1)
+# How often a request waiting on another's render looks for the row, and
+# when a client that gave up waiting should ask again (seconds).
+POLL_INTERVAL = 0.25
+RETRY_AFTER = 5
+
+
+class RenditionUnavailable(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "This track cannot be time-stretched on this server."
+    default_code = "rendition_unavailable"
+
+
+class RenditionPending(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "This speed is still being rendered; try again shortly."
+    default_code = "rendition_pending"
+
+    def __init__(self):
+        super().__init__()
+        # DRF's exception handler turns this into Retry-After.
+        self.wait = RETRY_AFTER
+
+
+def quantise_speed(speed):
+    """``speed`` (a factor) as whole hundredths, rounded to the step."""
+    step = max(1, round(settings.RENDITION_SPEED_STEP * 100))
+    percent = round(speed * 100 / step) * step
+    return min(SPEED_MAX_PERCENT, max(SPEED_MIN_PERCENT, percent))
+
+
+def stretch_blocks(blocks, speed, frame=FRAME_SIZE, tolerance=TOLERANCE):
+    """Blocks of the audio in ``blocks`` played ``speed`` times as fast at
+    the same pitch (WSOLA), holding only a few frames of it at a time."""
+    blocks = (np.asarray(block, dtype=np.float32) for block in blocks)
+    if speed == 1:
+        yield from blocks
+        return
+    hop = frame // 2
+    # Periodic Hann: windows half a frame apart sum to exactly one.
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    fft_size = 1 << int(np.ceil(np.log2(2 * frame + 2 * tolerance)))
+
+    # ``buffer`` holds the input, led by ``tolerance`` zeros, from index
+    # ``base`` on; ``pending`` the overlap-added output not yet emitted.
+    buffer = np.zeros(tolerance, dtype=np.float32)
+    base = 0
+    pending = np.zeros(frame, dtype=np.float32)
+    previous = None
+    index = received = emitted = 0
+    length = None  # known once the input runs out
+    while length is None or emitted < length:
+        nominal = int(round(index * hop * speed)) + tolerance
+        needed = nominal + tolerance + frame
+        if previous is not None:
+            needed = max(needed, previous + hop + frame)
+        if needed > base + len(buffer):
+            block = next(blocks, None) if length is None else None
+            if block is None:
+                length = int(received / speed)
+                # Zeros past the end stand in for the input still needed.
+                block = np.zeros(needed - base - len(buffer), dtype=np.float32)
+            else:
+                received += len(block)
+            buffer = np.concatenate([buffer, block])
+            continue
+
+        if previous is None:
+            position = nominal
+        else:
+            # The frame that would naturally follow the previous one.
+            template = buffer[previous + hop - base:previous + hop + frame - base]
+            region = buffer[nominal - tolerance - base:nominal + tolerance + frame - base]
+            spectrum = np.fft.rfft(region, fft_size) * np.conj(np.fft.rfft(template, fft_size))
+            correlation = np.fft.irfft(spectrum, fft_size)[: 2 * tolerance + 1]
+            position = nominal - tolerance + int(np.argmax(correlation))
+        pending += buffer[position - base:position + frame - base] * window
+        count = hop if length is None else min(hop, length - emitted)
+        yield pending[:count].copy()
+        emitted += count
+        pending = np.concatenate([pending[hop:], np.zeros(hop, dtype=np.float32)])
+        previous = position
+        index += 1
+
+        # Nothing before the next frame's search region or template is read
+        # again; drop it once enough has piled up.
+        keep = min(int(round(index * hop * speed)), position + hop)
+        if keep - base > 4 * frame:
+            buffer = buffer[keep - base:]
+            base = keep
+
+
+def time_stretch(samples, speed, frame=FRAME_SIZE, tolerance=TOLERANCE):
+    """``samples`` played ``speed`` times as fast at the same pitch (WSOLA)."""
+    stretched = stretch_blocks([samples], speed, frame, tolerance)
+    return np.concatenate([np.zeros(0, dtype=np.float32), *stretched])
+
+
+def encode_audio(blocks, sample_rate, destination, bitrate):
+    """Write mono sample ``blocks`` to ``destination`` (a real file), as MP3
+    at ``bitrate`` when ffmpeg is installed; returns the file extension."""
+    pcm = ((np.clip(block, -1, 1) * 32767).astype("<i2").tobytes() for block in blocks)
+    if shutil.which("ffmpeg"):
+        with tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(
+                [
+                    shutil.which("ffmpeg"),
+                    "-nostdin",
+                    "-v",
+                    "error",
+                    "-f",
+                    "s16le",
+                    "-ar",
+                    str(sample_rate),
+                    "-ac",
+                    "1",
+                    "-i",
+                    "-",
+                    "-b:a",
+                    bitrate,
+                    "-f",
+                    "mp3",
+                    "-",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=destination,
+                stderr=errors,
+            )
+            try:
+                for chunk in pcm:
+                    process.stdin.write(chunk)
+            except BrokenPipeError:
+                pass  # ffmpeg gave up; its exit status says why
+            finally:
+                process.stdin.close()
+            if process.wait() != 0:
+                errors.seek(0)
+                message = errors.read().decode(errors="replace")[:200]
+                raise WaveformUnavailable(f"ffmpeg failed: {message}")
+        destination.seek(0, os.SEEK_END)
+        return ".mp3"
+    with wave.open(destination, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(sample_rate)
+        for chunk in pcm:
+            writer.writeframes(chunk)
+    return ".wav"
+
+
+def _rendition_name(track, speed_percent, extension):
+    digest = hashlib.sha256(track.file.name.encode()).hexdigest()[:12]
+    return f"renditions/track/{track.pk}-{digest}/{speed_percent}{extension}"
+
+
+def render(track, speed_percent):
+    """Stretch ``track``'s file to ``speed_percent`` and store it: decoded,
+    stretched and encoded a block at a time, so memory stays flat however
+    long the track is."""
+    storage = Rendition._meta.get_field("file").storage
+    try:
+        with local_copy(track.file) as path, tempfile.TemporaryFile() as encoded:
+            sample_rate, blocks = decode(path, settings.RENDITION_SAMPLE_RATE, DECODE_BLOCK)
+            stretched = stretch_blocks(blocks, speed_percent / 100)
+            extension = encode_audio(stretched, sample_rate, encoded, settings.RENDITION_BITRATE)
+            size = encoded.tell()
+            encoded.seek(0)
+            name = storage.save(_rendition_name(track, speed_percent, extension), File(encoded))
+    except WaveformUnavailable as err:
+        raise RenditionUnavailable(f"This track cannot be time-stretched here: {err}")
+
+    try:
+        with transaction.atomic():
+            rendition = Rendition.objects.create(
+                track=track,
+                speed_percent=speed_percent,
+                source=track.file.name,
+                file=name,
+                size=size,
+                last_used_at=timezone.now(),
+            )
+    except IntegrityError:
+        # Another request rendered the same speed first; keep theirs.
+        delete_later(storage, name)
+        return Rendition.objects.get(
+            track=track, speed_percent=speed_percent, source=track.file.name
+        )
+    evict(keep=rendition.pk)
+    return rendition
+
+
+def evict_least_recent(model, budget, keep=None):
+    """Delete ``model`` rows (a cache of files with ``size`` and
+    ``last_used_at``), least recently used first, until the rest fit in
+    ``budget`` bytes; ``keep`` is never evicted. Returns how many went."""
+    total = model.objects.aggregate(total=Sum("size"))["total"] or 0
+    if total <= budget:
+        return 0
+    evicted = []
+    oldest_first = (
+        model.objects.exclude(pk=keep)
+        .order_by("last_used_at", "id")
+        .values_list("pk", "size")
+        .iterator()
+    )
+    for pk, size in oldest_first:
+        if total <= budget:
+            break
+        evicted.append(pk)
+        total -= size
+    # Files go through the post_delete receivers (deferred, batched).
+    model.objects.filter(pk__in=evicted).delete()
+    return len(evicted)
+
+
+def evict(budget=None, keep=None):
+    """Delete least recently used renditions until the rest fit in
+    ``budget`` bytes (``RENDITION_CACHE_BYTES``); returns how many went."""
+    budget = settings.RENDITION_CACHE_BYTES if budget is None else budget
+    return evict_least_recent(Rendition, budget, keep)
+
+
+def _cached(track, speed_percent):
+    return Rendition.objects.filter(
+        track=track,
+        speed_percent=speed_percent,
+        source=track.file.name,
+    ).first()
+
+
+def _lock_key(track, speed_percent):
+    digest = hashlib.sha256(track.file.name.encode()).hexdigest()[:12]
+    return f"rendition:lock:{track.pk}:{speed_percent}:{digest}"
+
+
+def _wait_for_render(track, speed_percent):
+    deadline = time.monotonic() + settings.RENDITION_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        rendition = _cached(track, speed_percent)
+        if rendition is not None:
+            return rendition
+    raise RenditionPending()
+
+
+def rendition_for(track, speed_percent):
+    """The cached rendition of ``track`` at ``speed_percent``, rendering it
+    on a miss. Only one request renders a given speed; the others wait up
+    to ``RENDITION_LOCK_WAIT`` seconds for it, then get a 503 with
+    Retry-After rather than rendering it again."""
+    rendition = _cached(track, speed_percent)
+    if rendition is None:
+        lock_key = _lock_key(track, speed_percent)
+        if cache.add(lock_key, 1, timeout=settings.RENDITION_LOCK_TIMEOUT):
+            try:
+                return render(track, speed_percent)
+            finally:
+                cache.delete(lock_key)
+        rendition = _wait_for_render(track, speed_percent)
+    now = timezone.now()
+    if now - rendition.last_used_at >= TOUCH_INTERVAL:
+        Rendition.objects.filter(pk=rendition.pk).update(last_used_at=now)
+        rendition.last_used_at = now
+    return rendition
@@ -0,0 +1,153 @@
+"""Resumable, chunked uploads of track and take files through the API.
+
+On a flaky connection a failed 200 MB form POST starts again from zero.
+This tus-style protocol lets the client pick up where the server stopped:
+
+* ``POST /takes/resumable/`` (or ``/tracks/resumable/``) with ``filename``
+  and ``size`` opens an upload. The answer carries its ``Location`` and the
+  ``chunk_size`` to send.
+* ``PUT`` (or ``PATCH``) to that location with an ``Upload-Offset`` header
+  and the raw bytes of one chunk stores it. Every chunk but the last is
+  exactly ``chunk_size`` bytes, at an offset that is a multiple of it.
+  Sending a chunk again rewrites it with the same bytes, so retrying after
+  a lost response is safe. An offset past the stored bytes is a 409.
+* ``HEAD`` answers ``Upload-Offset`` and ``Upload-Length``.
+* ``POST .../complete/`` takes the usual take or track fields and creates
+  the row, as for direct uploads (``session/uploads.py``).
+
+Chunks stream into the default storage without holding the file in memory.
+On R2 each chunk becomes one part of a multipart upload, spooled through a
+small temporary file. On local disk it is written in place into the final
+file. Uploads idle for ``UPLOAD_EXPIRE_HOURS`` answer 410 and are aborted
+by ``manage.py expire_uploads``.
+"""
+
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .storage import is_s3, s3_client
+from .uploads import DirectUploadUnavailable, assemble, recorded_parts, s3_object
+
+
+COPY_BUFFER_SIZE = 64 * 1024
+# Chunks bigger than this spill from memory to a temporary file.
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+
+class UploadOffsetConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Upload-Offset is past the bytes stored so far; HEAD the upload and resume."
+    default_code = "offset_conflict"
+
+
+class UploadExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "This upload has expired; start a new one."
+    default_code = "upload_expired"
+
+
+class ResumableUploadUnavailable(DirectUploadUnavailable):
+    default_detail = "Resumable uploads need local or R2 media storage."
+
+
+def resumable_storage(model):
+    """The storage of ``model.file`` if chunks can be streamed into it."""
+    storage = model._meta.get_field("file").storage
+    if not (is_s3(storage) or isinstance(storage, FileSystemStorage)):
+        raise ResumableUploadUnavailable()
+    return storage
+
+
+def expiry_cutoff():
+    return timezone.now() - timedelta(hours=settings.UPLOAD_EXPIRE_HOURS)
+
+
+def expires_at(upload):
+    return upload.updated_at + timedelta(hours=settings.UPLOAD_EXPIRE_HOURS)
+
+
+def check_not_expired(upload):
+    if upload.updated_at < expiry_cutoff():
+        raise UploadExpired()
+
+
+def parse_offset(value):
+    try:
+        offset = int(value)
+    except (TypeError, ValueError):
+        offset = -1
+    if offset < 0:
+        raise ValidationError({"Upload-Offset": "A non-negative integer header is required."})
+    return offset
+
+
+def copy_stream(stream, destination, length):
+    """Copy exactly ``length`` bytes, or raise a 400 if ``stream`` ends early."""
+    remaining = length
+    while remaining > 0:
+        block = stream.read(min(COPY_BUFFER_SIZE, remaining))
+        if not block:
+            break
+        destination.write(block)
+        remaining -= len(block)
+    if remaining:
+        raise ValidationError({"detail": f"Chunk ended after {length - remaining} of {length} bytes."})
+
+
+def write_chunk(storage, upload, offset, stream, length):
+    """Store ``length`` bytes from ``stream`` at ``offset`` and advance
+    ``upload.offset``. The caller holds a lock on the row."""
+    if offset > upload.offset:
+        raise UploadOffsetConflict()
+    if offset % upload.part_size or offset >= upload.size:
+        raise ValidationError(
+            {"Upload-Offset": f"Must be a multiple of {upload.part_size} below {upload.size}."}
+        )
+    expected = min(upload.part_size, upload.size - offset)
+    if length != expected:
+        raise ValidationError({"detail": f"The chunk at {offset} must be {expected} bytes."})
+
+    part_number = offset // upload.part_size + 1
+    if is_s3(storage):
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spool:
+            copy_stream(stream, spool, length)
+            spool.seek(0)
+            response = s3_client(storage).upload_part(
+                **s3_object(storage, upload),
+                UploadId=upload.upload_id,
+                PartNumber=part_number,
+                Body=spool,
+                ContentLength=length,
+            )
+        etags = list(upload.part_etags)
+        etags.extend([None] * (part_number - len(etags)))
+        etags[part_number - 1] = response["ETag"]
+        upload.part_etags = etags
+    else:
+        path = storage.path(upload.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as handle:
+            handle.seek(offset)
+            copy_stream(stream, handle, length)
+
+    upload.offset = max(upload.offset, offset + length)
+    upload.save(update_fields=["offset", "part_etags", "updated_at"])
+    return upload.offset
+
+
+def finish_resumable(storage, upload):
+    """Assemble a fully received upload; returns the stored size."""
+    if upload.offset != upload.size:
+        raise ValidationError(
+            {"file": f"Upload is incomplete: {upload.offset} of {upload.size} bytes received."}
+        )
+    if not is_s3(storage):
+        return storage.size(upload.key)
+    return assemble(storage, upload, recorded_parts(upload))
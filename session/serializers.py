@@ -1,9 +1,15 @@
+import hashlib
 import os
 
 from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
 from rest_framework import serializers
 
-from .models import Lick, Session, Take, Track
+from . import blobs
+from .fieldsets import select_fields
+from .models import Lick, MediaUpload, Session, Take, Tombstone, Track
+from .upload_handlers import size_limit_message
 
 
 AUDIO_EXTS = {".mp3", ".m4a", ".wav", ".ogg", ".flac", ".aac"}
@@ -12,6 +18,31 @@ PDF_EXTS = {".pdf"}
 TAKE_AUDIO_EXTS = AUDIO_EXTS | {".webm"}
 TAKE_VIDEO_EXTS = {".webm", ".mp4", ".mov", ".m4v"}
 
+# (size limit setting, accepted extensions, label) for direct uploads,
+# checked before the source type or capture mode is known.
+UPLOAD_RULES = {
+    MediaUpload.KIND_TRACK: (
+        "TRACK_FILE_MAX_UPLOAD_SIZE",
+        AUDIO_EXTS | PDF_EXTS | IMAGE_EXTS,
+        "Track files",
+    ),
+    MediaUpload.KIND_TAKE: (
+        "TAKE_FILE_MAX_UPLOAD_SIZE",
+        TAKE_AUDIO_EXTS | TAKE_VIDEO_EXTS,
+        "Recorded files",
+    ),
+}
+
+
+class FileInfo:
+    """Name and size of a file that is not in the request body (a direct
+    upload), shaped like an ``UploadedFile`` for DRF's ``FileField`` and the
+    checks below."""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
 
 def _ext(file_obj) -> str:
     return os.path.splitext(getattr(file_obj, "name", "") or "")[1].lower()
@@ -22,8 +53,69 @@ def _file_size_error(file_obj, limit: int, label: str) -> str | None:
     if size <= limit:
         return None
 
-    max_mb = limit / (1024 * 1024)
-    return f"{label} must be {max_mb:.0f} MB or smaller."
+    return size_limit_message(limit, label)
+
+
+def _file_digest(file_obj) -> dict:
+    """``file_name`` / ``file_size`` / ``file_sha256`` for a newly supplied
+    file. The hash comes from ``HashingUploadHandler``, or is computed here
+    for files that did not pass through it; direct uploads (``FileInfo``)
+    have none."""
+    if not file_obj:
+        return {"file_name": "", "file_size": None, "file_sha256": ""}
+    sha256 = getattr(file_obj, "sha256", None)
+    if sha256 is None and hasattr(file_obj, "chunks"):
+        digest = hashlib.sha256()
+        for chunk in file_obj.chunks():
+            digest.update(chunk)
+        file_obj.seek(0)
+        sha256 = digest.hexdigest()
+    return {
+        "file_name": os.path.basename(file_obj.name or "")[:255],
+        "file_size": file_obj.size,
+        "file_sha256": sha256 or "",
+    }
+
+
+class BlobFileMixin:
+    """Keep a file posted in the request body as a shared, content-addressed
+    blob instead of a file of its own (see ``session/blobs.py``)."""
+
+    def _attach_blob(self, validated_data):
+        if "file" not in validated_data:
+            return
+        file_obj = validated_data["file"]
+        validated_data["blob"] = None
+        if isinstance(file_obj, UploadedFile) and validated_data.get("file_sha256"):
+            storage = self.Meta.model._meta.get_field("file").storage
+            blob = blobs.acquire(storage, file_obj, validated_data["file_sha256"])
+            validated_data["file"] = blob.name
+            validated_data["blob"] = blob
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            self._attach_blob(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        replaced = instance.blob_id if "file" in validated_data else None
+        storage = instance.file.storage
+        with transaction.atomic():
+            self._attach_blob(validated_data)
+            instance = super().update(instance, validated_data)
+            if replaced is not None:
+                blobs.release(storage, replaced)
+        return instance
+
+
+class SelectableFieldsMixin:
+    """Accept ``selection=(fields, expand)`` from ``fieldsets.selection_from_request``
+    and render only those fields."""
+
+    def __init__(self, *args, selection=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if selection is not None:
+            select_fields(self, *selection)
 
 
 class LickSerializer(serializers.ModelSerializer):
@@ -65,7 +157,7 @@ class LickSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class TakeSerializer(serializers.ModelSerializer):
+class TakeSerializer(BlobFileMixin, serializers.ModelSerializer):
     class Meta:
         model = Take
         fields = [
@@ -74,10 +166,20 @@ class TakeSerializer(serializers.ModelSerializer):
             "name",
             "capture_mode",
             "file",
+            "file_name",
+            "file_size",
+            "file_sha256",
+            "created_at",
+            "updated_at",
+        ]
+        read_only_fields = [
+            "id",
+            "file_name",
+            "file_size",
+            "file_sha256",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "created_at", "updated_at"]
 
     def validate(self, attrs):
         if self.instance is not None:
@@ -127,10 +229,11 @@ class TakeSerializer(serializers.ModelSerializer):
         if errors:
             raise serializers.ValidationError(errors)
 
+        attrs.update(_file_digest(file_obj))
         return attrs
 
 
-class TrackSerializer(serializers.ModelSerializer):
+class TrackSerializer(SelectableFieldsMixin, BlobFileMixin, serializers.ModelSerializer):
     licks = LickSerializer(many=True, read_only=True)
     takes = TakeSerializer(many=True, read_only=True)
 
@@ -144,6 +247,9 @@ class TrackSerializer(serializers.ModelSerializer):
             "source_type",
             "youtube_url",
             "file",
+            "file_name",
+            "file_size",
+            "file_sha256",
             "bpm",
             "last_speed",
             "position",
@@ -152,7 +258,16 @@ class TrackSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["id", "licks", "takes", "created_at", "updated_at"]
+        read_only_fields = [
+            "id",
+            "file_name",
+            "file_size",
+            "file_sha256",
+            "licks",
+            "takes",
+            "created_at",
+            "updated_at",
+        ]
 
     def validate(self, attrs):
         source_type = attrs.get("source_type", getattr(self.instance, "source_type", None))
@@ -220,20 +335,53 @@ class TrackSerializer(serializers.ModelSerializer):
         if errors:
             raise serializers.ValidationError(errors)
 
+        if "file" in attrs:
+            attrs.update(_file_digest(attrs["file"]))
         return attrs
 
 
-class SessionSerializer(serializers.ModelSerializer):
+class SessionSerializer(SelectableFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Session
-        fields = ["id", "name", "created_at", "updated_at"]
-        read_only_fields = ["id", "created_at", "updated_at"]
+        fields = ["id", "name", "version", "created_at", "updated_at"]
+        read_only_fields = ["id", "version", "created_at", "updated_at"]
 
 
-class SessionDetailSerializer(serializers.ModelSerializer):
+class SessionDetailSerializer(SelectableFieldsMixin, serializers.ModelSerializer):
     tracks = TrackSerializer(many=True, read_only=True)
 
     class Meta:
         model = Session
-        fields = ["id", "name", "tracks", "created_at", "updated_at"]
-        read_only_fields = ["id", "tracks", "created_at", "updated_at"]
+        fields = ["id", "name", "version", "tracks", "created_at", "updated_at"]
+        read_only_fields = ["id", "version", "tracks", "created_at", "updated_at"]
+
+
+class TombstoneSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="object_id", read_only=True)
+
+    class Meta:
+        model = Tombstone
+        fields = ["kind", "id", "deleted_at"]
+        read_only_fields = fields
+
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    """Start of a direct upload; expects ``kind`` in the context."""
+
+    class Meta:
+        model = MediaUpload
+        fields = ["id", "kind", "status", "filename", "size", "part_size", "created_at"]
+        read_only_fields = ["id", "kind", "status", "part_size", "created_at"]
+        extra_kwargs = {"size": {"min_value": 1}}
+
+    def validate(self, attrs):
+        limit_setting, extensions, label = UPLOAD_RULES[self.context["kind"]]
+        file_info = FileInfo(attrs["filename"], attrs["size"])
+        size_error = _file_size_error(file_info, getattr(settings, limit_setting), label)
+        if size_error:
+            raise serializers.ValidationError({"size": size_error})
+        if _ext(file_info) not in extensions:
+            raise serializers.ValidationError(
+                {"filename": f"Unsupported file type; use one of: {', '.join(sorted(extensions))}."}
+            )
+        return attrs
@@ -1,19 +1,141 @@
-from django.db.models.signals import post_delete
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Take, Track
+from . import blobs
+from .media_deletion import delete_later
+from .models import Clip, Lick, Rendition, Session, Take, Tombstone, Track
+from .waveforms import schedule_peaks
 
 
-def _delete_file(field_file):
-    if field_file:
-        field_file.delete(save=False)
+def _delete_file(instance):
+    if instance.blob_id is not None:
+        blobs.release(instance.file.storage, instance.blob_id)
+    elif instance.file:
+        delete_later(instance.file.storage, instance.file.name)
+    if instance.peaks:
+        delete_later(instance.peaks.storage, instance.peaks.name)
+
+
+def _is_cascade_from(origin, *models):
+    """True when a delete was started on one of ``models`` (instance or
+    queryset); that parent's own receiver already covers its children."""
+    origin_model = getattr(origin, "model", None) or type(origin)
+    return origin_model in models
 
 
 @receiver(post_delete, sender=Track)
 def delete_track_file(sender, instance, **kwargs):
-    _delete_file(instance.file)
+    _delete_file(instance)
 
 
 @receiver(post_delete, sender=Take)
 def delete_take_file(sender, instance, **kwargs):
-    _delete_file(instance.file)
+    _delete_file(instance)
+
+
+@receiver(post_delete, sender=Rendition)
+@receiver(post_delete, sender=Clip)
+def delete_cached_file(sender, instance, **kwargs):
+    delete_later(instance.file.storage, instance.file.name)
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_save, sender=Take)
+def build_waveform_peaks(sender, instance, **kwargs):
+    schedule_peaks(instance)
+
+
+def _bump_session(*session_ids):
+    session_ids = {session_id for session_id in session_ids if session_id is not None}
+    if session_ids:
+        Session.objects.filter(pk__in=session_ids).bump_version()
+
+
+def _moved_from(instance, parent_id):
+    """The parent ``instance`` was loaded under, if a save moved it away
+    (``OwnedMixin`` records it; post_save runs before it is reset)."""
+    previous = getattr(instance, "_loaded_parent_id", None)
+    return previous if previous != parent_id else None
+
+
+@receiver(post_save, sender=Session)
+def bump_session_version(sender, instance, created, **kwargs):
+    if created:
+        return
+    _bump_session(instance.pk)
+    instance.refresh_from_db(fields=["version"])
+
+
+@receiver(post_save, sender=Track)
+@receiver(post_delete, sender=Track)
+def bump_track_session_version(sender, instance, origin=None, **kwargs):
+    if _is_cascade_from(origin, Session):
+        return
+    _bump_session(instance.session_id, _moved_from(instance, instance.session_id))
+
+
+def _track_session_id(sender, instance):
+    if sender.track.is_cached(instance):
+        return instance.track.session_id
+    return (
+        Track.objects.filter(pk=instance.track_id)
+        .values_list("session_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Lick)
+@receiver(post_delete, sender=Lick)
+@receiver(post_save, sender=Take)
+@receiver(post_delete, sender=Take)
+def bump_track_child_session_version(sender, instance, origin=None, **kwargs):
+    if _is_cascade_from(origin, Session, Track):
+        return
+    previous_track_id = _moved_from(instance, instance.track_id)
+    previous_session_id = None
+    if previous_track_id is not None:
+        previous_session_id = (
+            Track.objects.filter(pk=previous_track_id)
+            .values_list("session_id", flat=True)
+            .first()
+        )
+    _bump_session(_track_session_id(sender, instance), previous_session_id)
+
+
+# ─── Tombstones for GET /sync/ ───────────────────────────────────────
+
+
+@receiver(post_delete, sender=Session)
+def record_session_tombstone(sender, instance, origin=None, **kwargs):
+    # A deleted account takes its tombstones with it.
+    if _is_cascade_from(origin, get_user_model()):
+        return
+    Tombstone.objects.create(
+        user_id=instance.user_id,
+        kind=Tombstone.KIND_SESSION,
+        object_id=instance.pk,
+    )
+
+
+@receiver(post_delete, sender=Track)
+def record_track_tombstone(sender, instance, origin=None, **kwargs):
+    if _is_cascade_from(origin, get_user_model(), Session):
+        return
+    Tombstone.objects.create(
+        user_id=instance.owner_id,
+        kind=Tombstone.KIND_TRACK,
+        object_id=instance.pk,
+    )
+
+
+@receiver(post_delete, sender=Lick)
+@receiver(post_delete, sender=Take)
+def record_track_child_tombstone(sender, instance, origin=None, **kwargs):
+    if _is_cascade_from(origin, get_user_model(), Session, Track):
+        return
+    Tombstone.objects.create(
+        user_id=instance.owner_id,
+        kind=sender._meta.model_name,
+        object_id=instance.pk,
+    )
@@ -0,0 +1,211 @@
+"""R2 media storage with stable, cacheable presigned URLs.
+
+A presigned URL normally embeds the signing time, so the same object got a
+new URL on every API call and browsers downloaded it again each time a
+session was reopened. ``R2MediaStorage`` signs as of the start of a fixed
+window of ``R2_SIGNED_URL_WINDOW`` seconds instead: within a window an
+object has one byte-identical URL, valid for at least
+``R2_SIGNED_URL_EXPIRE - R2_SIGNED_URL_WINDOW`` more seconds. The URL also
+asks R2 to answer with ``Cache-Control: private, max-age=<expire>,
+immutable`` (stored names are never overwritten), so repeat visits are
+served from the browser or service-worker cache.
+
+Signing still costs a handful of HMAC-SHA256 rounds per URL, and a
+session-detail response signs hundreds, so URLs are also kept in an LRU
+keyed by object name and window.
+
+Calls with explicit ``parameters``, ``expire`` or ``http_method`` (e.g. the
+take-download redirect) are signed fresh at the current time. Signing time
+and estimated time saved are counted per request (see
+``session.middleware``) and in process totals (``presign_stats``).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import botocore.auth
+from botocore.compat import get_current_datetime
+from botocore.exceptions import NoCredentialsError
+from django.conf import settings
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+
+def is_s3(storage):
+    """True for the S3 (R2) backend, whose objects are reached through the
+    boto3 client rather than the filesystem."""
+    return isinstance(storage, S3Storage)
+
+
+def s3_client(storage):
+    return storage.connection.meta.client
+
+
+def s3_key(storage, name):
+    """The object key ``storage`` keeps the stored ``name`` under."""
+    return storage._normalize_name(clean_name(name))
+
+
+class PresignedURLCache:
+    """Thread-safe LRU of ``key -> (url, stored_at)`` with a TTL."""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            url, stored_at = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return url
+
+    def set(self, key, url):
+        with self._lock:
+            self._entries[key] = (url, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PresignStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.signing_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "signing_ms": round(self.signing_seconds * 1000, 3),
+            "saved_ms": round(self.saved_seconds * 1000, 3),
+        }
+
+
+_totals = PresignStats()
+_totals_lock = threading.Lock()
+request_presign_stats = ContextVar("request_presign_stats", default=None)
+
+
+def presign_stats():
+    """Process-wide presign counters since start-up."""
+    with _totals_lock:
+        return _totals.as_dict()
+
+
+def _record(hit, seconds=0.0):
+    with _totals_lock:
+        if hit:
+            # Count a hit as one signature of average cost avoided.
+            seconds = _totals.signing_seconds / _totals.misses if _totals.misses else 0.0
+        targets = [_totals]
+        current = request_presign_stats.get()
+        if current is not None:
+            targets.append(current)
+        for stats in targets:
+            if hit:
+                stats.hits += 1
+                stats.saved_seconds += seconds
+            else:
+                stats.misses += 1
+                stats.signing_seconds += seconds
+
+
+# ``stable_url`` signs with this signer, which takes the SigV4 timestamp
+# from a context variable instead of the clock. It is chosen per client
+# through the ``choose-signer`` event, only while a presign is pinned, so
+# every other request (and every other client) signs at the current time.
+PINNED_SIGNATURE_VERSION = "s3v4-pinned-query"
+_signing_datetime = ContextVar("signing_datetime", default=None)
+
+
+class PinnedS3SigV4QueryAuth(botocore.auth.S3SigV4QueryAuth):
+    """``S3SigV4QueryAuth`` signing as of ``_signing_datetime``."""
+
+    def add_auth(self, request):
+        if self.credentials is None:
+            raise NoCredentialsError()
+        signed_at = _signing_datetime.get() or get_current_datetime()
+        request.context["timestamp"] = signed_at.strftime(botocore.auth.SIGV4_TIMESTAMP)
+        self._modify_request_before_signing(request)
+        canonical_request = self.canonical_request(request)
+        string_to_sign = self.string_to_sign(request, canonical_request)
+        self._inject_signature_to_request(request, self.signature(string_to_sign, request))
+
+
+botocore.auth.AUTH_TYPE_MAPS.setdefault(PINNED_SIGNATURE_VERSION, PinnedS3SigV4QueryAuth)
+
+
+def _choose_pinned_signer(signature_version, **kwargs):
+    if signature_version == "s3v4-query" and _signing_datetime.get() is not None:
+        return PINNED_SIGNATURE_VERSION
+    return None
+
+
+def signing_window(now=None):
+    """Start (epoch seconds) of the URL-signing window containing ``now``."""
+    window = settings.R2_SIGNED_URL_WINDOW
+    now = time.time() if now is None else now
+    return int(now // window) * window
+
+
+def media_cache_control():
+    return f"private, max-age={settings.R2_SIGNED_URL_EXPIRE}, immutable"
+
+
+class R2MediaStorage(S3Storage):
+    def __init__(self, **settings_overrides):
+        super().__init__(**settings_overrides)
+        ttl = settings.PRESIGNED_URL_CACHE_TTL
+        self.url_cache = (
+            PresignedURLCache(settings.PRESIGNED_URL_CACHE_SIZE, ttl) if ttl > 0 else None
+        )
+
+    def stable_url(self, name, window_start):
+        """The presigned URL for ``name`` signed as of ``window_start``."""
+        # Registered first, so it wins over botocore's per-operation choice;
+        # the unique id makes this a no-op after the first call per client.
+        self.connection.meta.client.meta.events.register_first(
+            "choose-signer.s3", _choose_pinned_signer, unique_id=PINNED_SIGNATURE_VERSION
+        )
+        signed_at = datetime.fromtimestamp(window_start, timezone.utc).replace(tzinfo=None)
+        token = _signing_datetime.set(signed_at)
+        try:
+            return super().url(name, {"ResponseCacheControl": media_cache_control()})
+        finally:
+            _signing_datetime.reset(token)
+
+    def url(self, name, parameters=None, expire=None, http_method=None):
+        if parameters or expire is not None or http_method:
+            return super().url(name, parameters, expire, http_method)
+
+        window_start = signing_window()
+        key = (name, window_start)
+        if self.url_cache is not None:
+            url = self.url_cache.get(key)
+            if url is not None:
+                _record(hit=True)
+                return url
+
+        started = time.perf_counter()
+        url = self.stable_url(name, window_start)
+        _record(hit=False, seconds=time.perf_counter() - started)
+        if self.url_cache is not None:
+            self.url_cache.set(key, url)
+        return url
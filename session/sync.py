@@ -0,0 +1,171 @@
+"""Delta sync for ``GET /api/v1/sync/?since=<cursor>``.
+
+A client keeps a local copy of its sessions, tracks, licks and takes and
+asks only for what changed since its last cursor: rows whose ``updated_at``
+moved, plus tombstones for deletions. An initial sync (no ``since``) returns
+everything.
+
+Each request is a page of at most ``SYNC_PAGE_SIZE`` rows per kind, ordered
+by ``(updated_at, id)``. While ``has_more`` is true the returned cursor pins
+the time window and the keyset position of every kind; once the window is
+drained the cursor restarts from its upper bound, minus
+``SYNC_CURSOR_OVERLAP`` seconds so rows from transactions that committed
+late are not skipped. Rows in that overlap may arrive twice; clients apply
+changes by id and should compare ``updated_at``.
+
+Tombstones older than ``SYNC_TOMBSTONE_RETENTION_DAYS`` are compacted away
+(``manage.py compact_tombstones``), so a cursor older than that is answered
+with 410 and the client must resync from scratch.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import Lick, Session, Take, Tombstone, Track
+from .serializers import (
+    LickSerializer,
+    SessionSerializer,
+    TakeSerializer,
+    TombstoneSerializer,
+    TrackSerializer,
+)
+
+
+class SyncCursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Cursor is older than the deletion history; resync from scratch."
+    default_code = "cursor_expired"
+
+
+def _changed_sessions(user):
+    return Session.objects.filter(user=user), "updated_at", SessionSerializer, {}
+
+
+def _changed_tracks(user):
+    # Tracks are synced flat; their licks and takes come under their own keys.
+    return (
+        Track.objects.filter(owner=user),
+        "updated_at",
+        TrackSerializer,
+        {"selection": (None, {})},
+    )
+
+
+def _changed_licks(user):
+    return Lick.objects.filter(owner=user), "updated_at", LickSerializer, {}
+
+
+def _changed_takes(user):
+    return Take.objects.filter(owner=user), "updated_at", TakeSerializer, {}
+
+
+def _deleted(user):
+    return Tombstone.objects.filter(user=user), "deleted_at", TombstoneSerializer, {}
+
+
+KINDS = {
+    "sessions": _changed_sessions,
+    "tracks": _changed_tracks,
+    "licks": _changed_licks,
+    "takes": _changed_takes,
+    "deleted": _deleted,
+}
+
+
+def _timestamp(value):
+    moment = datetime.fromisoformat(value)
+    if timezone.is_naive(moment):
+        raise ValueError
+    return moment
+
+
+def encode_cursor(state):
+    raw = json.dumps(state, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(encoded):
+    """``{"since", "until"?, "after"?}`` with datetimes, or a 400."""
+    try:
+        padded = encoded + "=" * (-len(encoded) % 4)
+        raw = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        # ``since`` is null only while paging through an initial sync.
+        state = {"since": None if raw["since"] is None else _timestamp(raw["since"])}
+        if "until" in raw:
+            state["until"] = _timestamp(raw["until"])
+            state["after"] = {
+                kind: (_timestamp(moment), int(pk))
+                for kind, (moment, pk) in raw.get("after", {}).items()
+                if kind in KINDS
+            }
+        return state
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError({"since": "Invalid cursor."})
+
+
+def collect_changes(user, encoded_cursor=None, context=None):
+    """One page of changes for ``user`` after ``encoded_cursor``."""
+    now = timezone.now()
+    state = decode_cursor(encoded_cursor) if encoded_cursor else {"since": None}
+    since = state["since"]
+
+    retention = timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    if since is not None and since < now - retention:
+        raise SyncCursorExpired()
+
+    until = state.get("until", now)
+    after = dict(state.get("after", {}))
+    limit = settings.SYNC_PAGE_SIZE
+
+    payload = {}
+    has_more = False
+    for kind, source in KINDS.items():
+        if kind == "deleted" and since is None:
+            # Nothing to delete from a copy that is being built from scratch.
+            payload[kind] = []
+            continue
+        queryset, stamp, serializer_class, serializer_kwargs = source(user)
+        queryset = queryset.filter(**{f"{stamp}__lte": until})
+        if since is not None:
+            queryset = queryset.filter(**{f"{stamp}__gt": since})
+        if kind in after:
+            moment, pk = after[kind]
+            queryset = queryset.filter(
+                Q(**{f"{stamp}__gt": moment}) | Q(**{stamp: moment, "id__gt": pk})
+            )
+
+        rows = list(queryset.order_by(stamp, "id")[: limit + 1])
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        if rows:
+            after[kind] = (getattr(rows[-1], stamp), rows[-1].pk)
+        payload[kind] = serializer_class(
+            rows,
+            many=True,
+            context=context,
+            **serializer_kwargs,
+        ).data
+
+    if has_more:
+        next_state = {
+            "since": None if since is None else since.isoformat(),
+            "until": until.isoformat(),
+            "after": {
+                kind: [moment.isoformat(), pk] for kind, (moment, pk) in after.items()
+            },
+        }
+    else:
+        overlap = timedelta(seconds=settings.SYNC_CURSOR_OVERLAP)
+        next_state = {"since": (until - overlap).isoformat()}
+
+    payload["cursor"] = encode_cursor(next_state)
+    payload["has_more"] = has_more
+    return payload
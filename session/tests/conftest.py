@@ -0,0 +1,42 @@
+import pytest
+from botocore.stub import Stubber
+from django.core.cache import cache
+
+from django_project.storage import r2_storage_options
+from session.models import Take, Track
+from session.storage import R2MediaStorage
+
+
+R2_ENV = {
+    "R2_BUCKET": "theshed-media",
+    "R2_ACCESS_KEY_ID": "key-id",
+    "R2_SECRET_ACCESS_KEY": "secret",
+    "R2_ENDPOINT_URL": "https://abc123.r2.cloudflarestorage.com",
+}
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    # Row ids are reused across rolled-back tests, so cached session
+    # documents from one test must not leak into the next.
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def r2_storage():
+    return R2MediaStorage(**r2_storage_options(R2_ENV))
+
+
+@pytest.fixture
+def r2(monkeypatch, r2_storage):
+    """Track and take files on an R2 storage whose client is stubbed; queue
+    the expected S3 calls on the returned ``Stubber``."""
+    storage = r2_storage
+    for model in (Take, Track):
+        monkeypatch.setattr(model._meta.get_field("file"), "storage", storage)
+    stubber = Stubber(storage.connection.meta.client)
+    with stubber:
+        yield stubber
+    stubber.assert_no_pending_responses()
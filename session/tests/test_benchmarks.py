@@ -0,0 +1,28 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from session.models import Session
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_session_queries_benchmark_reports_and_rolls_back(capsys):
+    call_command(
+        "benchmark_api",
+        "session-queries",
+        "--sessions",
+        "3",
+        "--tracks",
+        "2",
+        "--repeat",
+        "1",
+    )
+
+    output = capsys.readouterr().out
+    assert "GET /sessions/ " in output
+    assert "queries=1 " in output
+    assert "GET /sessions/{id}/" in output
+    assert not Session.objects.exists()
+    assert not get_user_model().objects.filter(username="benchmark-api-user").exists()
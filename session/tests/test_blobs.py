@@ -0,0 +1,103 @@
+import hashlib
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from session.media_deletion import media_deleter
+from session.models import MediaBlob, Session, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+CHART = b"%PDF-1.4 the same chart in every session"
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+
+def _post_chart(client, session, filename="chart.pdf", body=CHART):
+    response = client.post(
+        reverse("track-list"),
+        {
+            "session": session.id,
+            "name": "Chart",
+            "source_type": "pdf",
+            "file": SimpleUploadedFile(filename, body, content_type="application/pdf"),
+        },
+        format="multipart",
+    )
+    assert response.status_code == 201, response.json()
+    return Track.objects.get(pk=response.data["id"])
+
+
+def test_duplicate_uploads_share_one_stored_file(alice, client, settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    first = _post_chart(client, Session.objects.create(user=alice, name="Monday"))
+
+    storage = Track._meta.get_field("file").storage
+    saves = []
+    monkeypatch.setattr(storage, "save", lambda *args, **kwargs: saves.append(args))
+    second = _post_chart(client, Session.objects.create(user=alice, name="Tuesday"), "copy.pdf")
+
+    sha256 = hashlib.sha256(CHART).hexdigest()
+    assert saves == []
+    assert first.file.name == second.file.name == f"blobs/{sha256[:2]}/{sha256}.pdf"
+    blob = MediaBlob.objects.get()
+    assert (blob.sha256, blob.size, blob.ref_count) == (sha256, len(CHART), 2)
+    assert first.blob_id == second.blob_id == blob.pk
+
+
+def test_blob_is_deleted_with_its_last_reference(
+    alice, client, settings, tmp_path, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = tmp_path
+    first = _post_chart(client, Session.objects.create(user=alice, name="Monday"))
+    second = _post_chart(client, Session.objects.create(user=alice, name="Tuesday"))
+    path = tmp_path / first.file.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.session.delete()
+    media_deleter.join()
+    assert path.exists()
+    assert MediaBlob.objects.get().ref_count == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    media_deleter.join()
+    assert not path.exists()
+    assert not MediaBlob.objects.exists()
+
+
+def test_replacing_a_track_file_releases_the_old_blob(
+    alice, client, settings, tmp_path, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_ROOT = tmp_path
+    track = _post_chart(client, Session.objects.create(user=alice, name="Monday"))
+    old_path = tmp_path / track.file.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.patch(
+            reverse("track-detail", args=[track.pk]),
+            {"file": SimpleUploadedFile("v2.pdf", b"%PDF-1.4 revised", content_type="application/pdf")},
+            format="multipart",
+        )
+    media_deleter.join()
+
+    assert response.status_code == 200, response.json()
+    track.refresh_from_db()
+    assert not old_path.exists()
+    assert MediaBlob.objects.get().pk == track.blob_id
+    assert (tmp_path / track.file.name).read_bytes() == b"%PDF-1.4 revised"
@@ -0,0 +1,208 @@
+import io
+import os
+import wave
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from session import clips, waveforms
+from session.media_deletion import media_deleter
+from session.models import Clip, Lick, Session, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+RATE = 8000
+SECONDS = 2
+
+
+def _ramp_wav():
+    """Two seconds rising from -0.5 to 0.5, so a sample's value gives its
+    position."""
+    ramp = np.linspace(-0.5, 0.5, RATE * SECONDS, endpoint=False)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(2)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(np.repeat((ramp * 32767).astype("<i2"), 2).tobytes())
+    return buffer.getvalue()
+
+
+def _position(sample):
+    return (sample / 32767 + 0.5) * SECONDS
+
+
+@pytest.fixture(autouse=True)
+def clip_settings(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TAKE_FILE_DELIVERY = "proxy"
+    # Decode and encode with the wave module whether or not ffmpeg is installed.
+    monkeypatch.setattr(waveforms.shutil, "which", lambda name: None)
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+
+@pytest.fixture
+def lick(alice):
+    track = Track(
+        session=Session.objects.create(user=alice, name="Kevin Bond"),
+        name="Manifest",
+        source_type=Track.SOURCE_MP3,
+    )
+    track.file.save("manifest.wav", ContentFile(_ramp_wav()), save=False)
+    track.save()
+    return Lick.objects.create(track=track, name="Turnaround", start_seconds=0.5, end_seconds=1.0)
+
+
+def _clip(client, lick, **params):
+    return client.get(reverse("lick-clip", args=[lick.pk]), params)
+
+
+def _frames(response):
+    with wave.open(io.BytesIO(b"".join(response.streaming_content)), "rb") as reader:
+        return reader.getnframes(), np.frombuffer(reader.readframes(1), dtype="<i2")[0]
+
+
+def test_clip_holds_only_the_segment_and_pre_roll(client, lick):
+    response = _clip(client, lick, pre_roll=0.25)
+
+    assert response.status_code == 200
+    assert response["Accept-Ranges"] == "bytes"
+    frames, first = _frames(response)
+    assert frames == int(0.75 * RATE)
+    assert _position(first) == pytest.approx(0.25, abs=0.001)
+    clip = Clip.objects.get()
+    assert (clip.start_ms, clip.end_ms, clip.pre_roll_ms) == (500, 1000, 250)
+
+    again = _clip(client, lick, pre_roll=0.25)
+
+    assert again.status_code == 200
+    assert list(Clip.objects.all()) == [clip]
+    assert os.listdir(os.path.dirname(clip.file.path)) == [os.path.basename(clip.file.name)]
+
+
+def test_clip_is_encoded_block_by_block(client, lick, monkeypatch):
+    monkeypatch.setattr(clips, "DECODE_BLOCK", 1000)
+    sizes = []
+    encode_audio = clips.encode_audio
+
+    def recording(blocks, *args):
+        return encode_audio((sizes.append(len(block)) or block for block in blocks), *args)
+
+    monkeypatch.setattr(clips, "encode_audio", recording)
+
+    frames, _ = _frames(_clip(client, lick))
+
+    assert frames == int(0.5 * RATE)
+    assert max(sizes) <= 1000 and sum(sizes) == frames
+
+
+def test_pre_roll_stops_at_the_start_of_the_track(client, lick):
+    lick.start_seconds = 0.1
+    lick.save()
+
+    frames, first = _frames(_clip(client, lick, pre_roll=1))
+
+    assert frames == int(1.0 * RATE)
+    assert _position(first) == pytest.approx(0, abs=0.001)
+
+
+def test_switching_pre_roll_back_and_forth_cuts_each_clip_once(client, lick, monkeypatch):
+    cuts = []
+    cut_clip = clips.cut_clip
+    monkeypatch.setattr(clips, "cut_clip", lambda *args: cuts.append(args) or cut_clip(*args))
+
+    for pre_roll in (0, 0.25, 0, 0.25):
+        assert _clip(client, lick, pre_roll=pre_roll).status_code == 200
+
+    assert len(cuts) == 2
+    assert sorted(Clip.objects.values_list("pre_roll_ms", flat=True)) == [0, 250]
+
+
+def test_licks_over_the_same_segment_share_a_clip(client, lick, monkeypatch):
+    twin = Lick.objects.create(
+        track=lick.track, name="Again", start_seconds=0.5, end_seconds=1.0
+    )
+    cuts = []
+    cut_clip = clips.cut_clip
+    monkeypatch.setattr(clips, "cut_clip", lambda *args: cuts.append(args) or cut_clip(*args))
+
+    _clip(client, lick)
+    _clip(client, twin)
+
+    assert len(cuts) == 1
+    assert Clip.objects.count() == 1
+
+
+def test_moving_the_lick_serves_its_new_segment(client, lick):
+    _clip(client, lick)
+
+    response = client.patch(
+        reverse("lick-detail", args=[lick.pk]), {"end_seconds": 1.5}, format="json"
+    )
+
+    assert response.status_code == 200
+    frames, first = _frames(_clip(client, lick))
+    assert frames == RATE
+    assert _position(first) == pytest.approx(0.5, abs=0.001)
+    assert sorted(Clip.objects.values_list("end_ms", flat=True)) == [1000, 1500]
+
+
+def test_only_a_few_pre_rolls_are_kept_per_segment(
+    client, lick, settings, django_capture_on_commit_callbacks
+):
+    settings.LICK_CLIP_VARIANTS = 2
+    _clip(client, lick, pre_roll=0)
+    _clip(client, lick, pre_roll=0.1)
+    Clip.objects.filter(pre_roll_ms=0).update(last_used_at=timezone.now() - timedelta(hours=1))
+    dropped = Clip.objects.get(pre_roll_ms=0).file.path
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _clip(client, lick, pre_roll=0.2)
+    media_deleter.join()
+
+    assert sorted(Clip.objects.values_list("pre_roll_ms", flat=True)) == [100, 200]
+    assert not os.path.exists(dropped)
+
+
+def test_least_recently_used_clips_are_evicted(
+    client, lick, settings, django_capture_on_commit_callbacks
+):
+    _clip(client, lick)
+    settings.LICK_CLIP_CACHE_BYTES = Clip.objects.get().size
+    evicted = Clip.objects.get().file.path
+    lick.end_seconds = 1.5
+    lick.save()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _clip(client, lick)
+    media_deleter.join()
+
+    assert list(Clip.objects.values_list("end_ms", flat=True)) == [1500]
+    assert not os.path.exists(evicted)
+
+
+def test_clip_requests_are_checked(client, lick):
+    assert _clip(client, lick, pre_roll=60).status_code == 400
+    assert _clip(client, lick, pre_roll="soon").status_code == 400
+
+    Track.objects.filter(pk=lick.track_id).update(source_type=Track.SOURCE_YOUTUBE, file="")
+
+    assert _clip(client, lick).status_code == 404
@@ -0,0 +1,140 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from session.fieldsets import parse_paths, selection_key
+from session.models import Lick, Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+
+@pytest.fixture
+def practice_session(alice):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        file="tracks/praise.mp3",
+        position=1024,
+    )
+    Lick.objects.create(track=track, name="Intro", start_seconds=0, end_seconds=1)
+    Take.objects.create(
+        track=track,
+        name="Take",
+        capture_mode="audio",
+        file="takes/take.webm",
+    )
+    return practice_session
+
+
+def _tables(captured):
+    return [query["sql"] for query in captured.captured_queries]
+
+
+def test_parse_paths_and_selection_key_are_canonical():
+    assert parse_paths("id, tracks.name,tracks.licks") == {
+        "id": {},
+        "tracks": {"name": {}, "licks": {}},
+    }
+    assert selection_key((parse_paths("b,a"), parse_paths(""))) == "fields=a,b&expand="
+    assert selection_key((None, parse_paths("tracks"))) == "expand=tracks"
+
+
+def test_track_list_without_expand_skips_licks_and_takes(client, practice_session):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(reverse("track-list"), {"fields": "id,name", "expand": ""})
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": practice_session.tracks.get().id, "name": "Praise on Demand"}]
+    assert not any("session_lick" in sql or "session_take" in sql for sql in _tables(captured))
+
+
+def test_track_list_expands_only_requested_collections(client, practice_session):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(
+            reverse("track-list"),
+            {"expand": "licks", "fields": "id,licks.name"},
+        )
+
+    assert response.status_code == 200
+    assert response.json()[0] == {"id": practice_session.tracks.get().id, "licks": [{"name": "Intro"}]}
+    sql = _tables(captured)
+    assert not any("session_take" in query for query in sql)
+    lick_query = next(query for query in sql if 'FROM "session_lick"' in query)
+    assert "start_seconds" not in lick_query
+
+
+def test_session_detail_sparse_fields_and_expand(client, practice_session):
+    url = reverse("session-detail", args=[practice_session.id])
+
+    response = client.get(url, {"expand": "tracks", "fields": "name,tracks.name"})
+    assert response.json() == {"name": "Kevin Bond", "tracks": [{"name": "Praise on Demand"}]}
+
+    response = client.get(url, {"expand": "tracks.takes"})
+    track = response.json()["tracks"][0]
+    assert "takes" in track and "licks" not in track
+    assert track["takes"][0]["file"].endswith("takes/take.webm")
+
+    # The cached full document is a separate entry.
+    response = client.get(url)
+    assert {"licks", "takes"} <= set(response.json()["tracks"][0])
+
+
+def test_session_detail_without_tracks_issues_no_track_queries(client, practice_session):
+    with CaptureQueriesContext(connection) as captured:
+        response = client.get(
+            reverse("session-detail", args=[practice_session.id]),
+            {"expand": ""},
+        )
+
+    assert response.status_code == 200
+    assert "tracks" not in response.json()
+    assert not any("session_track" in sql for sql in _tables(captured))
+
+
+def test_unknown_fields_are_rejected(client, practice_session):
+    url = reverse("session-detail", args=[practice_session.id])
+
+    response = client.get(url, {"fields": "name,tracks.nope"})
+    assert response.status_code == 400
+    assert response.json() == {"fields": ["Unknown field: tracks.nope."]}
+
+    response = client.get(url, {"expand": "name"})
+    assert response.status_code == 400
+    assert response.json() == {"expand": ["Cannot expand: name."]}
+
+
+def test_writes_ignore_field_selection(client, practice_session):
+    track = Track.objects.create(
+        session=practice_session,
+        name="Video",
+        source_type="youtube",
+        youtube_url="https://youtube.com/watch?v=x",
+    )
+
+    response = client.patch(
+        reverse("track-detail", args=[track.id]) + "?fields=id",
+        {"name": "Renamed"},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Renamed"
@@ -0,0 +1,168 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from session.models import Lick, Session, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+
+@pytest.fixture
+def track(alice):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    return Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=1024,
+    )
+
+
+def _url(track):
+    return reverse("track-import-licks", args=[track.pk])
+
+
+def test_import_audacity_labels_appends_after_existing_licks(client, track):
+    Lick.objects.create(track=track, name="Old", start_seconds=0, end_seconds=1, position=1024)
+    labels = (
+        "1.500000\t3.250000\tIntro\n"
+        "\\\t200.0\t400.0\n"
+        "4.000000\t6.000000\t\n"
+    )
+
+    response = client.post(
+        _url(track),
+        {"file": SimpleUploadedFile("labels.txt", labels.encode())},
+        format="multipart",
+    )
+
+    assert response.status_code == 201
+    assert [lick["name"] for lick in response.data] == ["Intro", "Lick 2"]
+    assert list(track.licks.values_list("name", "position")) == [
+        ("Old", 1024),
+        ("Intro", 2048),
+        ("Lick 2", 3072),
+    ]
+
+
+def test_import_csv_with_aliased_columns(client, track):
+    csv_text = "Label,Start,End,Speed\nVerse,10,12.5,0.75\n"
+
+    response = client.post(
+        _url(track),
+        {"file": SimpleUploadedFile("markers.csv", csv_text.encode())},
+        format="multipart",
+    )
+
+    assert response.status_code == 201
+    lick = track.licks.get()
+    assert (lick.name, lick.start_seconds, lick.end_seconds, lick.last_speed) == (
+        "Verse",
+        10,
+        12.5,
+        0.75,
+    )
+
+
+def test_import_json_is_one_insert_and_bumps_version(client, track):
+    version = Session.objects.get().version
+    licks = [
+        {"name": f"L{index}", "start_seconds": index, "end_seconds": index + 1}
+        for index in range(50)
+    ]
+
+    with CaptureQueriesContext(connection) as captured:
+        response = client.post(_url(track), {"licks": licks}, format="json")
+
+    assert response.status_code == 201
+    assert track.licks.count() == 50
+    inserts = [q for q in captured.captured_queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 1
+    assert Session.objects.get().version == version + 1
+
+
+def test_import_reports_every_bad_row_and_creates_nothing(client, track):
+    response = client.post(
+        _url(track),
+        {
+            "duration_seconds": 30,
+            "licks": [
+                {"start_seconds": 1, "end_seconds": 2},
+                {"start_seconds": 5, "end_seconds": 4},
+                {"start_seconds": "x", "end_seconds": 2},
+                {"start_seconds": 20, "end_seconds": 40},
+                {"start_seconds": 1, "end_seconds": 2, "last_speed": 3},
+            ],
+        },
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert set(response.data["licks"]) == {2, 3, 4, 5}
+    assert "end_seconds" in response.data["licks"][2]
+    assert "start_seconds" in response.data["licks"][3]
+    assert "end_seconds" in response.data["licks"][4]
+    assert "last_speed" in response.data["licks"][5]
+    assert not Lick.objects.exists()
+
+
+def test_import_rejects_non_audio_tracks_and_unknown_files(client, track):
+    track.source_type = "pdf"
+    track.save()
+    response = client.post(
+        _url(track),
+        {"licks": [{"start_seconds": 0, "end_seconds": 1}]},
+        format="json",
+    )
+    assert response.status_code == 400
+    assert "track" in response.data
+
+    response = client.post(
+        _url(track),
+        {"file": SimpleUploadedFile("markers.xlsx", b"..")},
+        format="multipart",
+    )
+    assert response.status_code == 400
+    assert "file" in response.data
+
+
+def test_import_enforces_row_limit(client, track, settings):
+    settings.LICK_IMPORT_MAX_ROWS = 2
+    licks = [{"start_seconds": 0, "end_seconds": 1}] * 3
+
+    response = client.post(_url(track), {"licks": licks}, format="json")
+
+    assert response.status_code == 400
+    assert not Lick.objects.exists()
+
+
+def test_import_on_other_users_track_is_404(track):
+    mallory = User.objects.create_user(username="mallory", password="pw")
+    client = APIClient()
+    client.force_authenticate(mallory)
+
+    response = client.post(
+        _url(track),
+        {"licks": [{"start_seconds": 0, "end_seconds": 1}]},
+        format="json",
+    )
+
+    assert response.status_code == 404
@@ -0,0 +1,182 @@
+import pytest
+from botocore.stub import ANY
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from session.models import MediaUpload, Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+CHUNKS = [b"abc", b"de", b"fghi", b"j"]  # 10 bytes sent as the recorder produces them
+
+
+@pytest.fixture
+def track(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.LIVE_UPLOAD_STAGING_DIR = tmp_path / "staging"
+    settings.DIRECT_UPLOAD_PART_SIZE = 4
+    alice = User.objects.create_user(username="alice", password="pw")
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    return Track.objects.create(
+        session=practice_session,
+        name="Manifest",
+        source_type="youtube",
+        youtube_url="https://youtu.be/example",
+    )
+
+
+@pytest.fixture
+def client(track):
+    client = APIClient()
+    client.force_authenticate(track.owner)
+    return client
+
+
+def _open(client, track):
+    response = client.post(
+        reverse("take-start-live"),
+        {"track": track.id, "name": "Recording…", "capture_mode": "video", "filename": "take.webm"},
+        format="json",
+    )
+    assert response.status_code == 201
+    return response
+
+
+def _append(client, url, offset, chunk):
+    return client.generic(
+        "PATCH",
+        url,
+        chunk,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+def _record(client, url):
+    offset = 0
+    for chunk in CHUNKS:
+        response = _append(client, url, offset, chunk)
+        assert response.status_code == 204
+        offset += len(chunk)
+        assert response["Upload-Offset"] == str(offset)
+    return offset
+
+
+def test_live_take_on_local_disk(client, track):
+    opened = _open(client, track)
+    url = opened["Location"]
+    assert "Upload-Length" not in opened
+
+    _record(client, url)
+    # A retried chunk is acknowledged, a gap is refused.
+    assert _append(client, url, 3, b"de")["Upload-Offset"] == "10"
+    assert _append(client, url, 12, b"kl").status_code == 409
+    assert client.head(url)["Upload-Offset"] == "10"
+
+    response = client.post(
+        reverse("take-finalize-live", kwargs={"upload_pk": opened.data["id"]}),
+        {"name": "Solo take"},
+        format="json",
+    )
+
+    assert response.status_code == 201
+    take = Take.objects.get()
+    assert (take.name, take.capture_mode) == ("Solo take", "video")
+    assert take.file.read() == b"".join(CHUNKS)
+
+
+def test_live_take_streams_full_parts_to_r2(client, track, r2, settings):
+    r2.add_response(
+        "create_multipart_upload",
+        {"UploadId": "upload-1"},
+        {"Bucket": "theshed-media", "Key": ANY, "ContentType": "video/webm"},
+    )
+    opened = _open(client, track)
+    upload = MediaUpload.objects.get()
+    target = {"Bucket": "theshed-media", "Key": upload.key}
+    for number in (1, 2, 3):
+        r2.add_response(
+            "upload_part",
+            {"ETag": f'"etag-{number}"'},
+            {**target, "UploadId": "upload-1", "PartNumber": number, "Body": ANY, "ContentLength": ANY},
+        )
+
+    _record(client, opened["Location"])
+    # Two full 4-byte parts went out while recording; two bytes are staged.
+    upload.refresh_from_db()
+    assert upload.part_etags == ['"etag-1"', '"etag-2"']
+    staging = settings.LIVE_UPLOAD_STAGING_DIR / f"{upload.pk}.part"
+    assert staging.read_bytes() == b"ij"
+
+    r2.add_response(
+        "complete_multipart_upload",
+        {},
+        {
+            **target,
+            "UploadId": "upload-1",
+            "MultipartUpload": {
+                "Parts": [{"PartNumber": n, "ETag": f'"etag-{n}"'} for n in (1, 2, 3)]
+            },
+        },
+    )
+    r2.add_response("head_object", {"ContentLength": 10}, target)
+    response = client.post(
+        reverse("take-finalize-live", kwargs={"upload_pk": upload.pk}),
+        format="json",
+    )
+
+    assert response.status_code == 201
+    assert Take.objects.get().file.name == upload.key
+    assert not staging.exists()
+
+
+def test_lost_staging_file_is_refused_not_zero_filled(client, track, r2, settings):
+    r2.add_response(
+        "create_multipart_upload",
+        {"UploadId": "upload-1"},
+        {"Bucket": "theshed-media", "Key": ANY, "ContentType": "video/webm"},
+    )
+    opened = _open(client, track)
+    upload = MediaUpload.objects.get()
+    staging = settings.LIVE_UPLOAD_STAGING_DIR / f"{upload.pk}.part"
+    assert _append(client, opened["Location"], 0, b"abc").status_code == 204
+
+    # The next chunk lands on an instance without the staged bytes.
+    staging.unlink()
+    response = _append(client, opened["Location"], 3, b"d")
+
+    assert response.status_code == 410
+    assert not staging.exists()
+    finalized = client.post(
+        reverse("take-finalize-live", kwargs={"upload_pk": upload.pk}),
+        format="json",
+    )
+    assert finalized.status_code == 410
+    assert not Take.objects.exists()
+
+
+def test_lost_local_file_is_refused(client, track, settings):
+    opened = _open(client, track)
+    assert _append(client, opened["Location"], 0, b"abc").status_code == 204
+    stored = settings.MEDIA_ROOT / MediaUpload.objects.get().key
+    stored.unlink()
+
+    assert _append(client, opened["Location"], 3, b"d").status_code == 410
+    assert not stored.exists()
+
+
+def test_live_take_is_capped_and_checked_up_front(client, track, settings):
+    settings.TAKE_FILE_MAX_UPLOAD_SIZE = 4
+    bad = client.post(
+        reverse("take-start-live"),
+        {"track": track.id, "name": "Take", "capture_mode": "video", "filename": "take.mp3"},
+        format="json",
+    )
+    assert bad.status_code == 400
+    assert "file" in bad.data
+
+    url = _open(client, track)["Location"]
+    assert _append(client, url, 0, b"abc").status_code == 204
+    assert _append(client, url, 3, b"de").status_code == 413
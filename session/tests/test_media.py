@@ -0,0 +1,267 @@
+import io
+from datetime import datetime, timezone
+
+import botocore.auth
+import botocore.compat
+import pytest
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from django_project.storage import r2_storage_options
+from session.media import parse_ranges, serve_media
+from session.middleware import PresignTimingMiddleware
+from session.models import Session, Take, Track
+from session.storage import PresignedURLCache, R2MediaStorage, signing_window
+from session.tests.conftest import R2_ENV
+
+
+User = get_user_model()
+PAYLOAD = bytes(range(256)) * 4  # 1024 bytes
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", [(0, 9)]),
+        ("bytes=1000-", [(1000, 1023)]),
+        ("bytes=-24", [(1000, 1023)]),
+        ("bytes=0-2000", [(0, 1023)]),
+        ("bytes=0-9, 5-19, 100-109", [(0, 19), (100, 109)]),
+        ("bytes=2000-3000", []),
+        ("bytes=9-0", None),
+        ("items=0-9", None),
+        ("bytes=a-b", None),
+        ("bytes=" + ",".join(["0-1"] * 17), None),
+    ],
+)
+def test_parse_ranges(header, expected):
+    assert parse_ranges(header, len(PAYLOAD)) == expected
+
+
+@pytest.fixture
+def take_client(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    alice = User.objects.create_user(username="alice", password="pw")
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    track = Track.objects.create(
+        session=practice_session,
+        name="Manifest",
+        source_type="youtube",
+        youtube_url="https://youtu.be/example",
+    )
+    take = Take.objects.create(
+        track=track,
+        name="Video take",
+        capture_mode="video",
+        file=SimpleUploadedFile("take.webm", PAYLOAD, content_type="video/webm"),
+    )
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client, reverse("take-file", args=[take.id])
+
+
+def _body(response):
+    return b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+def test_full_download_advertises_ranges_and_validators(take_client):
+    client, url = take_client
+
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response["Accept-Ranges"] == "bytes"
+    assert response["Content-Length"] == str(len(PAYLOAD))
+    assert response["ETag"] and response["Last-Modified"]
+    assert _body(response) == PAYLOAD
+
+
+@pytest.mark.django_db
+def test_single_range_is_partial_content(take_client):
+    client, url = take_client
+
+    response = client.get(url, HTTP_RANGE="bytes=100-199")
+
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 100-199/1024"
+    assert response["Content-Length"] == "100"
+    assert _body(response) == PAYLOAD[100:200]
+
+
+@pytest.mark.django_db
+def test_multiple_ranges_are_multipart(take_client):
+    client, url = take_client
+
+    response = client.get(url, HTTP_RANGE="bytes=0-3,-4")
+
+    assert response.status_code == 206
+    content_type = response["Content-Type"]
+    assert content_type.startswith("multipart/byteranges; boundary=")
+    boundary = content_type.split("boundary=")[1]
+    body = _body(response)
+    assert len(body) == int(response["Content-Length"])
+    assert body.endswith(f"--{boundary}--\r\n".encode())
+    assert b"Content-Range: bytes 0-3/1024\r\n\r\n" + PAYLOAD[:4] in body
+    assert b"Content-Range: bytes 1020-1023/1024\r\n\r\n" + PAYLOAD[-4:] in body
+
+
+@pytest.mark.django_db
+def test_unsatisfiable_range_is_416(take_client):
+    client, url = take_client
+
+    response = client.get(url, HTTP_RANGE="bytes=5000-")
+
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */1024"
+
+
+@pytest.mark.django_db
+def test_conditional_requests(take_client):
+    client, url = take_client
+    first = client.get(url)
+    etag, last_modified = first["ETag"], first["Last-Modified"]
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    matching = client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+    assert matching.status_code == 206
+    stale = client.get(url, HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"stale"')
+    assert stale.status_code == 200
+    assert _body(stale) == PAYLOAD
+
+
+@pytest.mark.django_db
+def test_r2_takes_redirect_to_short_lived_presigned_url(take_client, r2_storage, settings, monkeypatch):
+    client, url = take_client
+    monkeypatch.setattr(Take._meta.get_field("file"), "storage", r2_storage)
+    settings.TAKE_FILE_REDIRECT_EXPIRE = 120
+
+    response = client.get(url)
+
+    assert response.status_code == 302
+    location = response["Location"]
+    assert location.startswith("https://abc123.r2.cloudflarestorage.com/theshed-media/takes/")
+    assert "X-Amz-Expires=120" in location
+    assert "response-content-type=video%2Fwebm" in location
+    assert response["Cache-Control"] == "private, no-store"
+
+
+@pytest.mark.django_db
+def test_proxy_mode_and_local_media_stream_through_the_app(take_client, settings):
+    client, url = take_client
+
+    # Local storage cannot presign, so "redirect" still proxies.
+    assert client.get(url).status_code == 200
+    settings.TAKE_FILE_DELIVERY = "proxy"
+    assert client.get(url).status_code == 200
+
+
+def test_s3_ranges_use_ranged_get_object(r2_storage):
+    storage = r2_storage
+    field_file = Take(file="takes/take.webm").file
+    field_file.storage = storage
+    etag = '"abc123"'
+
+    stubber = Stubber(storage.connection.meta.client)
+    stubber.add_response(
+        "head_object",
+        {"ContentLength": len(PAYLOAD), "ETag": etag, "LastModified": datetime(2026, 1, 1, tzinfo=timezone.utc)},
+        {"Bucket": "theshed-media", "Key": "takes/take.webm"},
+    )
+    stubber.add_response(
+        "get_object",
+        {"Body": StreamingBody(io.BytesIO(PAYLOAD[10:20]), 10)},
+        {
+            "Bucket": "theshed-media",
+            "Key": "takes/take.webm",
+            "Range": "bytes=10-19",
+            "IfMatch": etag,
+        },
+    )
+
+    request = RequestFactory().get("/", HTTP_RANGE="bytes=10-19")
+    with stubber:
+        response = serve_media(request, field_file, "video/webm")
+        body = b"".join(response.streaming_content)
+    stubber.assert_no_pending_responses()
+
+    assert response.status_code == 206
+    assert response["ETag"] == etag
+    assert body == PAYLOAD[10:20]
+
+
+def test_presigned_url_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("session.storage.time.monotonic", lambda: now[0])
+    cache = PresignedURLCache(max_entries=2, ttl=60)
+
+    cache.set("a", "url-a")
+    cache.set("b", "url-b")
+    assert cache.get("a") == "url-a"
+    cache.set("c", "url-c")  # evicts "b", the least recently used
+    assert cache.get("b") is None
+
+    now[0] += 60
+    assert cache.get("a") is None
+
+
+def test_r2_storage_reuses_presigned_urls_and_reports_timing(r2_storage):
+    def view(request):
+        urls = [r2_storage.url("tracks/song.mp3") for _ in range(3)]
+        assert len(set(urls)) == 1
+        # Explicit parameters are always signed fresh.
+        r2_storage.url("tracks/song.mp3", expire=60)
+        return HttpResponse()
+
+    response = PresignTimingMiddleware(view)(RequestFactory().get("/"))
+
+    timing = response["Server-Timing"]
+    assert 'desc="1 signed"' in timing
+    assert 'desc="2 cached"' in timing
+
+
+def test_presign_cache_can_be_disabled(settings):
+    settings.PRESIGNED_URL_CACHE_TTL = 0
+
+    assert R2MediaStorage(**r2_storage_options(R2_ENV)).url_cache is None
+
+
+def test_media_urls_are_stable_within_a_signing_window(settings, monkeypatch):
+    settings.PRESIGNED_URL_CACHE_TTL = 0
+    settings.R2_SIGNED_URL_EXPIRE = 43200
+    settings.R2_SIGNED_URL_WINDOW = 21600
+    storage = R2MediaStorage(**r2_storage_options(R2_ENV))
+    start = datetime(2026, 3, 1, 6, tzinfo=timezone.utc).timestamp()
+    assert signing_window(start + 21599) == start
+    assert signing_window(start + 21600) == start + 21600
+
+    urls = []
+    for offset in (0, 60, 21599, 21600):
+        monkeypatch.setattr("session.storage.time.time", lambda: start + offset)
+        urls.append(storage.url("tracks/song.mp3"))
+
+    assert urls[0] == urls[1] == urls[2] != urls[3]
+    assert "X-Amz-Date=20260301T060000Z" in urls[0]
+    assert "X-Amz-Date=20260301T120000Z" in urls[3]
+    assert "X-Amz-Expires=43200" in urls[0]
+    assert "response-cache-control=private%2C%20max-age%3D43200%2C%20immutable" in urls[0]
+
+
+def test_pinned_signing_time_stays_inside_the_stable_presign(settings, monkeypatch):
+    settings.PRESIGNED_URL_CACHE_TTL = 0
+    storage = R2MediaStorage(**r2_storage_options(R2_ENV))
+    monkeypatch.setattr("session.storage.time.time", lambda: 0.0)
+    pinned = storage.url("tracks/song.mp3")
+    fresh = storage.url("tracks/song.mp3", expire=60)
+
+    assert botocore.auth.get_current_datetime is botocore.compat.get_current_datetime
+    assert "X-Amz-Date=19700101T000000Z" in pinned
+    assert f"X-Amz-Date={datetime.now(timezone.utc):%Y%m%d}" in fresh
@@ -0,0 +1,100 @@
+import pytest
+from botocore.stub import ANY
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from session.media_deletion import media_deleter
+from session.models import Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+@pytest.fixture
+def track():
+    alice = User.objects.create_user(username="alice", password="pw")
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    return Track.objects.create(
+        session=practice_session,
+        name="Manifest",
+        source_type="youtube",
+        youtube_url="https://youtu.be/example",
+    )
+
+
+@pytest.fixture
+def r2_deletes(r2, monkeypatch):
+    # django-storages gives every thread its own connection; let the
+    # deleter thread use the stubbed client.
+    monkeypatch.setattr("session.media_deletion.s3_client", lambda storage: r2.client)
+    return r2
+
+
+def _take(track, name):
+    return Take.objects.create(track=track, name=name, capture_mode="audio", file=f"takes/{name}")
+
+
+def test_files_are_deleted_only_after_commit(track, settings, tmp_path, django_capture_on_commit_callbacks):
+    settings.MEDIA_ROOT = tmp_path
+    (tmp_path / "takes").mkdir()
+    kept = tmp_path / "takes" / "kept.webm"
+    gone = tmp_path / "takes" / "gone.webm"
+    kept.write_bytes(b"kept")
+    gone.write_bytes(b"gone")
+    first, second = _take(track, "kept.webm"), _take(track, "gone.webm")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                first.delete()
+                raise RuntimeError("rolled back")
+        second.delete()
+        assert gone.exists()
+    media_deleter.join()
+
+    assert kept.exists()
+    assert not gone.exists()
+
+
+def test_session_files_go_in_one_delete_objects_call(
+    r2_deletes, track, settings, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_DELETE_LINGER = 0.5
+    for index in range(3):
+        _take(track, f"take-{index}.webm")
+    r2_deletes.add_response(
+        "delete_objects",
+        {},
+        {"Bucket": "theshed-media", "Delete": {"Objects": ANY, "Quiet": True}},
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        track.session.delete()
+    media_deleter.join()
+
+
+def test_failed_deletes_are_retried_then_dead_lettered(
+    r2_deletes, track, settings, caplog, django_capture_on_commit_callbacks
+):
+    settings.MEDIA_DELETE_RETRIES = 1
+    settings.MEDIA_DELETE_BACKOFF = 0
+    take = _take(track, "stuck.webm")
+    for _ in range(2):
+        r2_deletes.add_response(
+            "delete_objects",
+            {"Errors": [{"Key": "takes/stuck.webm", "Code": "InternalError"}]},
+            {
+                "Bucket": "theshed-media",
+                "Delete": {"Objects": [{"Key": "takes/stuck.webm"}], "Quiet": True},
+            },
+        )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        take.delete()
+    media_deleter.join()
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "could not delete takes/stuck.webm"
+    ]
+    assert caplog.records[0].name == "session.media_deletion.dead_letter"
@@ -0,0 +1,132 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from session.media_gc import StoredFile, orphans
+from session.models import MediaUpload, Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    alice = User.objects.create_user(username="alice", password="pw")
+    track = Track.objects.create(
+        session=Session.objects.create(user=alice, name="Kevin Bond"),
+        name="Manifest",
+        source_type="mp3",
+        file="tracks/a/song.mp3",
+    )
+    Take.objects.create(track=track, name="Intro", capture_mode="audio", file="takes/intro.webm")
+    MediaUpload.objects.create(
+        user=alice,
+        kind=MediaUpload.KIND_TAKE,
+        mode=MediaUpload.MODE_RESUMABLE,
+        filename="long.webm",
+        key="takes/long.webm",
+        size=10,
+        part_size=4,
+    )
+
+    def write(name, data=b"x", age=2 * DAY):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    return write
+
+
+def test_reports_only_old_unreferenced_files(media, capsys):
+    media("tracks/a/song.mp3")
+    media("tracks/a-b.mp3", b"orphan")  # sorts before tracks/a/ byte-wise
+    media("takes/intro.webm")
+    media("takes/long.webm")
+    media("takes/fresh.webm", age=60)
+    stray = media("blobs/ab/abc.pdf", b"stray-pdf")
+
+    call_command("gc_media")
+
+    out = capsys.readouterr().out
+    assert "orphan: blobs/ab/abc.pdf (9 bytes)" in out
+    assert "orphan: tracks/a-b.mp3 (6 bytes)" in out
+    assert "intro" not in out and "song" not in out and "long" not in out
+    assert "media: found 2 orphaned files, 0.0 MB reclaimable (15 bytes) of 6 scanned" in out
+    assert "1 newer than 24h skipped" in out
+    assert stray.exists()
+
+
+def test_delete_removes_only_orphans(media, capsys):
+    kept = media("tracks/a/song.mp3")
+    orphan = media("tracks/old.mp3")
+
+    call_command("gc_media", "--delete", "--grace-hours", "0")
+
+    assert kept.exists()
+    assert not orphan.exists()
+    out = capsys.readouterr().out
+    assert "media: found 1 orphaned files" in out
+    assert "deleted 1, 0 failed" in out
+
+
+def test_failed_deletes_are_not_counted_as_deleted(media, capsys, settings, monkeypatch):
+    settings.MEDIA_DELETE_RETRIES = 0
+    media("tracks/old.mp3")
+    stuck = media("tracks/stuck.mp3")
+    delete = default_storage.delete
+
+    def refuse_stuck(name):
+        if name == "tracks/stuck.mp3":
+            raise PermissionError(name)
+        delete(name)
+
+    monkeypatch.setattr(default_storage, "delete", refuse_stuck)
+
+    call_command("gc_media", "--delete", "--grace-hours", "0")
+
+    assert stuck.exists()
+    out = capsys.readouterr().out
+    assert "media: found 2 orphaned files" in out
+    assert "deleted 1, 1 failed" in out
+
+
+def test_merge_join_skips_names_missing_from_storage():
+    files = [StoredFile(name, 1, None) for name in ("a", "c", "d", "f")]
+
+    found = orphans(iter(files), iter(["b", "c", "c", "e", "f", "g"]))
+
+    assert [stored.name for stored in found] == ["a", "d"]
+
+
+def test_lists_r2_page_by_page(r2, media, capsys):
+    old = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    for prefix, keys in (
+        ("blobs/", []),
+        ("clips/", []),
+        ("peaks/", []),
+        ("renditions/", []),
+        ("takes/", ["takes/intro.webm", "takes/lost.webm"]),
+        ("tracks/", ["tracks/a/song.mp3"]),
+    ):
+        r2.add_response(
+            "list_objects_v2",
+            {"Contents": [{"Key": key, "Size": 5, "LastModified": old} for key in keys]},
+            {"Bucket": "theshed-media", "Prefix": prefix, "MaxKeys": 1000},
+        )
+
+    call_command("gc_media")
+
+    out = capsys.readouterr().out
+    assert "orphan: takes/lost.webm (5 bytes)" in out
+    assert "media: found 1 orphaned files" in out
@@ -5,17 +5,22 @@ the network: R2 behavior is exercised through the env→options helper and by
 constructing the S3 backend without connecting.
 """
 
+import base64
+import hashlib
 import os
 from pathlib import Path
 
 import pytest
+from botocore.stub import ANY, Stubber
 from django.core.exceptions import ImproperlyConfigured
 from django.core.files.storage import FileSystemStorage, default_storage
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.utils import timezone
 
 from django_project.storage import R2_ENV_VARS, r2_storage_options
-from session.models import Session, Take, Track
+from session.media_copy import COPIED, CopyError, copy_file, copy_target
+from session.models import Clip, Rendition, Session, Take, Track
 
 
 FULL_ENV = {
@@ -110,6 +115,15 @@ def track_with_local_file(settings, tmp_path):
     local_file = Path(settings.MEDIA_ROOT) / "tracks" / "song.mp3"
     local_file.parent.mkdir(parents=True)
     local_file.write_bytes(b"mp3-bytes")
+    peaks_file = Path(settings.MEDIA_ROOT) / "peaks" / "track" / "1-abc.peaks"
+    peaks_file.parent.mkdir(parents=True)
+    peaks_file.write_bytes(b"PEAK")
+    rendition_file = Path(settings.MEDIA_ROOT) / "renditions" / "track" / "1-abc" / "75.mp3"
+    rendition_file.parent.mkdir(parents=True)
+    rendition_file.write_bytes(b"slow-mp3")
+    clip_file = Path(settings.MEDIA_ROOT) / "clips" / "ab" / "abc" / "500-1000-0ms.mp3"
+    clip_file.parent.mkdir(parents=True)
+    clip_file.write_bytes(b"clip-mp3")
 
     from django.contrib.auth import get_user_model
 
@@ -120,6 +134,7 @@ def track_with_local_file(settings, tmp_path):
         name="Manifest",
         source_type="mp3",
         file="tracks/song.mp3",
+        peaks="peaks/track/1-abc.peaks",
         position=0,
     )
     take = Take.objects.create(
@@ -128,6 +143,23 @@ def track_with_local_file(settings, tmp_path):
         capture_mode="audio",
         file="takes/gone.webm",  # intentionally absent on disk
     )
+    Rendition.objects.create(
+        track=track,
+        speed_percent=75,
+        source=track.file.name,
+        file="renditions/track/1-abc/75.mp3",
+        size=8,
+        last_used_at=timezone.now(),
+    )
+    Clip.objects.create(
+        source="abc",
+        start_ms=500,
+        end_ms=1000,
+        pre_roll_ms=0,
+        file="clips/ab/abc/500-1000-0ms.mp3",
+        size=8,
+        last_used_at=timezone.now(),
+    )
     return track, take, tmp_path
 
 
@@ -166,6 +198,11 @@ def test_migrate_command_copies_verifies_and_is_idempotent(track_with_local_file
 
     copied = tmp_path / "dest" / "tracks" / "song.mp3"
     assert copied.read_bytes() == b"mp3-bytes"
+    assert (tmp_path / "dest" / "peaks" / "track" / "1-abc.peaks").read_bytes() == b"PEAK"
+    rendition = tmp_path / "dest" / "renditions" / "track" / "1-abc" / "75.mp3"
+    assert rendition.read_bytes() == b"slow-mp3"
+    clip = tmp_path / "dest" / "clips" / "ab" / "abc" / "500-1000-0ms.mp3"
+    assert clip.read_bytes() == b"clip-mp3"
     output = capsys.readouterr()
     assert "copied: tracks/song.mp3" in output.out
     assert "MISSING local file for take" in output.err
@@ -175,3 +212,108 @@ def test_migrate_command_copies_verifies_and_is_idempotent(track_with_local_file
     output = capsys.readouterr()
     assert "ok (already in R2): tracks/song.mp3" in output.out
     assert not list((tmp_path / "dest" / "tracks").glob("song_*"))
+
+
+@pytest.mark.django_db
+def test_migrate_command_rerun_skips_manifest_entries_without_asking_storage(
+    track_with_local_file, settings, capsys, monkeypatch
+):
+    _, _, tmp_path = track_with_local_file
+    settings.STORAGES = {
+        "default": {
+            "BACKEND": "session.tests.test_media_storage.DestinationStorage",
+            "OPTIONS": {"location": str(tmp_path / "dest")},
+        },
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        },
+    }
+    call_command("migrate_media_to_r2", "--workers", "2")
+    manifest = tmp_path / "local" / ".migrate_media_to_r2.jsonl"
+    assert '"name": "tracks/song.mp3"' in manifest.read_text()
+    assert "throughput:" in capsys.readouterr().out
+
+    def no_storage_calls(*args, **kwargs):
+        raise AssertionError("storage was asked about a file in the manifest")
+
+    monkeypatch.setattr(DestinationStorage, "exists", no_storage_calls)
+    call_command("migrate_media_to_r2")
+    assert "ok (already in R2): tracks/song.mp3" in capsys.readouterr().out
+
+
+# ─── copying to R2 (session/media_copy.py) ───────────────────────────
+
+
+def _md5(data):
+    return hashlib.md5(data).hexdigest()
+
+
+def _not_found(stubber):
+    stubber.add_client_error("head_object", "404", http_status_code=404)
+
+
+def test_small_file_is_put_with_content_md5_and_verified(r2_storage, tmp_path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(b"mp3-bytes")
+    target = copy_target(r2_storage, 5 * 1024 * 1024)
+
+    with Stubber(r2_storage.connection.meta.client) as stubber:
+        _not_found(stubber)
+        stubber.add_response(
+            "put_object",
+            {"ETag": f'"{_md5(b"mp3-bytes")}"'},
+            {
+                "Bucket": "theshed-media",
+                "Key": "tracks/song.mp3",
+                "Body": b"mp3-bytes",
+                "ContentMD5": base64.b64encode(hashlib.md5(b"mp3-bytes").digest()).decode(),
+                "ContentType": "audio/mpeg",
+            },
+        )
+        assert copy_file(target, path, "tracks/song.mp3") == (
+            COPIED,
+            9,
+            _md5(b"mp3-bytes"),
+        )
+
+
+def test_large_file_is_copied_in_verified_parts(r2_storage, tmp_path):
+    part_size = 5 * 1024 * 1024
+    data = b"a" * part_size + b"tail"
+    path = tmp_path / "take.webm"
+    path.write_bytes(data)
+    parts = [data[:part_size], data[part_size:]]
+    etag = _md5(b"".join(hashlib.md5(part).digest() for part in parts)) + "-2"
+
+    with Stubber(r2_storage.connection.meta.client) as stubber:
+        _not_found(stubber)
+        stubber.add_response("create_multipart_upload", {"UploadId": "up-1"})
+        for number, part in enumerate(parts, start=1):
+            stubber.add_response(
+                "upload_part",
+                {"ETag": f'"{_md5(part)}"'},
+                {
+                    "Bucket": "theshed-media",
+                    "Key": "takes/take.webm",
+                    "UploadId": "up-1",
+                    "PartNumber": number,
+                    "Body": ANY,
+                    "ContentMD5": base64.b64encode(hashlib.md5(part).digest()).decode(),
+                },
+            )
+        stubber.add_response("complete_multipart_upload", {"ETag": f'"{etag}"'})
+        outcome, size, stored = copy_file(
+            copy_target(r2_storage, part_size), path, "takes/take.webm"
+        )
+
+    assert (outcome, size, stored) == (COPIED, len(data), etag)
+
+
+def test_existing_object_with_other_content_is_not_overwritten(r2_storage, tmp_path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(b"mp3-bytes")
+
+    with Stubber(r2_storage.connection.meta.client) as stubber:
+        stubber.add_response("head_object", {"ContentLength": 9, "ETag": f'"{_md5(b"other-mp3")}"'})
+        with pytest.raises(CopyError, match="CHECKSUM MISMATCH"):
+            copy_file(copy_target(r2_storage, 5 * 1024 * 1024), path, "tracks/song.mp3")
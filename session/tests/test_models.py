@@ -142,3 +142,69 @@ def test_deleting_track_cascades_to_takes(user):
     track.delete()
 
     assert Take.objects.count() == 0
+
+
+def test_session_version_advances_on_save_and_child_writes(user):
+    practice_session = Session.objects.create(user=user, name="Kevin Bond")
+    assert practice_session.version == 1
+
+    practice_session.name = "Renamed"
+    practice_session.save()
+    assert practice_session.version == 2
+
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=0,
+    )
+    Lick.objects.create(track=track, name="Intro", start_seconds=0, end_seconds=1)
+    Session.objects.filter(pk=practice_session.pk).bump_version()
+
+    practice_session.refresh_from_db()
+    assert practice_session.version == 5
+
+
+def test_saving_a_stale_session_still_advances_its_version(user):
+    practice_session = Session.objects.create(user=user, name="Kevin Bond")
+    stale = Session.objects.get(pk=practice_session.pk)
+    Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="youtube",
+        youtube_url="https://youtu.be/example",
+    )
+
+    stale.name = "Renamed"
+    stale.save()
+
+    assert stale.version == 3
+    practice_session.refresh_from_db()
+    assert (practice_session.name, practice_session.version) == ("Renamed", 3)
+
+
+def test_owner_follows_the_session_user(user):
+    bob = User.objects.create_user(username="bob", password="pw")
+    practice_session = Session.objects.create(user=user, name="Kevin Bond")
+    other_session = Session.objects.create(user=bob, name="Other")
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=0,
+    )
+    lick = Lick.objects.create(track=track, name="Intro", start_seconds=0, end_seconds=1)
+    take = Take.objects.create(track=track, name="Take", capture_mode="audio", file="takes/t.webm")
+    assert (track.owner, lick.owner, take.owner) == (user, user, user)
+
+    track = Track.objects.get(pk=track.pk)
+    track.session = other_session
+    track.save(update_fields=["session"])
+    assert Track.objects.get(pk=track.pk).owner == bob
+    assert set(Lick.objects.values_list("owner", flat=True)) == {bob.pk}
+    assert set(Take.objects.values_list("owner", flat=True)) == {bob.pk}
+
+    other_session.user = user
+    other_session.save()
+    for model in (Track, Lick, Take):
+        assert set(model.objects.values_list("owner", flat=True)) == {user.pk}
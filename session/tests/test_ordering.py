@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from session.models import Lick, Session, Track
+from session.ordering import plan_positions, spread_keys
+
+
+def _children(*positions):
+    return [SimpleNamespace(pk=index + 1, position=position) for index, position in enumerate(positions)]
+
+
+def test_spread_keys_between_open_and_closed_bounds():
+    assert spread_keys(None, None, 2) == [1024, 2048]
+    assert spread_keys(1024, None, 1) == [2048]
+    assert spread_keys(None, 1024, 1) == [511]
+    assert spread_keys(1024, 2048, 3) == [1280, 1536, 1792]
+    assert spread_keys(5, 6, 1) is None
+
+
+def test_single_move_rewrites_only_the_moved_row():
+    children = _children(1024, 2048, 3072, 4096)
+
+    assert plan_positions(children, [1, 4, 2, 3]) == {4: 1536}
+    assert plan_positions(children, [2, 3, 4, 1]) == {1: 5120}
+
+
+def test_full_reversal_renumbers_when_gaps_run_out():
+    children = _children(0, 1, 2)
+
+    assert plan_positions(children, [3, 2, 1]) == {3: 1024, 2: 2048, 1: 3072}
+
+
+def test_unchanged_order_writes_nothing():
+    assert plan_positions(_children(1024, 2048), [1, 2]) == {}
+
+
+@pytest.mark.django_db
+def test_rebalance_command_respaces_crowded_parents():
+    user = get_user_model().objects.create_user(username="alice", password="pw")
+    practice_session = Session.objects.create(user=user, name="Kevin Bond")
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=1024,
+    )
+    for position in (3, 4, 900):
+        Lick.objects.create(
+            track=track,
+            name=str(position),
+            start_seconds=0,
+            end_seconds=1,
+            position=position,
+        )
+    version = Session.objects.get().version
+
+    call_command("rebalance_positions")
+
+    assert list(track.licks.values_list("name", "position")) == [
+        ("3", 1024),
+        ("4", 2048),
+        ("900", 3072),
+    ]
+    assert Track.objects.get().position == 1024
+    assert Session.objects.get().version == version + 1
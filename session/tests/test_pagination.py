@@ -0,0 +1,160 @@
+import pytest
+from django.db import connection
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from session.models import Lick, Session, Take, Track
+from session.pagination import KeysetPagination
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def client_for():
+    def _make(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    return _make
+
+
+@pytest.fixture
+def track(alice):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    return Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=0,
+    )
+
+
+def _walk(client, url):
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        body = response.json()
+        pages.append([item["id"] for item in body["results"]])
+        url = body["next"]
+    return pages
+
+
+def test_collections_stay_plain_lists_without_opt_in(alice, track, client_for):
+    Lick.objects.create(track=track, name="A", start_seconds=0, end_seconds=1)
+
+    response = client_for(alice).get(reverse("lick-list"))
+
+    assert isinstance(response.json(), list)
+
+
+def test_takes_page_through_ties_in_order(alice, track, client_for):
+    takes = [
+        Take.objects.create(
+            track=track,
+            name=f"Take {index}",
+            capture_mode="audio",
+            file=f"takes/{index}.webm",
+        )
+        for index in range(5)
+    ]
+    # Identical timestamps force the id tiebreaker to carry the cursor.
+    Take.objects.update(created_at=timezone.now())
+
+    client = client_for(alice)
+    response = client.get(reverse("take-list"), {"page_size": 2})
+
+    assert response.status_code == 200
+    assert 'rel="next"' in response["Link"]
+    pages = _walk(client, reverse("take-list") + "?page_size=2")
+    assert pages == [
+        [takes[4].id, takes[3].id],
+        [takes[2].id, takes[1].id],
+        [takes[0].id],
+    ]
+
+
+def test_licks_page_by_position_and_filter_by_track(alice, track, client_for):
+    other = Track.objects.create(
+        session=track.session,
+        name="Other",
+        source_type="mp3",
+        position=1,
+    )
+    Lick.objects.create(track=other, name="Elsewhere", start_seconds=0, end_seconds=1)
+    licks = [
+        Lick.objects.create(
+            track=track,
+            name=f"Lick {position}",
+            start_seconds=position,
+            end_seconds=position + 1,
+            position=position % 2,
+        )
+        for position in range(4)
+    ]
+
+    pages = _walk(
+        client_for(alice),
+        reverse("lick-list") + f"?track={track.id}&page_size=3",
+    )
+
+    assert pages == [
+        [licks[0].id, licks[2].id, licks[1].id],
+        [licks[3].id],
+    ]
+
+
+def _page_plan(queryset, cursor):
+    paginator = KeysetPagination()
+    paginator.ordering = paginator.get_ordering(queryset)
+    return queryset.order_by(*paginator.ordering).filter(paginator.after(cursor)).explain()
+
+
+@pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite plan wording")
+def test_later_pages_seek_the_index(alice, track):
+    now = timezone.now()
+
+    plans = [
+        _page_plan(Lick.objects.filter(track=track), [1, now, 7]),
+        _page_plan(Lick.objects.filter(owner=alice), [1, now, 7]),
+        _page_plan(Track.objects.filter(owner=alice), [1, now, 7]),
+        _page_plan(Take.objects.filter(track=track), [now, 7]),
+        _page_plan(Take.objects.filter(owner=alice), [now, 7]),
+    ]
+
+    assert "USING INDEX lick_track_order_idx (track_id=? AND position>?)" in plans[0]
+    assert "USING INDEX lick_owner_order_idx (owner_id=? AND position>?)" in plans[1]
+    assert "USING INDEX track_owner_order_idx (owner_id=? AND position>?)" in plans[2]
+    assert "USING INDEX take_track_order_idx (track_id=? AND created_at<?)" in plans[3]
+    assert "USING INDEX take_owner_order_idx (owner_id=? AND created_at<?)" in plans[4]
+    assert not any("TEMP B-TREE" in plan for plan in plans)
+
+
+def test_sessions_page_newest_first(alice, client_for):
+    created = [Session.objects.create(user=alice, name=f"S{index}") for index in range(3)]
+
+    pages = _walk(client_for(alice), reverse("session-list") + "?page_size=2")
+
+    assert pages == [[created[2].id, created[1].id], [created[0].id]]
+
+
+def test_invalid_cursor_returns_404(alice, client_for):
+    response = client_for(alice).get(reverse("track-list"), {"cursor": "not-a-cursor"})
+
+    assert response.status_code == 404
+
+
+def test_non_integer_parent_filter_is_rejected(alice, client_for):
+    response = client_for(alice).get(reverse("take-list"), {"track": "abc"})
+
+    assert response.status_code == 400
@@ -0,0 +1,176 @@
+import io
+import os
+import wave
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from session import renditions, waveforms
+from session.media_deletion import media_deleter
+from session.models import Rendition, Session, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+RATE = 8000
+
+
+def _wav(seconds=1.0):
+    t = np.arange(int(RATE * seconds)) / RATE
+    samples = (0.5 * 32767 * np.sin(2 * np.pi * 220 * t)).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def rendition_settings(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TAKE_FILE_DELIVERY = "proxy"
+    # Decode and encode with the wave module whether or not ffmpeg is installed.
+    monkeypatch.setattr(waveforms.shutil, "which", lambda name: None)
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+
+@pytest.fixture
+def track(alice):
+    track = Track(
+        session=Session.objects.create(user=alice, name="Kevin Bond"),
+        name="Manifest",
+        source_type=Track.SOURCE_MP3,
+    )
+    track.file.save("manifest.wav", ContentFile(_wav()), save=False)
+    track.save()
+    return track
+
+
+def _url(track, speed):
+    return reverse("track-rendition", args=[track.pk]) + f"?speed={speed}"
+
+
+def test_speeds_round_to_the_step(settings):
+    settings.RENDITION_SPEED_STEP = 0.05
+
+    assert renditions.quantise_speed(0.74) == 75
+    assert renditions.quantise_speed(0.726) == 75
+    assert renditions.quantise_speed(0.1) == 25
+    assert renditions.quantise_speed(2) == 150
+
+
+def test_time_stretch_keeps_the_pitch():
+    t = np.arange(RATE) / RATE
+    tone = np.sin(2 * np.pi * 440 * t)
+
+    slow = renditions.time_stretch(tone, 0.5)
+
+    assert len(slow) == 2 * RATE
+    spectrum = np.abs(np.fft.rfft(slow[RATE // 2:RATE // 2 + RATE]))
+    assert abs(np.argmax(spectrum) - 440) <= 2
+
+
+def test_stretching_block_by_block_matches_one_pass():
+    tone = np.sin(np.arange(3 * RATE) * 0.05).astype(np.float32)
+    blocks = [tone[start:start + 777] for start in range(0, len(tone), 777)]
+
+    streamed = np.concatenate(list(renditions.stretch_blocks(blocks, 0.6)))
+
+    np.testing.assert_array_equal(streamed, renditions.time_stretch(tone, 0.6))
+
+
+def test_rendition_is_rendered_once_and_served_with_ranges(client, track):
+    response = client.get(_url(track, 0.74))
+
+    assert response.status_code == 200
+    assert response["Accept-Ranges"] == "bytes"
+    with wave.open(io.BytesIO(b"".join(response.streaming_content)), "rb") as reader:
+        assert reader.getnframes() == int(RATE / 0.75)
+    rendition = Rendition.objects.get()
+    assert (rendition.speed_percent, rendition.source) == (75, track.file.name)
+
+    partial = client.get(_url(track, 0.75), HTTP_RANGE="bytes=0-9")
+
+    assert partial.status_code == 206
+    assert len(b"".join(partial.streaming_content)) == 10
+    assert Rendition.objects.count() == 1
+
+
+def test_renditions_do_not_load_licks_or_takes(client, track):
+    client.get(_url(track, 0.75))
+
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get(_url(track, 0.75)).status_code == 200
+
+    assert not any(
+        "session_lick" in query["sql"] or "session_take" in query["sql"] for query in queries
+    )
+
+
+def test_full_speed_serves_the_original(client, track):
+    response = client.get(_url(track, 1.01))
+
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == track.file.open("rb").read()
+    assert not Rendition.objects.exists()
+
+
+def test_speed_out_of_range_is_rejected(client, track):
+    assert client.get(_url(track, 2)).status_code == 400
+    assert client.get(_url(track, "fast")).status_code == 400
+
+
+def test_least_recently_used_renditions_are_evicted(
+    client, track, settings, django_capture_on_commit_callbacks
+):
+    settings.RENDITION_CACHE_BYTES = 40_000
+    client.get(_url(track, 0.75))
+    client.get(_url(track, 1.5))
+    now = timezone.now()
+    Rendition.objects.filter(speed_percent=75).update(last_used_at=now - timedelta(hours=2))
+    Rendition.objects.filter(speed_percent=150).update(last_used_at=now - timedelta(hours=1))
+    client.get(_url(track, 0.75))  # a hit makes 0.75 the most recently used
+    evicted = Rendition.objects.get(speed_percent=150).file.path
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.get(_url(track, 1.25))
+    media_deleter.join()
+
+    assert sorted(Rendition.objects.values_list("speed_percent", flat=True)) == [75, 125]
+    assert not os.path.exists(evicted)
+
+
+def test_concurrent_miss_waits_instead_of_rendering_again(client, track, settings):
+    settings.RENDITION_LOCK_WAIT = 0
+    lock_key = renditions._lock_key(track, 75)
+    cache.add(lock_key, 1)
+    try:
+        response = client.get(_url(track, 0.75))
+    finally:
+        cache.delete(lock_key)
+
+    assert response.status_code == 503
+    assert response["Retry-After"] == str(renditions.RETRY_AFTER)
+    assert not Rendition.objects.exists()
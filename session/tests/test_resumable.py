@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+import pytest
+from botocore.stub import ANY
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from session.models import MediaUpload, Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+DATA = b"0123456789"  # three chunks of 4, 4 and 2 bytes
+
+
+@pytest.fixture
+def track(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    settings.DIRECT_UPLOAD_PART_SIZE = 4
+    alice = User.objects.create_user(username="alice", password="pw")
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    return Track.objects.create(
+        session=practice_session,
+        name="Manifest",
+        source_type="youtube",
+        youtube_url="https://youtu.be/example",
+    )
+
+
+@pytest.fixture
+def client(track):
+    client = APIClient()
+    client.force_authenticate(track.owner)
+    return client
+
+
+def _put(client, url, offset, chunk):
+    return client.generic(
+        "PUT",
+        url,
+        chunk,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+def _start(client):
+    response = client.post(
+        reverse("take-start-resumable"),
+        {"filename": "take.webm", "size": len(DATA)},
+        format="json",
+    )
+    assert response.status_code == 201
+    return response
+
+
+def _complete(client, upload_pk, track):
+    return client.post(
+        reverse("take-complete-resumable", kwargs={"upload_pk": upload_pk}),
+        {"track": track.id, "name": "Intro", "capture_mode": "audio"},
+        format="json",
+    )
+
+
+def test_resumable_upload_to_local_disk(client, track):
+    started = _start(client)
+    url = started["Location"]
+    assert started.data["chunk_size"] == 4
+    assert started["Upload-Offset"] == "0"
+
+    assert _put(client, url, 0, DATA[:4]).status_code == 204
+    # A retried chunk is rewritten and the offset does not move.
+    replay = _put(client, url, 0, DATA[:4])
+    assert replay.status_code == 204
+    assert replay["Upload-Offset"] == "4"
+    assert _put(client, url, 8, DATA[8:]).status_code == 409
+    assert _put(client, url, 4, DATA[4:7]).status_code == 400
+
+    progress = client.head(url)
+    assert progress.status_code == 200
+    assert progress["Upload-Offset"] == "4"
+    assert progress["Upload-Length"] == str(len(DATA))
+    assert _complete(client, started.data["id"], track).status_code == 400
+
+    assert _put(client, url, 4, DATA[4:8]).status_code == 204
+    assert _put(client, url, 8, DATA[8:])["Upload-Offset"] == str(len(DATA))
+
+    response = _complete(client, started.data["id"], track)
+    assert response.status_code == 201
+    take = Take.objects.get()
+    assert take.file.read() == DATA
+    assert MediaUpload.objects.get().status == MediaUpload.STATUS_COMPLETED
+
+
+def test_failed_finish_leaves_the_upload_retryable(client, track, monkeypatch):
+    started = _start(client)
+    for offset in range(0, len(DATA), 4):
+        _put(client, started["Location"], offset, DATA[offset:offset + 4])
+
+    def storage_down(storage, upload):
+        raise OSError("storage unavailable")
+
+    monkeypatch.setattr("session.views.finish_resumable", storage_down)
+    client.raise_request_exception = False
+    assert _complete(client, started.data["id"], track).status_code == 500
+    assert MediaUpload.objects.get().status == MediaUpload.STATUS_PENDING
+
+    monkeypatch.undo()
+    assert _complete(client, started.data["id"], track).status_code == 201
+    assert Take.objects.get().file.read() == DATA
+
+
+def test_resumable_upload_to_r2(client, track, r2):
+    r2.add_response(
+        "create_multipart_upload",
+        {"UploadId": "upload-1"},
+        {"Bucket": "theshed-media", "Key": ANY, "ContentType": "video/webm"},
+    )
+    started = _start(client)
+    key = MediaUpload.objects.get().key
+    target = {"Bucket": "theshed-media", "Key": key}
+    for number in (1, 2, 3):
+        r2.add_response(
+            "upload_part",
+            {"ETag": f'"etag-{number}"'},
+            {**target, "UploadId": "upload-1", "PartNumber": number, "Body": ANY, "ContentLength": ANY},
+        )
+    r2.add_response(
+        "complete_multipart_upload",
+        {},
+        {
+            **target,
+            "UploadId": "upload-1",
+            "MultipartUpload": {
+                "Parts": [{"PartNumber": n, "ETag": f'"etag-{n}"'} for n in (1, 2, 3)]
+            },
+        },
+    )
+    r2.add_response("head_object", {"ContentLength": len(DATA)}, target)
+
+    for offset in (0, 4, 8):
+        assert _put(client, started["Location"], offset, DATA[offset : offset + 4]).status_code == 204
+    response = _complete(client, started.data["id"], track)
+
+    assert response.status_code == 201
+    assert Take.objects.get().file.name == key
+
+
+def test_stale_uploads_expire(client, track, settings):
+    settings.UPLOAD_EXPIRE_HOURS = 1
+    started = _start(client)
+    url = started["Location"]
+    _put(client, url, 0, DATA[:4])
+    upload = MediaUpload.objects.get()
+    path = track.file.storage.path(upload.key)
+    MediaUpload.objects.filter(pk=upload.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+
+    assert client.head(url).status_code == 410
+    call_command("expire_uploads")
+
+    assert MediaUpload.objects.get().status == MediaUpload.STATUS_ABORTED
+    assert not track.file.storage.exists(upload.key), path
+    assert client.head(url).status_code == 404
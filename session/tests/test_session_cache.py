@@ -0,0 +1,273 @@
+import threading
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from session.caching import (
+    _document_key,
+    cached_session_detail,
+    session_detail_cache_stats,
+)
+from session.models import Lick, Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def client_for():
+    def _make(user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    return _make
+
+
+@pytest.fixture
+def practice_session(alice):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=0,
+    )
+    Lick.objects.create(track=track, name="Intro", start_seconds=0, end_seconds=1)
+    Take.objects.create(
+        track=track,
+        name="Take",
+        capture_mode="audio",
+        file="takes/take.webm",
+    )
+    return practice_session
+
+
+def _detail(client, practice_session):
+    response = client.get(reverse("session-detail", args=[practice_session.id]))
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_repeat_detail_is_served_from_cache(alice, practice_session, client_for, django_assert_num_queries):
+    client = client_for(alice)
+    first = _detail(client, practice_session)
+
+    with django_assert_num_queries(1):
+        second = _detail(client, practice_session)
+
+    assert second == first
+    stats = session_detail_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_new_url_window_rebuilds_the_document(
+    alice, practice_session, client_for, monkeypatch
+):
+    client = client_for(alice)
+    _detail(client, practice_session)
+    monkeypatch.setattr("session.caching.media_url_epoch", lambda: 1)
+
+    _detail(client, practice_session)
+
+    stats = session_detail_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (0, 2)
+
+
+def test_lick_edit_invalidates_cached_detail(alice, practice_session, client_for):
+    client = client_for(alice)
+    _detail(client, practice_session)
+    lick = Lick.objects.get()
+
+    client.patch(reverse("lick-detail", args=[lick.id]), {"name": "Outro"}, format="json")
+
+    body = _detail(client, practice_session)
+    assert body["tracks"][0]["licks"][0]["name"] == "Outro"
+
+
+def test_take_delete_invalidates_cached_detail(alice, practice_session, client_for):
+    client = client_for(alice)
+    _detail(client, practice_session)
+
+    client.delete(reverse("take-detail", args=[Take.objects.get().id]))
+
+    assert _detail(client, practice_session)["tracks"][0]["takes"] == []
+
+
+def test_track_insert_and_reorder_invalidate_cached_detail(alice, practice_session, client_for):
+    client = client_for(alice)
+    _detail(client, practice_session)
+
+    response = client.post(
+        reverse("track-list"),
+        {
+            "session": practice_session.id,
+            "name": "Newest",
+            "source_type": "youtube",
+            "youtube_url": "https://youtu.be/abc",
+            "position": 0,
+        },
+        format="json",
+    )
+    assert response.status_code == 201
+    body = _detail(client, practice_session)
+    assert [track["name"] for track in body["tracks"]] == ["Newest", "Praise on Demand"]
+
+    ids = [track["id"] for track in body["tracks"]]
+    client.post(
+        reverse("session-reorder-tracks", args=[practice_session.id]),
+        {"track_ids": list(reversed(ids))},
+        format="json",
+    )
+    body = _detail(client, practice_session)
+    assert [track["name"] for track in body["tracks"]] == ["Praise on Demand", "Newest"]
+
+
+def test_unchanged_session_answers_304_without_loading_tree(
+    alice, practice_session, client_for, django_assert_num_queries
+):
+    client = client_for(alice)
+    url = reverse("session-detail", args=[practice_session.id])
+    etag = client.get(url)["ETag"]
+
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert not response.content
+
+
+def test_child_writes_change_the_etag(alice, practice_session, client_for):
+    client = client_for(alice)
+    url = reverse("session-detail", args=[practice_session.id])
+    etags = [client.get(url)["ETag"]]
+
+    lick = Lick.objects.get()
+    client.patch(reverse("lick-detail", args=[lick.id]), {"name": "Outro"}, format="json")
+    etags.append(client.get(url)["ETag"])
+
+    second = Lick.objects.create(track=lick.track, name="Bridge", start_seconds=2, end_seconds=3, position=1)
+    etags.append(client.get(url)["ETag"])
+
+    client.post(
+        reverse("track-reorder-licks", args=[lick.track_id]),
+        {"lick_ids": [second.id, lick.id]},
+        format="json",
+    )
+    etags.append(client.get(url)["ETag"])
+
+    client.patch(url, {"name": "Renamed"}, format="json")
+    response = client.get(url, HTTP_IF_NONE_MATCH=etags[-1])
+
+    assert response.status_code == 200
+    assert len(set(etags + [response["ETag"]])) == 5
+
+
+def test_moves_change_the_etag_of_the_session_left_behind(alice, practice_session, client_for):
+    client = client_for(alice)
+    other = Session.objects.create(user=alice, name="Jazz standards")
+    url = reverse("session-detail", args=[practice_session.id])
+    Track.objects.update(source_type="youtube", youtube_url="https://youtu.be/example")
+    track = Track.objects.get()
+    second = Track.objects.create(session=other, name="Blue Bossa", source_type="mp3")
+
+    etag = client.get(url)["ETag"]
+    client.patch(
+        reverse("lick-detail", args=[Lick.objects.get().id]), {"track": second.id}, format="json"
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response.json()["tracks"][0]["licks"] == []
+
+    etag = response["ETag"]
+    client.patch(reverse("track-detail", args=[track.id]), {"session": other.id}, format="json")
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200
+    assert response.json()["tracks"] == []
+
+
+def test_session_delete_cascade_skips_version_bumps(alice, practice_session, client_for, django_assert_max_num_queries):
+    client = client_for(alice)
+    url = reverse("session-detail", args=[practice_session.id])
+
+    with django_assert_max_num_queries(12) as captured:
+        assert client.delete(url).status_code == 204
+
+    assert not any(query["sql"].startswith("UPDATE") for query in captured.captured_queries)
+
+
+def test_cache_stats_are_admin_only(alice, client_for):
+    assert client_for(alice).get(reverse("session-cache-stats")).status_code == 403
+
+    admin = User.objects.create_user(username="admin", password="pw", is_staff=True)
+    response = client_for(admin).get(reverse("session-cache-stats"))
+
+    assert response.status_code == 200
+    assert set(response.json()) == {
+        "hits",
+        "misses",
+        "coalesced",
+        "uncached",
+        "hit_ratio",
+        "scope",
+        "presigned_urls",
+    }
+    assert response.json()["scope"] == "process"
+
+
+def test_concurrent_misses_build_once():
+    started = threading.Event()
+    release = threading.Event()
+    builds = []
+
+    def slow_build():
+        builds.append("slow")
+        started.set()
+        release.wait(5)
+        return {"id": 1}
+
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.append(cached_session_detail(Session(pk=1), "host", slow_build))
+    )
+    worker.start()
+    started.wait(5)
+
+    def second_build():
+        builds.append("second")
+        return {"id": 1}
+
+    waiter = threading.Thread(
+        target=lambda: results.append(cached_session_detail(Session(pk=1), "host", second_build))
+    )
+    waiter.start()
+    release.set()
+    worker.join(5)
+    waiter.join(5)
+
+    assert builds == ["slow"]
+    assert results == [{"id": 1}, {"id": 1}]
+    assert session_detail_cache_stats()["coalesced"] == 1
+
+
+def test_held_lock_times_out_to_uncached_build(settings):
+    settings.SESSION_DETAIL_CACHE_LOCK_TIMEOUT = 0
+    practice_session = Session(pk=1)
+    cache.add(_document_key(practice_session, "host") + ":lock", 1)
+
+    assert cached_session_detail(practice_session, "host", lambda: {"id": 1}) == {"id": 1}
+
+    stats = session_detail_cache_stats()
+    assert (stats["misses"], stats["uncached"]) == (0, 1)
@@ -157,4 +157,129 @@ def test_reorder_tracks(alice, client_for):
     first.refresh_from_db()
     second.refresh_from_db()
     third.refresh_from_db()
-    assert (third.position, first.position, second.position) == (0, 1, 2)
+    assert third.position < first.position < second.position
+    assert response.json()["positions"] == {
+        str(track.id): track.position for track in (first, second, third)
+    }
+
+
+def test_list_never_loads_the_track_tree(alice, client_for, django_assert_num_queries):
+    for index in range(3):
+        practice_session = Session.objects.create(user=alice, name=f"Session {index}")
+        track = Track.objects.create(
+            session=practice_session,
+            name="Praise on Demand",
+            source_type="mp3",
+            position=0,
+        )
+        track.licks.create(name="Intro", start_seconds=0, end_seconds=1, position=0)
+        track.takes.create(name="Take", capture_mode="audio", file="takes/a.webm")
+
+    client = client_for(alice)
+    with django_assert_num_queries(1) as captured:
+        response = client.get(reverse("session-list"))
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    assert "session_track" not in captured.captured_queries[0]["sql"]
+
+
+def test_detail_prefetches_tree_in_constant_queries(alice, client_for, django_assert_num_queries):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    for position in range(5):
+        track = Track.objects.create(
+            session=practice_session,
+            name=f"Track {position}",
+            source_type="mp3",
+            position=position,
+        )
+        track.licks.create(name="Intro", start_seconds=0, end_seconds=1, position=0)
+
+    client = client_for(alice)
+    with django_assert_num_queries(4):
+        response = client.get(reverse("session-detail", args=[practice_session.id]))
+
+    assert response.status_code == 200
+    assert len(response.json()["tracks"]) == 5
+
+
+def _make_tracks(practice_session, count):
+    return [
+        Track.objects.create(
+            session=practice_session,
+            name=f"Track {position}",
+            source_type="mp3",
+            position=position,
+        )
+        for position in range(count)
+    ]
+
+
+def test_reorder_tracks_is_one_update_statement(alice, client_for, django_assert_max_num_queries):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    tracks = _make_tracks(practice_session, 6)
+
+    with django_assert_max_num_queries(10) as captured:
+        response = client_for(alice).post(
+            reverse("session-reorder-tracks", args=[practice_session.id]),
+            {"track_ids": [track.id for track in reversed(tracks)]},
+            format="json",
+        )
+
+    assert response.status_code == 200
+    track_updates = [
+        query["sql"]
+        for query in captured.captured_queries
+        if query["sql"].startswith('UPDATE "session_track"')
+    ]
+    assert len(track_updates) == 1
+    assert list(
+        Track.objects.filter(session=practice_session).values_list("id", flat=True)
+    ) == [track.id for track in reversed(tracks)]
+
+
+def test_move_single_track_before_another(alice, client_for):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    first, second, third, fourth = _make_tracks(practice_session, 4)
+
+    response = client_for(alice).post(
+        reverse("session-reorder-tracks", args=[practice_session.id]),
+        {"track_id": fourth.id, "before_id": second.id},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert list(
+        Track.objects.filter(session=practice_session).values_list("id", flat=True)
+    ) == [first.id, fourth.id, second.id, third.id]
+
+
+def test_move_track_to_end_with_null_before(alice, client_for):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    first, second, third = _make_tracks(practice_session, 3)
+
+    response = client_for(alice).post(
+        reverse("session-reorder-tracks", args=[practice_session.id]),
+        {"track_id": first.id, "before_id": None},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert list(
+        Track.objects.filter(session=practice_session).values_list("id", flat=True)
+    ) == [second.id, third.id, first.id]
+
+
+def test_move_track_rejects_unknown_before_id(alice, bob, client_for):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    first, _ = _make_tracks(practice_session, 2)
+    foreign = _make_tracks(Session.objects.create(user=bob, name="Other"), 1)[0]
+
+    response = client_for(alice).post(
+        reverse("session-reorder-tracks", args=[practice_session.id]),
+        {"track_id": first.id, "before_id": foreign.id},
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert "before_id" in response.json()
@@ -0,0 +1,137 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from session.models import Lick, Session, Take, Tombstone, Track
+from session.sync import encode_cursor
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+@pytest.fixture
+def track(alice):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    return Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="youtube",
+        youtube_url="https://youtube.com/watch?v=x",
+        position=1024,
+    )
+
+def _sync(client, cursor=None):
+    params = {"since": cursor} if cursor else {}
+    response = client.get(reverse("sync"), params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_initial_sync_returns_everything_flat(client, track, alice):
+    Lick.objects.create(track=track, name="Intro", start_seconds=0, end_seconds=1)
+    Take.objects.create(track=track, name="Take", capture_mode="audio", file="takes/t.webm")
+    other = User.objects.create_user(username="bob", password="pw")
+    Session.objects.create(user=other, name="Not mine")
+
+    data = _sync(client)
+
+    assert [row["name"] for row in data["sessions"]] == ["Kevin Bond"]
+    assert [row["name"] for row in data["tracks"]] == ["Praise on Demand"]
+    assert "licks" not in data["tracks"][0]
+    assert [row["name"] for row in data["licks"]] == ["Intro"]
+    assert [row["name"] for row in data["takes"]] == ["Take"]
+    assert data["deleted"] == []
+    assert data["has_more"] is False
+
+def test_delta_contains_only_changes_and_tombstones(client, track, settings):
+    settings.SYNC_CURSOR_OVERLAP = 0
+    keep = Lick.objects.create(track=track, name="Keep", start_seconds=0, end_seconds=1)
+    gone = Lick.objects.create(track=track, name="Gone", start_seconds=1, end_seconds=2)
+    cursor = _sync(client)["cursor"]
+
+    keep.name = "Renamed"
+    keep.save()
+    gone_id = gone.id
+    gone.delete()
+
+    data = _sync(client, cursor)
+
+    assert [row["name"] for row in data["licks"]] == ["Renamed"]
+    assert data["tracks"] == [] and data["takes"] == []
+    assert [(row["kind"], row["id"]) for row in data["deleted"]] == [("lick", gone_id)]
+    assert _sync(client, data["cursor"])["licks"] == []
+
+def test_session_delete_records_one_tombstone(client, track, settings):
+    settings.SYNC_CURSOR_OVERLAP = 0
+    Lick.objects.create(track=track, name="Intro", start_seconds=0, end_seconds=1)
+    cursor = _sync(client)["cursor"]
+
+    track.session.delete()
+
+    data = _sync(client, cursor)
+    assert [row["kind"] for row in data["deleted"]] == ["session"]
+
+def test_reorder_shows_up_as_changed_rows(client, track, settings):
+    settings.SYNC_CURSOR_OVERLAP = 0
+    first = Lick.objects.create(track=track, name="A", start_seconds=0, end_seconds=1, position=1024)
+    second = Lick.objects.create(track=track, name="B", start_seconds=1, end_seconds=2, position=2048)
+    cursor = _sync(client)["cursor"]
+
+    client.post(
+        reverse("track-reorder-licks", args=[track.id]),
+        {"lick_id": second.id, "before_id": first.id},
+        format="json",
+    )
+
+    data = _sync(client, cursor)
+    assert [row["id"] for row in data["licks"]] == [second.id]
+
+def test_pages_through_a_large_change_set(client, track, settings):
+    settings.SYNC_PAGE_SIZE = 2
+    for index in range(5):
+        Lick.objects.create(track=track, name=str(index), start_seconds=index, end_seconds=index + 1)
+
+    names, cursor = [], None
+    while True:
+        data = _sync(client, cursor)
+        names += [row["name"] for row in data["licks"]]
+        cursor = data["cursor"]
+        if not data["has_more"]:
+            break
+
+    assert names == ["0", "1", "2", "3", "4"]
+
+def test_invalid_and_expired_cursors(client, settings):
+    assert client.get(reverse("sync"), {"since": "nope"}).status_code == 400
+
+    old = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+    response = client.get(reverse("sync"), {"since": encode_cursor({"since": old.isoformat()})})
+    assert response.status_code == 410
+
+def test_compact_tombstones_removes_old_rows(alice):
+    old = Tombstone.objects.create(user=alice, kind="lick", object_id=1)
+    Tombstone.objects.filter(pk=old.pk).update(deleted_at=timezone.now() - timedelta(days=60))
+    Tombstone.objects.create(user=alice, kind="lick", object_id=2)
+
+    call_command("compact_tombstones", "--days", "30", "--batch-size", "1")
+
+    assert list(Tombstone.objects.values_list("object_id", flat=True)) == [2]
+
+def test_deleting_a_user_leaves_no_tombstones(alice, track):
+    alice.delete()
+
+    assert not Tombstone.objects.exists()
@@ -1,3 +1,5 @@
+import hashlib
+
 import pytest
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -61,6 +63,75 @@ def test_create_audio_take_multipart(alice, practice_session, client_for, settin
     assert response.status_code == 201, response.json()
 
 
+def test_multipart_take_records_size_and_sha256(alice, practice_session, client_for, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    track = Track.objects.create(session=practice_session, name="Manifest", position=0)
+    body = b"take-bytes" * 1000
+
+    response = client_for(alice).post(
+        reverse("take-list"),
+        {
+            "track": track.id,
+            "name": "Hashed",
+            "capture_mode": "audio",
+            "file": SimpleUploadedFile("hashed.webm", body, content_type="audio/webm"),
+        },
+        format="multipart",
+    )
+
+    assert response.status_code == 201
+    take = Take.objects.get(id=response.data["id"])
+    assert take.file_size == len(body)
+    assert take.file_sha256 == hashlib.sha256(body).hexdigest()
+    assert response.data["file_sha256"] == take.file_sha256
+
+
+def test_take_keeps_its_uploaded_name(alice, practice_session, client_for, settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    track = Track.objects.create(session=practice_session, name="Manifest", position=0)
+    client = client_for(alice)
+
+    response = client.post(
+        reverse("take-list"),
+        {
+            "track": track.id,
+            "name": "Named",
+            "capture_mode": "audio",
+            "file": SimpleUploadedFile("bridge-take.webm", b"take", content_type="audio/webm"),
+        },
+        format="multipart",
+    )
+
+    assert response.status_code == 201
+    assert response.data["file_name"] == "bridge-take.webm"
+    assert "bridge-take" not in response.data["file"]
+    download = client.get(reverse("take-file", args=[response.data["id"]]))
+    assert 'filename="bridge-take.webm"' in download["Content-Disposition"]
+
+
+def test_oversized_multipart_take_is_refused_while_streaming(
+    alice, practice_session, client_for, settings, tmp_path
+):
+    settings.MEDIA_ROOT = tmp_path
+    settings.TAKE_FILE_MAX_UPLOAD_SIZE = 1024
+    track = Track.objects.create(session=practice_session, name="Manifest", position=0)
+
+    response = client_for(alice).post(
+        reverse("take-list"),
+        {
+            "track": track.id,
+            "name": "Too long",
+            "capture_mode": "audio",
+            "file": SimpleUploadedFile("long.webm", b"x" * 4096, content_type="audio/webm"),
+        },
+        format="multipart",
+    )
+
+    assert response.status_code == 413
+    assert not Take.objects.exists()
+    assert not list(tmp_path.rglob("long*"))
+
+
 def test_create_take_in_other_users_track_404s(alice, bob, client_for, settings, tmp_path):
     settings.MEDIA_ROOT = tmp_path
     other_session = Session.objects.create(user=bob, name="Other")
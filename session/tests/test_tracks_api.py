@@ -89,6 +89,27 @@ def test_create_track_in_other_users_session_404s(alice, bob, client_for):
     assert response.status_code == 404
 
 
+def test_move_track_to_other_users_session_404s(alice, bob, practice_session, client_for):
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="youtube",
+        youtube_url="https://youtu.be/abc",
+        position=0,
+    )
+    other_session = Session.objects.create(user=bob, name="Other")
+
+    response = client_for(alice).patch(
+        reverse("track-detail", args=[track.id]),
+        {"session": other_session.id},
+        format="json",
+    )
+
+    assert response.status_code == 404
+    track.refresh_from_db()
+    assert (track.session_id, track.owner_id) == (practice_session.id, alice.id)
+
+
 def test_patch_track_bpm(alice, practice_session, client_for):
     track = Track.objects.create(
         session=practice_session,
@@ -181,23 +202,27 @@ def test_reorder_licks(alice, practice_session, client_for):
     assert response.status_code == 200
     first.refresh_from_db()
     second.refresh_from_db()
-    assert (second.position, first.position) == (0, 1)
+    assert second.position < first.position
+    assert response.json()["positions"] == {
+        str(first.id): first.position,
+        str(second.id): second.position,
+    }
 
 
-def test_create_track_at_top_shifts_existing_positions(alice, practice_session, client_for):
+def test_create_track_at_top_leaves_existing_positions(alice, practice_session, client_for):
     first = Track.objects.create(
         session=practice_session,
         name="First",
         source_type="youtube",
         youtube_url="https://youtu.be/abc",
-        position=0,
+        position=1024,
     )
     second = Track.objects.create(
         session=practice_session,
         name="Second",
         source_type="youtube",
         youtube_url="https://youtu.be/def",
-        position=1,
+        position=2048,
     )
 
     response = client_for(alice).post(
@@ -218,6 +243,216 @@ def test_create_track_at_top_shifts_existing_positions(alice, practice_session,
     second.refresh_from_db()
     created = Track.objects.get(id=response.json()["id"])
 
-    assert created.position == 0
-    assert first.position == 1
-    assert second.position == 2
+    assert created.position < first.position
+    assert (first.position, second.position) == (1024, 2048)
+    assert list(
+        Track.objects.filter(session=practice_session).values_list("name", flat=True)
+    ) == ["Newest", "First", "Second"]
+
+
+def test_create_track_between_neighbours_uses_the_gap(alice, practice_session, client_for):
+    for index, name in enumerate(["A", "B"]):
+        Track.objects.create(
+            session=practice_session,
+            name=name,
+            source_type="youtube",
+            youtube_url="https://youtu.be/abc",
+            position=(index + 1) * 1024,
+        )
+
+    response = client_for(alice).post(
+        reverse("track-list"),
+        {
+            "session": practice_session.id,
+            "name": "Middle",
+            "source_type": "youtube",
+            "youtube_url": "https://youtu.be/ghi",
+            "position": 1,
+        },
+        format="json",
+    )
+
+    assert response.status_code == 201, response.json()
+    assert response.json()["position"] == 1536
+
+
+def test_create_track_rebalances_when_gap_is_used_up(alice, practice_session, client_for):
+    for position, name in [(5, "A"), (6, "B")]:
+        Track.objects.create(
+            session=practice_session,
+            name=name,
+            source_type="youtube",
+            youtube_url="https://youtu.be/abc",
+            position=position,
+        )
+
+    response = client_for(alice).post(
+        reverse("track-list"),
+        {
+            "session": practice_session.id,
+            "name": "Middle",
+            "source_type": "youtube",
+            "youtube_url": "https://youtu.be/ghi",
+            "position": 1,
+        },
+        format="json",
+    )
+
+    assert response.status_code == 201, response.json()
+    assert list(
+        Track.objects.filter(session=practice_session).values_list("name", "position")
+    ) == [("A", 1024), ("Middle", 1536), ("B", 2048)]
+
+
+def test_move_single_lick(alice, practice_session, client_for):
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=0,
+    )
+    licks = [
+        Lick.objects.create(
+            track=track,
+            name=name,
+            start_seconds=index,
+            end_seconds=index + 1,
+            position=index,
+        )
+        for index, name in enumerate("ABC")
+    ]
+
+    response = client_for(alice).post(
+        reverse("track-reorder-licks", args=[track.id]),
+        {"lick_id": licks[2].id, "before_id": licks[0].id},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert list(track.licks.values_list("name", flat=True)) == ["C", "A", "B"]
+
+
+def test_reorder_licks_rejects_duplicate_ids(alice, practice_session, client_for):
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=0,
+    )
+    lick = Lick.objects.create(track=track, name="A", start_seconds=0, end_seconds=1)
+
+    response = client_for(alice).post(
+        reverse("track-reorder-licks", args=[track.id]),
+        {"lick_ids": [lick.id, lick.id]},
+        format="json",
+    )
+
+    assert response.status_code == 400
+
+
+def test_move_lick_writes_only_that_row(alice, practice_session, client_for):
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=1024,
+    )
+    licks = [
+        Lick.objects.create(
+            track=track,
+            name=name,
+            start_seconds=index,
+            end_seconds=index + 1,
+            position=(index + 1) * 1024,
+        )
+        for index, name in enumerate("ABCD")
+    ]
+
+    response = client_for(alice).post(
+        reverse("track-reorder-licks", args=[track.id]),
+        {"lick_ids": [licks[3].id, licks[0].id, licks[1].id, licks[2].id]},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert list(track.licks.values_list("name", "position")) == [
+        ("D", 511),
+        ("A", 1024),
+        ("B", 2048),
+        ("C", 3072),
+    ]
+
+
+def test_create_lick_without_position_appends(alice, practice_session, client_for):
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="mp3",
+        position=1024,
+    )
+    Lick.objects.create(track=track, name="A", start_seconds=0, end_seconds=1, position=1024)
+
+    response = client_for(alice).post(
+        reverse("lick-list"),
+        {"track": track.id, "name": "B", "start_seconds": 1, "end_seconds": 2},
+        format="json",
+    )
+
+    assert response.status_code == 201, response.json()
+    assert response.json()["position"] == 2048
+
+
+def test_patched_position_is_an_index_not_a_key(alice, practice_session, client_for):
+    track = Track.objects.create(
+        session=practice_session,
+        name="Praise on Demand",
+        source_type="youtube",
+        youtube_url="https://youtu.be/abc",
+        position=1024,
+    )
+    for name, position in (("A", 1024), ("B", 2048), ("C", 3072)):
+        Lick.objects.create(
+            track=track, name=name, start_seconds=0, end_seconds=1, position=position
+        )
+    moved = Lick.objects.get(name="C")
+
+    response = client_for(alice).patch(
+        reverse("lick-detail", args=[moved.id]), {"position": 1}, format="json"
+    )
+
+    assert response.status_code == 200, response.json()
+    assert list(track.licks.values_list("name", "position")) == [
+        ("A", 1024),
+        ("C", 1536),
+        ("B", 2048),
+    ]
+
+
+def test_moving_a_track_appends_it_with_a_key_from_its_new_session(
+    alice, practice_session, client_for
+):
+    other = Session.objects.create(user=alice, name="Other")
+    Track.objects.create(
+        session=other,
+        name="Resident",
+        source_type="youtube",
+        youtube_url="https://youtu.be/abc",
+        position=1024,
+    )
+    track = Track.objects.create(
+        session=practice_session,
+        name="Mover",
+        source_type="youtube",
+        youtube_url="https://youtu.be/def",
+        position=9216,
+    )
+
+    response = client_for(alice).patch(
+        reverse("track-detail", args=[track.id]), {"session": other.id}, format="json"
+    )
+
+    assert response.status_code == 200, response.json()
+    assert list(other.tracks.values_list("name", "position")) == [
+        ("Resident", 1024),
+        ("Mover", 2048),
+    ]
@@ -0,0 +1,44 @@
+import hashlib
+import io
+
+import pytest
+from django.test import RequestFactory
+
+from session.upload_handlers import FORM_OVERHEAD, HashingUploadHandler, UploadTooLarge
+
+
+def _handler(max_size):
+    return HashingUploadHandler(RequestFactory().post("/"), max_size=max_size, label="Takes")
+
+
+def test_refuses_by_content_length_before_reading():
+    handler = _handler(1024 * 1024)
+
+    with pytest.raises(UploadTooLarge) as excinfo:
+        handler.handle_raw_input(io.BytesIO(), {}, 1024 * 1024 + FORM_OVERHEAD + 1, b"b")
+
+    assert excinfo.value.status_code == 413
+    assert str(excinfo.value.detail) == "Takes must be 1 MB or smaller."
+
+
+def test_hashes_and_counts_chunks_as_they_arrive():
+    handler = _handler(10)
+    handler.new_file("file", "a.webm", "audio/webm", None)
+    handler.receive_data_chunk(b"hello", 0)
+    handler.receive_data_chunk(b"world", 5)
+
+    uploaded = handler.file_complete(10)
+
+    assert uploaded.size == 10
+    assert uploaded.sha256 == hashlib.sha256(b"helloworld").hexdigest()
+    uploaded.close()
+
+
+def test_stops_at_the_limit_mid_stream():
+    handler = _handler(8)
+    handler.new_file("file", "a.webm", "audio/webm", None)
+    handler.receive_data_chunk(b"hello", 0)
+
+    with pytest.raises(UploadTooLarge):
+        handler.receive_data_chunk(b"world", 5)
+    assert handler.file.closed
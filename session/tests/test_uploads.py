@@ -0,0 +1,165 @@
+import pytest
+from botocore.stub import ANY
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from session.models import MediaUpload, Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def track(alice):
+    practice_session = Session.objects.create(user=alice, name="Kevin Bond")
+    return Track.objects.create(
+        session=practice_session,
+        name="Manifest",
+        source_type="youtube",
+        youtube_url="https://youtu.be/example",
+    )
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+
+def _start(client, r2, filename="take.webm", size=20 * MB):
+    r2.add_response(
+        "create_multipart_upload",
+        {"UploadId": "upload-1"},
+        {"Bucket": "theshed-media", "Key": ANY, "ContentType": "video/webm"},
+    )
+    return client.post(reverse("take-start-upload"), {"filename": filename, "size": size}, format="json")
+
+
+def test_direct_uploads_need_r2(client):
+    response = client.post(reverse("take-start-upload"), {"filename": "take.webm", "size": 10}, format="json")
+
+    assert response.status_code == 501
+
+
+def test_start_returns_presigned_part_urls(client, r2, settings):
+    settings.DIRECT_UPLOAD_PART_SIZE = 8 * MB
+    response = _start(client, r2)
+
+    assert response.status_code == 201
+    assert response.data["part_size"] == 8 * MB
+    assert [part["part_number"] for part in response.data["parts"]] == [1, 2, 3]
+    url = response.data["parts"][1]["url"]
+    assert url.startswith("https://abc123.r2.cloudflarestorage.com/theshed-media/takes/take_")
+    assert "partNumber=2" in url and "uploadId=upload-1" in url
+    upload = MediaUpload.objects.get()
+    assert upload.kind == MediaUpload.KIND_TAKE
+    assert upload.key.startswith("takes/take_") and upload.key.endswith(".webm")
+
+
+def test_start_checks_size_and_extension(client, r2, settings):
+    settings.TAKE_FILE_MAX_UPLOAD_SIZE = 10 * MB
+    url = reverse("take-start-upload")
+
+    too_big = client.post(url, {"filename": "take.webm", "size": 11 * MB}, format="json")
+    wrong_type = client.post(url, {"filename": "take.pdf", "size": MB}, format="json")
+
+    assert too_big.status_code == 400
+    assert too_big.data["size"] == ["Recorded files must be 10 MB or smaller."]
+    assert wrong_type.status_code == 400
+    assert "filename" in wrong_type.data
+    assert not MediaUpload.objects.exists()
+
+
+def test_complete_creates_the_take(client, r2, track):
+    upload_id = _start(client, r2).data["id"]
+    key = MediaUpload.objects.get().key
+    target = {"Bucket": "theshed-media", "Key": key}
+    parts = [{"part_number": n, "etag": f'"etag-{n}"'} for n in (3, 1, 2)]
+    r2.add_response(
+        "complete_multipart_upload",
+        {},
+        {
+            **target,
+            "UploadId": "upload-1",
+            "MultipartUpload": {
+                "Parts": [{"PartNumber": n, "ETag": f'"etag-{n}"'} for n in (1, 2, 3)]
+            },
+        },
+    )
+    r2.add_response("head_object", {"ContentLength": 20 * MB}, target)
+    url = reverse("take-complete-upload", kwargs={"upload_pk": upload_id})
+    payload = {"track": track.id, "name": "Intro", "capture_mode": "video", "parts": parts}
+
+    response = client.post(url, payload, format="json")
+
+    assert response.status_code == 201
+    take = Take.objects.get()
+    assert take.file.name == key
+    assert take.owner_id == track.owner_id
+    assert MediaUpload.objects.get().status == MediaUpload.STATUS_COMPLETED
+    assert client.post(url, payload, format="json").status_code == 404
+
+
+def test_complete_validates_before_touching_r2(client, r2, track):
+    upload_id = _start(client, r2).data["id"]
+    url = reverse("take-complete-upload", kwargs={"upload_pk": upload_id})
+    payload = {"track": track.id, "name": "", "capture_mode": "audio", "parts": []}
+
+    # The stubber has no responses queued, so any R2 call would fail here.
+    blank_name = client.post(url, payload, format="json")
+    missing_parts = client.post(url, {**payload, "name": "Intro"}, format="json")
+
+    assert blank_name.status_code == 400
+    assert "name" in blank_name.data
+    assert missing_parts.status_code == 400
+    assert missing_parts.data["parts"] == "Expected parts 1 to 3."
+    assert MediaUpload.objects.get().status == MediaUpload.STATUS_PENDING
+
+
+def test_complete_discards_an_object_of_the_wrong_size(client, r2, track):
+    upload_id = _start(client, r2, size=5 * MB).data["id"]
+    key = MediaUpload.objects.get().key
+    target = {"Bucket": "theshed-media", "Key": key}
+    r2.add_response("complete_multipart_upload", {}, {**target, "UploadId": "upload-1", "MultipartUpload": ANY})
+    r2.add_response("head_object", {"ContentLength": 6 * MB}, target)
+    r2.add_response("delete_object", {}, target)
+
+    response = client.post(
+        reverse("take-complete-upload", kwargs={"upload_pk": upload_id}),
+        {
+            "track": track.id,
+            "name": "Intro",
+            "capture_mode": "video",
+            "parts": [{"part_number": 1, "etag": '"a"'}],
+        },
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert "file" in response.data
+    assert not Take.objects.exists()
+    assert MediaUpload.objects.get().status == MediaUpload.STATUS_ABORTED
+
+
+def test_abort(client, r2):
+    upload_id = _start(client, r2).data["id"]
+    key = MediaUpload.objects.get().key
+    r2.add_response(
+        "abort_multipart_upload",
+        {},
+        {"Bucket": "theshed-media", "Key": key, "UploadId": "upload-1"},
+    )
+
+    url = reverse("take-abort-upload", kwargs={"upload_pk": upload_id})
+    assert client.delete(url).status_code == 204
+    assert MediaUpload.objects.get().status == MediaUpload.STATUS_ABORTED
+    assert client.delete(url).status_code == 404
@@ -0,0 +1,220 @@
+import io
+import os
+import struct
+import threading
+import time
+import wave
+
+import numpy as np
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from session import waveforms
+from session.models import Session, Take, Track
+
+
+pytestmark = pytest.mark.django_db
+User = get_user_model()
+RATE = 8000
+
+
+def _wav(seconds=1.0, amplitude=0.5, channels=2):
+    t = np.arange(int(RATE * seconds)) / RATE
+    mono = (amplitude * 32767 * np.sin(2 * np.pi * 220 * t)).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(channels)
+        writer.setsampwidth(2)
+        writer.setframerate(RATE)
+        writer.writeframes(np.repeat(mono, channels).tobytes())
+    return buffer.getvalue()
+
+
+def _levels(data):
+    magic, version, bits, count, rate, per_peak, total = waveforms.HEADER.unpack_from(data)
+    assert (magic, version, bits) == (b"PEAK", 1, 8)
+    levels = []
+    for index in range(count):
+        peaks, offset = waveforms.LEVEL_ENTRY.unpack_from(
+            data, waveforms.HEADER.size + index * waveforms.LEVEL_ENTRY.size
+        )
+        levels.append(np.frombuffer(data, dtype=np.int8, count=peaks * 2, offset=offset))
+    return rate, per_peak, total, levels
+
+
+@pytest.fixture(autouse=True)
+def peak_settings(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    settings.WAVEFORM_SAMPLES_PER_PEAK = 100
+    settings.WAVEFORM_MIN_PEAKS = 10
+    # Decode with the wave module whether or not ffmpeg is installed.
+    monkeypatch.setattr(waveforms.shutil, "which", lambda name: None)
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pw")
+
+
+@pytest.fixture
+def track(alice):
+    return Track.objects.create(
+        session=Session.objects.create(user=alice, name="Kevin Bond"),
+        name="Manifest",
+        source_type="youtube",
+        youtube_url="https://youtu.be/example",
+    )
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(alice)
+    return client
+
+
+def _audio_take(track, capture_mode="audio"):
+    take = Take(track=track, name="Intro", capture_mode=capture_mode)
+    take.file.save("intro.wav", ContentFile(_wav()), save=False)
+    take.save()
+    return take
+
+
+def test_peaks_form_a_halving_pyramid(tmp_path):
+    path = tmp_path / "tone.wav"
+    path.write_bytes(_wav())
+
+    rate, per_peak, total, levels = _levels(waveforms.compute_peaks(str(path)))
+
+    assert (rate, per_peak, total) == (RATE, 100, RATE)
+    assert [len(level) // 2 for level in levels] == [80, 40, 20, 10]
+    mins, maxs = levels[0][0::2], levels[0][1::2]
+    assert abs(int(maxs.max()) - 64) <= 1 and abs(int(mins.min()) + 64) <= 1
+    # Every coarser pair bounds the two finer pairs it covers.
+    assert (levels[1][1::2] == np.maximum(maxs[0::2], maxs[1::2])).all()
+
+
+def test_audio_takes_are_scheduled_after_commit(
+    track, monkeypatch, django_capture_on_commit_callbacks
+):
+    scheduled = []
+    monkeypatch.setattr(waveforms, "_submit", lambda model, pk: scheduled.append((model, pk)))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        audio = _audio_take(track)
+        _audio_take(track, capture_mode="video")
+
+    assert scheduled == [(Take, audio.pk)]
+
+
+def test_peaks_endpoint_serves_ranges_once_built(track, client):
+    take = _audio_take(track)
+    url = reverse("take-peaks", args=[take.pk])
+    assert client.get(url).status_code == 404
+
+    waveforms.build_peaks(take)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Cache-Control"] == "private, no-cache"
+    body = b"".join(response.streaming_content)
+    assert body == take.peaks.read()
+    header = client.get(url, HTTP_RANGE=f"bytes=0-{waveforms.HEADER.size - 1}")
+    assert header.status_code == 206
+    assert struct.unpack_from("<4s", b"".join(header.streaming_content)) == (b"PEAK",)
+    assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+
+def test_track_peaks_do_not_load_licks_or_takes(alice, client):
+    track = Track(
+        session=Session.objects.create(user=alice, name="Kevin Bond"),
+        name="Manifest",
+        source_type=Track.SOURCE_MP3,
+    )
+    track.file.save("manifest.wav", ContentFile(_wav()), save=False)
+    track.save()
+    waveforms.build_peaks(track)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("track-peaks", args=[track.pk]))
+
+    assert response.status_code == 200
+    assert not any(
+        "session_lick" in query["sql"] or "session_take" in query["sql"] for query in queries
+    )
+
+
+def test_new_file_makes_peaks_stale(track):
+    take = _audio_take(track)
+    waveforms.build_peaks(take)
+    assert waveforms.peaks_current(take)
+
+    take.file.name = "takes/other.wav"
+
+    assert not waveforms.peaks_current(take)
+
+
+def test_build_waveforms_backfills_missing_peaks(track, capsys):
+    take = _audio_take(track)
+
+    call_command("build_waveforms")
+
+    take.refresh_from_db()
+    assert waveforms.peaks_current(take)
+    assert "waveforms: built 1, undecodable 0" in capsys.readouterr().out
+
+
+# Committed for real, so the command queues deletes as it would in production.
+@pytest.mark.django_db(transaction=True)
+def test_rebuild_deletes_the_old_peaks_before_exiting(track, settings):
+    settings.MEDIA_DELETE_LINGER = 0.5
+    take = _audio_take(track)
+    waveforms.build_peaks(take)
+    old = take.peaks.path
+
+    call_command("build_waveforms", "--rebuild")
+
+    take.refresh_from_db()
+    assert take.peaks.path != old
+    assert not os.path.exists(old)
+
+
+def test_undecodable_upload_is_logged_as_a_warning(track, caplog):
+    take = Take(track=track, name="Intro", capture_mode="audio")
+    take.file.save("intro.mp3", ContentFile(b"not audio"), save=False)
+    take.save()
+
+    waveforms._build_in_background(Take, take.pk)
+
+    assert [record.levelname for record in caplog.records] == ["WARNING"]
+    assert "no waveform for take" in caplog.text
+
+
+def test_concurrent_first_submits_share_one_pool(monkeypatch):
+    pools = []
+
+    class SlowPool:
+        def __init__(self, **kwargs):
+            time.sleep(0.05)
+            self.jobs = []
+            pools.append(self)
+
+        def submit(self, *args):
+            self.jobs.append(args)
+
+    monkeypatch.setattr(waveforms, "ThreadPoolExecutor", SlowPool)
+    monkeypatch.setattr(waveforms, "_executor", None)
+    threads = [threading.Thread(target=waveforms._submit, args=(Take, pk)) for pk in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(pools) == 1
+    assert len(pools[0].jobs) == 4
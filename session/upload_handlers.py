@@ -0,0 +1,70 @@
+"""Multipart upload handler that enforces size limits while bytes arrive.
+
+Django's default handlers spool a whole upload (up to
+``FILE_UPLOAD_MAX_MEMORY_SIZE`` of it in memory) before the serializer can
+look at its size, so a 2 GB POST to ``/takes/`` was received in full just
+to be rejected. ``HashingUploadHandler`` instead:
+
+* refuses the request from its ``Content-Length`` before reading the body;
+* counts bytes per file as they stream in and stops at the limit;
+* computes the SHA-256 incrementally, exposed as ``uploaded_file.sha256``
+  and stored on the row (``file_sha256`` / ``file_size``);
+* writes every file straight to a temporary file, so memory per upload is
+  one chunk whatever the file size.
+
+Views install it per request with the limit of the model they create (see
+``UploadLimitMixin`` in ``session/views.py``).
+"""
+
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+# Room for the multipart boundaries and the other form fields next to the
+# file when judging a request by its Content-Length.
+FORM_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "The upload is larger than allowed."
+    default_code = "upload_too_large"
+
+
+def size_limit_message(limit, label):
+    return f"{label} must be {limit / (1024 * 1024):.0f} MB or smaller."
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    def __init__(self, request=None, max_size=None, label="Files"):
+        super().__init__(request)
+        self.max_size = max_size
+        self.label = label
+
+    def _too_large(self):
+        return UploadTooLarge(size_limit_message(self.max_size, self.label))
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if self.max_size is not None and content_length > self.max_size + FORM_OVERHEAD:
+            raise self._too_large()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.max_size is not None and self.received > self.max_size:
+            self.file.close()
+            raise self._too_large()
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.digest.hexdigest()
+        return uploaded
@@ -0,0 +1,193 @@
+"""Direct-to-R2 uploads of track and take files.
+
+A form POST of a 250 MB take is spooled to a temp file by
+``MultiPartParser`` and then uploaded again by django-storages, so the bytes
+cross the network twice and a worker is busy for minutes. With R2 media
+storage the browser uploads straight to the bucket instead:
+
+1. ``POST /takes/uploads/`` (or ``/tracks/uploads/``) with ``filename`` and
+   ``size`` starts an S3 multipart upload and returns one presigned ``PUT``
+   URL per ``part_size`` slice of the file.
+2. The browser PUTs each slice and keeps the ``ETag`` response header.
+3. ``POST .../uploads/{id}/complete/`` with ``parts`` (``[{"part_number",
+   "etag"}]``) plus the usual take or track fields. They are validated by
+   ``TakeSerializer`` / ``TrackSerializer`` with the declared file, the
+   multipart upload is completed, the stored size is checked against the
+   declared one and the row is created.
+
+``DELETE .../uploads/{id}/`` aborts. Without R2 the endpoints answer 501
+and clients keep posting the file as multipart form data. Uploads that are
+never completed are aborted by ``manage.py expire_uploads``.
+"""
+
+import mimetypes
+import posixpath
+
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.utils.crypto import get_random_string
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import MediaUpload
+from .storage import is_s3, s3_client, s3_key
+
+
+# S3 and R2 allow at most 10,000 parts per upload.
+MAX_PARTS = 10_000
+
+
+class DirectUploadUnavailable(APIException):
+    status_code = status.HTTP_501_NOT_IMPLEMENTED
+    default_detail = "Direct uploads need R2 media storage; post the file instead."
+    default_code = "direct_upload_unavailable"
+
+
+def direct_upload_storage(model):
+    """The storage of ``model.file``, or a 501 when it cannot take presigned
+    multipart uploads."""
+    storage = model._meta.get_field("file").storage
+    if not is_s3(storage):
+        raise DirectUploadUnavailable()
+    return storage
+
+
+def s3_object(storage, upload):
+    return {"Bucket": storage.bucket_name, "Key": s3_key(storage, upload.key)}
+
+
+def object_name(model, filename):
+    """A fresh storage name for ``filename`` under ``model.file``'s
+    ``upload_to``. Always suffixed, so two concurrent uploads of the same
+    file can never complete onto one key."""
+    field = model._meta.get_field("file")
+    directory, base = posixpath.split(field.generate_filename(None, filename))
+    root, ext = posixpath.splitext(base)
+    suffix = f"_{get_random_string(7)}{ext}"
+    room = field.max_length - len(directory) - 1 - len(suffix)
+    if room < 1:
+        raise ValidationError({"filename": "Filename is too long."})
+    return posixpath.join(directory, root[:room] + suffix)
+
+
+def start_upload(
+    storage,
+    model,
+    user,
+    kind,
+    filename,
+    size,
+    mode=MediaUpload.MODE_DIRECT,
+    metadata=None,
+):
+    """Create the ``MediaUpload`` row, and the multipart upload on R2."""
+    part_size = max(settings.DIRECT_UPLOAD_PART_SIZE, -(-size // MAX_PARTS))
+    upload = MediaUpload(
+        user=user,
+        kind=kind,
+        mode=mode,
+        metadata=metadata or {},
+        filename=filename,
+        key=object_name(model, filename),
+        size=size,
+        part_size=part_size,
+    )
+    if is_s3(storage):
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = s3_client(storage).create_multipart_upload(
+            **s3_object(storage, upload),
+            ContentType=content_type,
+        )
+        upload.upload_id = response["UploadId"]
+    upload.save()
+    return upload
+
+
+def part_urls(storage, upload):
+    client = s3_client(storage)
+    target = s3_object(storage, upload)
+    return [
+        {
+            "part_number": number,
+            "url": client.generate_presigned_url(
+                "upload_part",
+                Params={**target, "UploadId": upload.upload_id, "PartNumber": number},
+                ExpiresIn=settings.DIRECT_UPLOAD_URL_EXPIRE,
+            ),
+        }
+        for number in range(1, upload.part_count + 1)
+    ]
+
+
+def _parts(upload, parts):
+    if not isinstance(parts, list):
+        raise ValidationError({"parts": "A list of {part_number, etag} is required."})
+    cleaned = []
+    for part in parts:
+        if (
+            not isinstance(part, dict)
+            or not isinstance(part.get("part_number"), int)
+            or not isinstance(part.get("etag"), str)
+            or not part["etag"]
+        ):
+            raise ValidationError({"parts": "Each part needs a part_number and an etag."})
+        cleaned.append({"PartNumber": part["part_number"], "ETag": part["etag"]})
+    cleaned.sort(key=lambda part: part["PartNumber"])
+    if [part["PartNumber"] for part in cleaned] != list(range(1, upload.part_count + 1)):
+        raise ValidationError({"parts": f"Expected parts 1 to {upload.part_count}."})
+    return cleaned
+
+
+def assemble(storage, upload, parts):
+    """Complete the multipart upload from ``[{"PartNumber", "ETag"}]``;
+    returns the stored object's size."""
+    client = s3_client(storage)
+    target = s3_object(storage, upload)
+    try:
+        client.complete_multipart_upload(
+            **target,
+            UploadId=upload.upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except ClientError as err:
+        code = err.response.get("Error", {}).get("Code", "error")
+        raise ValidationError({"parts": f"The upload could not be completed ({code})."})
+    return client.head_object(**target)["ContentLength"]
+
+
+def recorded_parts(upload):
+    """Parts sent through the API, for ``assemble``."""
+    return [
+        {"PartNumber": number, "ETag": etag}
+        for number, etag in enumerate(upload.part_etags, start=1)
+    ]
+
+
+def complete_upload(storage, upload, parts):
+    """Assemble the parts the browser uploaded; returns the stored size."""
+    return assemble(storage, upload, _parts(upload, parts))
+
+
+def abort_upload(storage, upload):
+    """Give up on ``upload``, dropping whatever was stored for it."""
+    if upload.upload_id:
+        try:
+            s3_client(storage).abort_multipart_upload(
+                **s3_object(storage, upload),
+                UploadId=upload.upload_id,
+            )
+        except ClientError as err:
+            if err.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                raise
+    elif upload.offset:
+        # Uploads through the API to local disk write the final file in place.
+        storage.delete(upload.key)
+    upload.status = MediaUpload.STATUS_ABORTED
+    upload.save(update_fields=["status", "updated_at"])
+
+
+def discard_upload(storage, upload):
+    """Delete a completed object that will not be used."""
+    storage.delete(upload.key)
+    upload.status = MediaUpload.STATUS_ABORTED
+    upload.save(update_fields=["status", "updated_at"])
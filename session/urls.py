@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import LickViewSet, SessionViewSet, TakeViewSet, TrackViewSet
+from .views import LickViewSet, SessionViewSet, SyncView, TakeViewSet, TrackViewSet
 
 
 router = DefaultRouter()
@@ -11,5 +11,6 @@ router.register(r"licks", LickViewSet, basename="lick")
 router.register(r"takes", TakeViewSet, basename="take")
 
 urlpatterns = [
+    path("sync/", SyncView.as_view(), name="sync"),
     path("", include(router.urls)),
 ]
@@ -1,35 +1,455 @@
 import mimetypes
 
-from django.http import FileResponse
+from django.conf import settings
+from django.utils.http import http_date, parse_etags
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
 
-from .models import Lick, Session, Take, Track
+from .caching import (
+    cached_session_detail,
+    session_detail_cache_stats,
+    session_detail_etag,
+)
+from .clips import clip_for
+from .fieldsets import prefetches_for, selection_from_request, selection_key
+from .lick_import import ImportFormatError, parse_upload, validate_rows
+from .live import abort_live, append_chunk, finish_live
+from .media import presigned_redirect, serve_media
+from .models import Lick, MediaUpload, Session, Take, Track
+from .ordering import (
+    plan_positions,
+    position_for_insert,
+    rebalance,
+    resolve_order,
+    spread_keys,
+    write_positions,
+)
+from .pagination import KeysetPagination
+from .renditions import SPEED_MAX_PERCENT, SPEED_MIN_PERCENT, quantise_speed, rendition_for
 from .serializers import (
+    UPLOAD_RULES,
+    FileInfo,
     LickSerializer,
+    MediaUploadSerializer,
     SessionDetailSerializer,
     SessionSerializer,
     TakeSerializer,
     TrackSerializer,
 )
+from .resumable import (
+    check_not_expired,
+    expires_at,
+    finish_resumable,
+    parse_offset,
+    resumable_storage,
+    write_chunk,
+)
+from .storage import presign_stats
+from .sync import collect_changes
+from .upload_handlers import HashingUploadHandler
+from .uploads import (
+    abort_upload,
+    complete_upload,
+    direct_upload_storage,
+    discard_upload,
+    part_urls,
+    start_upload,
+)
+from .waveforms import peaks_current, wants_peaks
+
+
+def _etag_matches(request, etag):
+    tags = parse_etags(request.headers.get("If-None-Match", ""))
+    # Weak comparison (RFC 9110 §13.1.2): the W/ prefix is ignored.
+    candidates = {tag.removeprefix("W/") for tag in tags}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def _filter_by_parent(queryset, request, field):
+    """Narrow a list to one parent (``?session=`` / ``?track=``) so paging
+    walks the ``(parent, ordering...)`` composite index."""
+    value = request.query_params.get(field)
+    if value is None:
+        return queryset
+    try:
+        return queryset.filter(**{f"{field}_id": int(value)})
+    except ValueError:
+        raise ValidationError({field: "Must be an integer id."})
+
+
+def _save_with_position(serializer, field):
+    """Save an update, turning a ``position`` index (or a move to another
+    ``field`` parent, which appends unless an index is given) into a sparse
+    key among the parent's other children, as on create."""
+    instance = serializer.instance
+    data = serializer.validated_data
+    parent_id = getattr(instance, f"{field}_id")
+    if data.get(field) is not None:
+        parent_id, moved = data[field].pk, data[field].pk != parent_id
+    else:
+        moved = False
+    if "position" not in data and not moved:
+        serializer.save()
+        return
+
+    with transaction.atomic():
+        siblings = type(instance).objects.filter(**{f"{field}_id": parent_id})
+        position = position_for_insert(siblings.exclude(pk=instance.pk), data.get("position"))
+        serializer.save(position=position)
+
+
+def _positions_after(children, changes):
+    """``{id: position}`` for every child once ``changes`` are written, so a
+    client that reordered by index can adopt the stored keys."""
+    return {child.pk: changes.get(child.pk, child.position) for child in children}
+
+
+def _deliver_file(request, field_file, filename=""):
+    """A stored recording: a presigned R2 redirect when configured, else
+    streamed with byte ranges. Downloads as ``filename``, or the stored
+    name's last part."""
+    content_type = mimetypes.guess_type(field_file.name)[0] or "application/octet-stream"
+    filename = filename or field_file.name.rsplit("/", 1)[-1]
+    if settings.TAKE_FILE_DELIVERY == "redirect":
+        response = presigned_redirect(
+            field_file,
+            content_type,
+            filename,
+            expire=settings.TAKE_FILE_REDIRECT_EXPIRE,
+        )
+        if response is not None:
+            return response
+    try:
+        return serve_media(request, field_file, content_type, filename=filename)
+    except FileNotFoundError:
+        raise NotFound()
+
+
+class FieldSelectionMixin:
+    """Pass ``?fields=`` / ``?expand=`` to the serializer on reads."""
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in SAFE_METHODS:
+            kwargs.setdefault("selection", selection_from_request(self.request))
+        return super().get_serializer(*args, **kwargs)
+
+
+class WaveformPeaksMixin:
+    """``GET {id}/peaks/``: the waveform peak pyramid of the row's audio
+    (see ``session/waveforms.py``), with validators and byte ranges so the
+    player can fetch one zoom level."""
+
+    @action(detail=True, methods=["get"], url_path="peaks")
+    def peaks(self, request, pk=None):
+        instance = self.get_object()
+        if not wants_peaks(instance):
+            raise NotFound("Only MP3 tracks and audio takes have waveform peaks.")
+        if not peaks_current(instance):
+            raise NotFound("Waveform peaks are not ready yet.")
+        try:
+            response = serve_media(request, instance.peaks, "application/octet-stream")
+        except FileNotFoundError:
+            raise NotFound("Waveform peaks are not ready yet.")
+        # The name changes with the file, but the URL does not: revalidate.
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class UploadLimitMixin:
+    """Parse multipart bodies with ``HashingUploadHandler``, so a file over
+    the ``upload_kind`` size limit is refused while it arrives rather than
+    after it has been received in full."""
+
+    upload_kind = None
+
+    def initialize_request(self, request, *args, **kwargs):
+        limit_setting, _extensions, label = UPLOAD_RULES[self.upload_kind]
+        # Before DRF wraps the request: authentication may read the body.
+        request.upload_handlers = [
+            HashingUploadHandler(request, max_size=getattr(settings, limit_setting), label=label)
+        ]
+        return super().initialize_request(request, *args, **kwargs)
+
+
+class DirectUploadMixin(UploadLimitMixin):
+    """Upload actions for a viewset whose model has a ``file``:
+
+    * ``uploads/``: the browser PUTs the file straight to R2 with presigned
+      part URLs (see ``session/uploads.py``);
+    * ``resumable/``: the client sends chunks through the API and can
+      resume after a failure (see ``session/resumable.py``).
+
+    Completion goes through the viewset's serializer and ``perform_create``,
+    so an uploaded file is checked exactly like a form upload."""
+
+    def _upload_model(self):
+        return self.get_serializer_class().Meta.model
+
+    def _pending_upload(self, upload_pk, mode=MediaUpload.MODE_DIRECT, lock=False):
+        queryset = MediaUpload.objects.filter(
+            user=self.request.user,
+            kind=self.upload_kind,
+            mode=mode,
+            status=MediaUpload.STATUS_PENDING,
+        )
+        if lock:
+            queryset = queryset.select_for_update()
+        try:
+            upload = queryset.get(pk=upload_pk)
+        except MediaUpload.DoesNotExist:
+            raise NotFound()
+        if mode != MediaUpload.MODE_DIRECT:
+            check_not_expired(upload)
+        return upload
+
+    def _start(self, request, storage, mode):
+        serializer = MediaUploadSerializer(data=request.data, context={"kind": self.upload_kind})
+        serializer.is_valid(raise_exception=True)
+        return start_upload(
+            storage,
+            self._upload_model(),
+            request.user,
+            self.upload_kind,
+            mode=mode,
+            **serializer.validated_data,
+        )
 
+    def _create_from_upload(self, request, storage, upload, finish, data=None):
+        data = request.data if data is None else data
+        data = {key: value for key, value in data.items() if key not in ("file", "parts")}
+        data["file"] = FileInfo(upload.filename, upload.size)
+        serializer = self.get_serializer(data=data)
+        serializer.is_valid(raise_exception=True)
+
+        # Claim the upload so a repeated call cannot create a second row.
+        pending = MediaUpload.objects.filter(pk=upload.pk, status=MediaUpload.STATUS_PENDING)
+        if not pending.update(status=MediaUpload.STATUS_COMPLETED):
+            raise NotFound()
+        try:
+            stored_size = finish()
+        except Exception:
+            # Whatever failed (bad parts, R2, the database), the bytes are
+            # still there: give the upload back so the client can retry.
+            MediaUpload.objects.filter(pk=upload.pk).update(status=MediaUpload.STATUS_PENDING)
+            raise
+        if stored_size != upload.size:
+            discard_upload(storage, upload)
+            return Response(
+                {"file": f"Uploaded {stored_size} bytes but {upload.size} were declared."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        serializer.validated_data["file"] = upload.key
+        try:
+            self.perform_create(serializer)
+        except Exception:
+            discard_upload(storage, upload)
+            raise
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def _progress_headers(self, upload):
+        headers = {
+            "Upload-Offset": str(upload.offset),
+            "Upload-Expires": http_date(expires_at(upload).timestamp()),
+            "Cache-Control": "no-store",
+        }
+        if upload.mode != MediaUpload.MODE_LIVE:
+            headers["Upload-Length"] = str(upload.size)
+        return headers
+
+    def _chunk_endpoint(self, request, upload_pk, mode, storage, write, abort):
+        """HEAD, DELETE and chunk PUT/PATCH of a resumable or live upload."""
+        if request.method == "HEAD":
+            upload = self._pending_upload(upload_pk, mode)
+            return Response(headers=self._progress_headers(upload))
+        if request.method == "DELETE":
+            abort(storage, self._pending_upload(upload_pk, mode))
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        # The body is the raw chunk: read request.stream, never request.data.
+        offset = parse_offset(request.headers.get("Upload-Offset"))
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or "")
+        except ValueError:
+            return Response(
+                {"detail": "Content-Length is required."},
+                status=status.HTTP_411_LENGTH_REQUIRED,
+            )
+        with transaction.atomic():
+            upload = self._pending_upload(upload_pk, mode, lock=True)
+            write(storage, upload, offset, request.stream if length else None, length)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=self._progress_headers(upload))
+
+    def _location(self, request, name, upload):
+        return reverse(f"{self.basename}-{name}", kwargs={"upload_pk": upload.pk}, request=request)
+
+    @action(detail=False, methods=["post"], url_path="uploads")
+    def start_upload(self, request):
+        storage = direct_upload_storage(self._upload_model())
+        upload = self._start(request, storage, MediaUpload.MODE_DIRECT)
+        return Response(
+            {
+                **MediaUploadSerializer(upload).data,
+                "parts": part_urls(storage, upload),
+                "expires_in": settings.DIRECT_UPLOAD_URL_EXPIRE,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path=r"uploads/(?P<upload_pk>\d+)/complete")
+    def complete_upload(self, request, upload_pk=None):
+        storage = direct_upload_storage(self._upload_model())
+        upload = self._pending_upload(upload_pk)
+        return self._create_from_upload(
+            request,
+            storage,
+            upload,
+            lambda: complete_upload(storage, upload, request.data.get("parts")),
+        )
 
-class SessionViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=["delete"], url_path=r"uploads/(?P<upload_pk>\d+)")
+    def abort_upload(self, request, upload_pk=None):
+        storage = direct_upload_storage(self._upload_model())
+        abort_upload(storage, self._pending_upload(upload_pk))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=["post"], url_path="resumable")
+    def start_resumable(self, request):
+        storage = resumable_storage(self._upload_model())
+        upload = self._start(request, storage, MediaUpload.MODE_RESUMABLE)
+        return Response(
+            {**MediaUploadSerializer(upload).data, "offset": 0, "chunk_size": upload.part_size},
+            status=status.HTTP_201_CREATED,
+            headers={
+                "Location": self._location(request, "resumable-upload", upload),
+                **self._progress_headers(upload),
+            },
+        )
+
+    @action(
+        detail=False,
+        methods=["head", "put", "patch", "delete"],
+        url_path=r"resumable/(?P<upload_pk>\d+)",
+    )
+    def resumable_upload(self, request, upload_pk=None):
+        return self._chunk_endpoint(
+            request,
+            upload_pk,
+            MediaUpload.MODE_RESUMABLE,
+            resumable_storage(self._upload_model()),
+            write_chunk,
+            abort_upload,
+        )
+
+    @action(detail=False, methods=["post"], url_path=r"resumable/(?P<upload_pk>\d+)/complete")
+    def complete_resumable(self, request, upload_pk=None):
+        storage = resumable_storage(self._upload_model())
+        upload = self._pending_upload(upload_pk, MediaUpload.MODE_RESUMABLE)
+        return self._create_from_upload(
+            request,
+            storage,
+            upload,
+            lambda: finish_resumable(storage, upload),
+        )
+
+
+class LiveUploadMixin(DirectUploadMixin):
+    """``live/`` actions: append a take's chunks while it is still being
+    recorded and finalize it on stop (see ``session/live.py``)."""
+
+    @action(detail=False, methods=["post"], url_path="live")
+    def start_live(self, request):
+        storage = resumable_storage(self._upload_model())
+        filename = str(request.data.get("filename") or "")
+        fields = {
+            key: request.data.get(key)
+            for key in ("track", "name", "capture_mode")
+            if key in request.data
+        }
+        # A take is never empty: check the fields as if one byte had arrived.
+        serializer = self.get_serializer(data={**fields, "file": FileInfo(filename, 1)})
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data["track"].owner_id != request.user.id:
+            raise NotFound()
+
+        upload = start_upload(
+            storage,
+            self._upload_model(),
+            request.user,
+            self.upload_kind,
+            filename,
+            0,
+            mode=MediaUpload.MODE_LIVE,
+            metadata=fields,
+        )
+        return Response(
+            {**MediaUploadSerializer(upload).data, "offset": 0, "chunk_size": upload.part_size},
+            status=status.HTTP_201_CREATED,
+            headers={
+                "Location": self._location(request, "live-upload", upload),
+                **self._progress_headers(upload),
+            },
+        )
+
+    @action(
+        detail=False,
+        methods=["head", "put", "patch", "delete"],
+        url_path=r"live/(?P<upload_pk>\d+)",
+    )
+    def live_upload(self, request, upload_pk=None):
+        return self._chunk_endpoint(
+            request,
+            upload_pk,
+            MediaUpload.MODE_LIVE,
+            resumable_storage(self._upload_model()),
+            append_chunk,
+            abort_live,
+        )
+
+    @action(detail=False, methods=["post"], url_path=r"live/(?P<upload_pk>\d+)/finalize")
+    def finalize_live(self, request, upload_pk=None):
+        storage = resumable_storage(self._upload_model())
+        upload = self._pending_upload(upload_pk, MediaUpload.MODE_LIVE)
+        if not upload.offset:
+            raise ValidationError({"file": "Nothing was recorded."})
+        upload.size = upload.offset
+        upload.save(update_fields=["size", "updated_at"])
+        return self._create_from_upload(
+            request,
+            storage,
+            upload,
+            lambda: finish_live(storage, upload),
+            # Fields sent on stop (e.g. a new name) win over those given at start.
+            data={**upload.metadata, **request.data},
+        )
+
+
+class SessionViewSet(FieldSelectionMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return Session.objects.none()
-        return (
-            Session.objects.filter(user=self.request.user)
-            .prefetch_related("tracks__licks", "tracks__takes")
-        )
+        queryset = Session.objects.filter(user=self.request.user)
+        if self.action == "reorder_tracks":
+            return queryset.prefetch_related(
+                Prefetch(
+                    "tracks",
+                    queryset=Track.objects.only("id", "session_id", "position"),
+                )
+            )
+        # retrieve prefetches the tree itself, and only on a cache miss;
+        # list/create/update/destroy only render or touch Session columns.
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -39,123 +459,261 @@ class SessionViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        practice_session = self.get_object()
+        # Built up front so a bad ?fields= / ?expand= is a 400, not a 304.
+        serializer = self.get_serializer(practice_session)
+        etag = session_detail_etag(practice_session)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        def build():
+            prefetch_related_objects([practice_session], *prefetches_for(serializer))
+            return serializer.data
+
+        document = cached_session_detail(
+            practice_session,
+            request.build_absolute_uri("/") + selection_key(selection_from_request(request)),
+            build,
+        )
+        return Response(document, headers=headers)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="cache-stats",
+        permission_classes=[IsAdminUser],
+    )
+    def cache_stats(self, request):
+        return Response(
+            {**session_detail_cache_stats(), "presigned_urls": presign_stats()}
+        )
+
     @action(detail=True, methods=["post"], url_path="reorder-tracks")
     def reorder_tracks(self, request, pk=None):
         practice_session = self.get_object()
-        track_ids = request.data.get("track_ids", [])
+        tracks = list(practice_session.tracks.all())
 
-        if not isinstance(track_ids, list):
-            return Response(
-                {"track_ids": "Must be a list."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        tracks = {track.id: track for track in practice_session.tracks.filter(id__in=track_ids)}
-        if len(tracks) != len(track_ids):
-            return Response(
-                {"track_ids": "Unknown track id(s)."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        track_ids, errors = resolve_order(tracks, request.data, "track")
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
 
+        changes = plan_positions(tracks, track_ids)
         with transaction.atomic():
-            for position, track_id in enumerate(track_ids):
-                track = tracks[track_id]
-                track.position = position
-                track.save(update_fields=["position"])
+            if write_positions(Track, changes):
+                Session.objects.filter(pk=practice_session.pk).bump_version()
 
-        return Response({"ok": True})
+        return Response({"ok": True, "positions": _positions_after(tracks, changes)})
 
 
-class TrackViewSet(viewsets.ModelViewSet):
+class TrackViewSet(
+    FieldSelectionMixin,
+    WaveformPeaksMixin,
+    DirectUploadMixin,
+    viewsets.ModelViewSet,
+):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     serializer_class = TrackSerializer
+    upload_kind = MediaUpload.KIND_TRACK
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return Track.objects.none()
-        return (
-            Track.objects.filter(session__user=self.request.user)
-            .select_related("session")
-            .prefetch_related("licks", "takes")
-        )
+        queryset = Track.objects.filter(owner=self.request.user)
+        if self.action == "reorder_licks":
+            return queryset.prefetch_related(
+                Prefetch(
+                    "licks",
+                    queryset=Lick.objects.only("id", "track_id", "position"),
+                )
+            )
+        if self.action in ("destroy", "import_licks", "peaks", "rendition"):
+            return queryset
+        if self.action == "list":
+            queryset = _filter_by_parent(queryset, self.request, "session")
+        if self.request.method in SAFE_METHODS:
+            return queryset.prefetch_related(*prefetches_for(self.get_serializer()))
+        return queryset.prefetch_related("licks", "takes")
 
     def perform_create(self, serializer):
         practice_session = serializer.validated_data["session"]
         if practice_session.user_id != self.request.user.id:
             raise NotFound()
 
-        insert_position = serializer.validated_data.get("position", 0)
+        # ``position`` arrives as a display index; store a sparse key
+        # between the neighbours so no other track is rewritten.
+        insert_index = serializer.validated_data.get("position", 0)
 
         with transaction.atomic():
-            Track.objects.filter(
-                session=practice_session,
-                position__gte=insert_position,
-            ).update(position=F("position") + 1)
-            serializer.save(position=insert_position)
+            position = position_for_insert(
+                Track.objects.filter(session=practice_session),
+                insert_index,
+            )
+            serializer.save(position=position)
+
+    def perform_update(self, serializer):
+        practice_session = serializer.validated_data.get("session")
+        if practice_session is not None and practice_session.user_id != self.request.user.id:
+            raise NotFound()
+        _save_with_position(serializer, "session")
 
     @action(detail=True, methods=["post"], url_path="reorder-licks")
     def reorder_licks(self, request, pk=None):
         track = self.get_object()
-        lick_ids = request.data.get("lick_ids", [])
+        licks = list(track.licks.all())
 
-        if not isinstance(lick_ids, list):
-            return Response(
-                {"lick_ids": "Must be a list."},
-                status=status.HTTP_400_BAD_REQUEST,
+        lick_ids, errors = resolve_order(licks, request.data, "lick")
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        changes = plan_positions(licks, lick_ids)
+        with transaction.atomic():
+            if write_positions(Lick, changes):
+                Session.objects.filter(pk=track.session_id).bump_version()
+
+        return Response({"ok": True, "positions": _positions_after(licks, changes)})
+
+    @action(detail=True, methods=["get"], url_path="rendition")
+    def rendition(self, request, pk=None):
+        """``?speed=0.75``: the track's audio at that speed, same pitch (see
+        ``session/renditions.py``)."""
+        track = self.get_object()
+        if track.source_type != Track.SOURCE_MP3 or not track.file:
+            raise NotFound("Only MP3 tracks have renditions.")
+        try:
+            speed = float(request.query_params.get("speed", ""))
+        except ValueError:
+            raise ValidationError({"speed": "Must be a number."})
+        if not SPEED_MIN_PERCENT / 100 <= speed <= SPEED_MAX_PERCENT / 100:
+            raise ValidationError(
+                {"speed": f"Must be between {SPEED_MIN_PERCENT / 100} and {SPEED_MAX_PERCENT / 100}."}
             )
+        speed_percent = quantise_speed(speed)
+        if speed_percent == 100:
+            return _deliver_file(request, track.file, track.file_name)
+        return _deliver_file(request, rendition_for(track, speed_percent).file)
+
+    @action(detail=True, methods=["post"], url_path="import-licks")
+    def import_licks(self, request, pk=None):
+        track = self.get_object()
 
-        licks = {lick.id: lick for lick in track.licks.filter(id__in=lick_ids)}
-        if len(licks) != len(lick_ids):
+        upload = request.FILES.get("file")
+        try:
+            if upload is not None:
+                rows = parse_upload(upload, request.data.get("format"))
+            else:
+                rows = request.data.get("licks")
+        except ImportFormatError as exc:
+            return Response({"file": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        duration = request.data.get("duration_seconds")
+        try:
+            duration = float(duration) if duration not in (None, "") else None
+        except (TypeError, ValueError):
             return Response(
-                {"lick_ids": "Unknown lick id(s)."},
+                {"duration_seconds": "A valid number is required."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        cleaned, errors = validate_rows(
+            track,
+            rows,
+            duration=duration,
+            max_rows=settings.LICK_IMPORT_MAX_ROWS,
+        )
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
         with transaction.atomic():
-            for position, lick_id in enumerate(lick_ids):
-                lick = licks[lick_id]
-                lick.position = position
-                lick.save(update_fields=["position"])
+            siblings = Lick.objects.filter(track=track)
+            last = siblings.values_list("position", flat=True).reverse().first()
+            positions = spread_keys(last, None, len(cleaned))
+            if positions is None:
+                rebalance(siblings)
+                last = siblings.values_list("position", flat=True).reverse().first()
+                positions = spread_keys(last, None, len(cleaned))
+
+            licks = Lick.objects.bulk_create(
+                Lick(track=track, owner_id=track.owner_id, position=position, **row)
+                for row, position in zip(cleaned, positions)
+            )
+            # bulk_create skips post_save, so advance the version here.
+            Session.objects.filter(pk=track.session_id).bump_version()
 
-        return Response({"ok": True})
+        serializer = LickSerializer(licks, many=True, context=self.get_serializer_context())
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class LickViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = LickSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return Lick.objects.none()
-        return Lick.objects.filter(track__session__user=self.request.user).select_related(
-            "track",
-            "track__session",
-        )
+        queryset = Lick.objects.filter(owner=self.request.user).select_related("track")
+        if self.action == "list":
+            queryset = _filter_by_parent(queryset, self.request, "track")
+        return queryset
 
     def perform_create(self, serializer):
         track = serializer.validated_data["track"]
-        if track.session.user_id != self.request.user.id:
+        if track.owner_id != self.request.user.id:
             raise NotFound()
-        serializer.save()
 
+        with transaction.atomic():
+            position = position_for_insert(
+                Lick.objects.filter(track=track),
+                serializer.validated_data.get("position"),
+            )
+            serializer.save(position=position)
+
+    def perform_update(self, serializer):
+        track = serializer.validated_data.get("track")
+        if track is not None and track.owner_id != self.request.user.id:
+            raise NotFound()
+        _save_with_position(serializer, "track")
+
+    @action(detail=True, methods=["get"], url_path="clip")
+    def clip(self, request, pk=None):
+        """Just the lick's segment of the track, with ``?pre_roll=`` seconds
+        of lead-in (see ``session/clips.py``)."""
+        lick = self.get_object()
+        if lick.track.source_type != Track.SOURCE_MP3 or not lick.track.file:
+            raise NotFound("Only licks on uploaded audio tracks have clips.")
+        try:
+            pre_roll = float(request.query_params.get("pre_roll", 0))
+        except ValueError:
+            raise ValidationError({"pre_roll": "Must be a number."})
+        if not 0 <= pre_roll <= settings.LICK_CLIP_MAX_PRE_ROLL:
+            raise ValidationError(
+                {"pre_roll": f"Must be between 0 and {settings.LICK_CLIP_MAX_PRE_ROLL}."}
+            )
+        return _deliver_file(request, clip_for(lick, pre_roll).file)
 
-class TakeViewSet(viewsets.ModelViewSet):
+
+class TakeViewSet(WaveformPeaksMixin, LiveUploadMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     serializer_class = TakeSerializer
+    upload_kind = MediaUpload.KIND_TAKE
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         if not self.request.user.is_authenticated:
             return Take.objects.none()
-        return Take.objects.filter(track__session__user=self.request.user).select_related(
-            "track",
-            "track__session",
-        )
+        queryset = Take.objects.filter(owner=self.request.user).select_related("track")
+        if self.action == "list":
+            queryset = _filter_by_parent(queryset, self.request, "track")
+        return queryset
 
     def perform_create(self, serializer):
         track = serializer.validated_data["track"]
-        if track.session.user_id != self.request.user.id:
+        if track.owner_id != self.request.user.id:
             raise NotFound()
         serializer.save()
 
@@ -164,10 +722,20 @@ class TakeViewSet(viewsets.ModelViewSet):
         take = self.get_object()
         if not take.file:
             raise NotFound()
+        return _deliver_file(request, take.file, take.file_name)
 
-        content_type = mimetypes.guess_type(take.file.name)[0] or "application/octet-stream"
-        return FileResponse(
-            take.file.open("rb"),
-            content_type=content_type,
-            filename=take.file.name.rsplit("/", 1)[-1],
+
+class SyncView(APIView):
+    """``GET /sync/?since=<cursor>``: everything that changed since the
+    cursor from a previous call (see ``session/sync.py``)."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(
+            collect_changes(
+                request.user,
+                request.query_params.get("since"),
+                context={"request": request, "view": self},
+            )
         )
@@ -0,0 +1,305 @@
+"""Waveform peak pyramids for MP3 tracks and audio takes.
+
+The player used to decode a whole MP3 in the browser just to draw its
+waveform and place lick markers. Now each MP3 ``Track`` and audio ``Take``
+gets a peaks sidecar once its row is committed: the audio is decoded (with
+``ffmpeg`` when it is installed, else WAV files with the ``wave`` module),
+mixed to mono and reduced, one block at a time, to min/max pairs of
+``WAVEFORM_SAMPLES_PER_PEAK`` samples. Each further level halves the
+resolution of the one before, down to about ``WAVEFORM_MIN_PEAKS`` pairs.
+
+The sidecar is stored next to the media as ``peaks/<kind>/<pk>-<digest>.peaks``
+and served by ``GET /tracks/{id}/peaks/`` (``/takes/{id}/peaks/``) with
+validators and byte ranges, so the player reads the header and fetches only
+the level it draws. Layout, little-endian::
+
+    b"PEAK", version u8, bits u8 (8 or 16), levels u16,
+    sample_rate u32, samples_per_peak u32 (level 0), total_samples u64,
+    levels x (peak_count u32, byte_offset u64),
+    per level: min, max, min, max, ... as int8 or int16 (full scale 127/32767)
+
+Level ``n`` covers ``samples_per_peak << n`` samples per pair.
+"""
+
+import hashlib
+import logging
+import shutil
+import struct
+import subprocess
+import tempfile
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from .media_deletion import delete_later
+from .models import Take, Track
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PEAK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHIIQ")
+LEVEL_ENTRY = struct.Struct("<IQ")
+# Peaks of this many level-0 windows are reduced at a time.
+BLOCK_PEAKS = 4096
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+class WaveformUnavailable(Exception):
+    """The file cannot be decoded here (say an MP3 without ffmpeg)."""
+
+
+def wants_peaks(instance):
+    """True for rows whose file is audio the player draws a waveform for."""
+    if not instance.file:
+        return False
+    if isinstance(instance, Track):
+        return instance.source_type == Track.SOURCE_MP3
+    return isinstance(instance, Take) and instance.capture_mode == Take.MODE_AUDIO
+
+
+def peaks_stem(instance):
+    """Sidecar name prefix for ``instance``'s current file; a new file means
+    a new name, so a stale sidecar is never served for it."""
+    digest = hashlib.sha256(instance.file.name.encode()).hexdigest()[:12]
+    return f"peaks/{instance._meta.model_name}/{instance.pk}-{digest}"
+
+
+def peaks_current(instance):
+    return bool(instance.peaks) and instance.peaks.name.startswith(peaks_stem(instance))
+
+
+# ─── Decoding ────────────────────────────────────────────────────────
+
+
+def _ffmpeg_pcm(path, sample_rate, block_bytes, start=0, duration=None):
+    """Mono s16le PCM at ``sample_rate`` from ffmpeg, in blocks."""
+    # -ss before -i seeks in the input instead of decoding up to ``start``.
+    seek = ["-ss", f"{start:.3f}"] if start else []
+    limit = ["-t", f"{duration:.3f}"] if duration is not None else []
+    process = subprocess.Popen(
+        [
+            shutil.which("ffmpeg"),
+            "-nostdin",
+            "-v",
+            "error",
+            *seek,
+            "-i",
+            path,
+            *limit,
+            "-ac",
+            "1",
+            "-ar",
+            str(sample_rate),
+            "-f",
+            "s16le",
+            "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while block := process.stdout.read(block_bytes):
+            yield np.frombuffer(block[: len(block) // 2 * 2], dtype="<i2") / 32768.0
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read()
+        process.stderr.close()
+        if process.wait() != 0:
+            raise WaveformUnavailable(f"ffmpeg failed: {stderr.decode(errors='replace')[:200]}")
+
+
+def _wave_frames(raw, width, channels):
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float64) - 128) / 128.0
+    elif width == 3:
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)
+        samples = np.where(values >= 1 << 23, values - (1 << 24), values) / float(1 << 23)
+    else:
+        dtype = {2: "<i2", 4: "<i4"}[width]
+        samples = np.frombuffer(raw, dtype=dtype) / float(1 << (8 * width - 1))
+    return samples.reshape(-1, channels).mean(axis=1)
+
+
+def _wave_pcm(path, block_frames, start=0, duration=None):
+    """Mono samples of a PCM WAV file, in blocks, at its own rate."""
+    try:
+        reader = wave.open(path, "rb")
+    except (wave.Error, EOFError) as err:
+        raise WaveformUnavailable(f"Not a PCM WAV file ({err}) and ffmpeg is not installed.")
+    with reader:
+        width, channels = reader.getsampwidth(), reader.getnchannels()
+        if width not in (1, 2, 3, 4):
+            raise WaveformUnavailable(f"Unsupported WAV sample width {width}.")
+        rate = reader.getframerate()
+        yield rate
+        reader.setpos(min(int(start * rate), reader.getnframes()))
+        remaining = int(duration * rate) if duration is not None else reader.getnframes()
+        while remaining > 0 and (raw := reader.readframes(min(block_frames, remaining))):
+            remaining -= len(raw) // (width * channels)
+            yield _wave_frames(raw, width, channels)
+
+
+def decode(path, sample_rate, block, start=0, duration=None):
+    """``(sample_rate, blocks of mono float samples)`` for the audio file at
+    ``path``, or for ``duration`` seconds of it from ``start``: resampled to
+    ``sample_rate`` by ffmpeg, or a WAV file at its own rate without it.
+    Blocks hold ``block`` samples."""
+    if shutil.which("ffmpeg"):
+        return sample_rate, _ffmpeg_pcm(path, sample_rate, block * 2, start, duration)
+    blocks = _wave_pcm(path, block, start, duration)
+    return next(blocks), blocks
+
+
+# ─── Peaks ───────────────────────────────────────────────────────────
+
+
+def base_peaks(blocks, samples_per_peak):
+    """Level-0 ``(mins, maxs)`` and the sample count, reducing each block as
+    it arrives so memory stays at one block plus the result."""
+    mins, maxs = [], []
+    carry = np.zeros(0)
+    total = 0
+    for samples in blocks:
+        total += len(samples)
+        samples = np.concatenate([carry, samples]) if len(carry) else samples
+        whole = len(samples) // samples_per_peak * samples_per_peak
+        windows = samples[:whole].reshape(-1, samples_per_peak)
+        mins.append(windows.min(axis=1))
+        maxs.append(windows.max(axis=1))
+        carry = samples[whole:]
+    if len(carry):
+        mins.append(carry.min(keepdims=True))
+        maxs.append(carry.max(keepdims=True))
+    if not mins:
+        return np.zeros(0), np.zeros(0), 0
+    return np.concatenate(mins), np.concatenate(maxs), total
+
+
+def pyramid(mins, maxs, min_peaks):
+    """Levels of ``(mins, maxs)``, each half as long as the one before."""
+    levels = [(mins, maxs)]
+    while len(mins) > min_peaks:
+        if len(mins) % 2:
+            mins = np.append(mins, mins[-1])
+            maxs = np.append(maxs, maxs[-1])
+        mins = mins.reshape(-1, 2).min(axis=1)
+        maxs = maxs.reshape(-1, 2).max(axis=1)
+        levels.append((mins, maxs))
+    return levels
+
+
+def encode(levels, sample_rate, samples_per_peak, total_samples, bits):
+    """The sidecar bytes for ``levels`` (see the module docstring)."""
+    dtype, scale = (np.int8, 127) if bits == 8 else (np.dtype("<i2"), 32767)
+    payloads = []
+    for mins, maxs in levels:
+        pairs = np.empty(len(mins) * 2)
+        pairs[0::2], pairs[1::2] = mins, maxs
+        payloads.append(np.clip(np.round(pairs * scale), -scale, scale).astype(dtype).tobytes())
+
+    offset = HEADER.size + LEVEL_ENTRY.size * len(levels)
+    table = b""
+    for (mins, _), payload in zip(levels, payloads):
+        table += LEVEL_ENTRY.pack(len(mins), offset)
+        offset += len(payload)
+    header = HEADER.pack(
+        MAGIC, VERSION, bits, len(levels), sample_rate, samples_per_peak, total_samples
+    )
+    return header + table + b"".join(payloads)
+
+
+def compute_peaks(path):
+    samples_per_peak = settings.WAVEFORM_SAMPLES_PER_PEAK
+    sample_rate, blocks = decode(
+        path, settings.WAVEFORM_SAMPLE_RATE, BLOCK_PEAKS * samples_per_peak
+    )
+    mins, maxs, total = base_peaks(blocks, samples_per_peak)
+    levels = pyramid(mins, maxs, settings.WAVEFORM_MIN_PEAKS)
+    return encode(levels, sample_rate, samples_per_peak, total, settings.WAVEFORM_BITS)
+
+
+# ─── Building and scheduling ─────────────────────────────────────────
+
+
+@contextmanager
+def local_copy(field_file):
+    """Path of ``field_file`` on local disk, for decoders that need one: the
+    file itself on local storage, else a temporary copy."""
+    try:
+        path = field_file.path
+    except NotImplementedError:  # remote storage (R2)
+        path = None
+    if path is not None:
+        yield path
+        return
+    suffix = f"-{field_file.name.rsplit('/', 1)[-1]}"
+    with tempfile.NamedTemporaryFile(suffix=suffix) as copy:
+        with field_file.storage.open(field_file.name, "rb") as source:
+            shutil.copyfileobj(source, copy, COPY_BUFFER_SIZE)
+        copy.flush()
+        yield copy.name
+
+
+def build_peaks(instance):
+    """Compute and store the sidecar for ``instance``'s file and point
+    ``instance.peaks`` at it; returns the stored name."""
+    with local_copy(instance.file) as path:
+        data = compute_peaks(path)
+
+    name = instance.peaks.storage.save(f"{peaks_stem(instance)}.peaks", ContentFile(data))
+    previous = instance.peaks.name
+    type(instance).objects.filter(pk=instance.pk).update(peaks=name)
+    instance.peaks.name = name
+    if previous and previous != name:
+        delete_later(instance.peaks.storage, previous)
+    return name
+
+
+def _build_in_background(model, pk):
+    try:
+        instance = model.objects.filter(pk=pk).first()
+        if instance is not None and wants_peaks(instance) and not peaks_current(instance):
+            build_peaks(instance)
+    except WaveformUnavailable as err:
+        # Every upload is meant to get peaks, so a file that cannot be
+        # decoded here (an MP3 on a host without ffmpeg) needs to be seen.
+        logger.warning("no waveform for %s %s: %s", model._meta.model_name, pk, err)
+    except Exception:
+        logger.exception("waveform build failed for %s %s", model._meta.model_name, pk)
+    finally:
+        close_old_connections()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _submit(model, pk):
+    global _executor
+    if _executor is None:
+        # Uploads commit on several request threads at once: only one of
+        # them may create the pool.
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.WAVEFORM_WORKERS,
+                    thread_name_prefix="waveforms",
+                )
+    _executor.submit(_build_in_background, model, pk)
+
+
+def schedule_peaks(instance):
+    """Build ``instance``'s peaks in the background once the transaction
+    commits, unless they are current already."""
+    if wants_peaks(instance) and not peaks_current(instance):
+        transaction.on_commit(partial(_submit, type(instance), instance.pk))